@@ -1,6 +1,8 @@
 import re
 import logging
-from datetime import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,100 +22,288 @@ def convert_bengali_numerals_to_english(text):
         text = text.replace(bengali, english)
     return text
 
-def calculate_age(dob_str):
+# Canonical spellings for Bengali text compared in searches. Kept in step with
+# the bn_normalize() SQL function (migrations/0004_fulltext_search.sql).
+ZERO_WIDTH_CHARACTERS = ('\u200c', '\u200d')  # ZWNJ, ZWJ
+BENGALI_VOWEL_SIGN_FORMS = [
+    ('\u09c7\u09be', '\u09cb'),  # ে + া -> ো
+    ('\u09c7\u09d7', '\u09cc'),  # ে + ৗ -> ৌ
+    ('\u09dc', '\u09a1\u09bc'),  # ড় -> ড + ়
+    ('\u09dd', '\u09a2\u09bc'),  # ঢ় -> ঢ + ়
+    ('\u09df', '\u09af\u09bc'),  # য় -> য + ়
+]
+
+def normalize_bengali_text(text):
+    """
+    Normalizes Bengali text for searching: folds Bengali numerals to English,
+    removes zero-width joiners, gives two-part vowel signs and nukta letters a
+    single spelling, and lower-cases Latin text.
+    """
+    if not isinstance(text, str):
+        return text
+    text = convert_bengali_numerals_to_english(text)
+    for char in ZERO_WIDTH_CHARACTERS:
+        text = text.replace(char, '')
+    for variant, canonical in BENGALI_VOWEL_SIGN_FORMS:
+        text = text.replace(variant, canonical)
+    return text.lower()
+
+# Date of birth formats, in the order they are tried
+DOB_FORMATS = ["%d-%m-%Y", "%Y-%m-%d", "%m-%d-%Y", "%d/%m/%Y", "%Y/%m/%d", "%m/%d/%Y"]
+
+# str.translate table equivalent to convert_bengali_numerals_to_english
+BENGALI_DIGIT_TABLE = str.maketrans(BENGALI_NUMERALS)
+
+def parse_date_of_birth(dob_str):
+    """
+    Parses a date of birth string (Bengali or English numerals) with the first
+    matching format in DOB_FORMATS. Returns a datetime or None.
+    """
+    if not dob_str:
+        return None
+    dob_str_english = convert_bengali_numerals_to_english(dob_str)
+    for fmt in DOB_FORMATS:
+        try:
+            return datetime.strptime(dob_str_english, fmt)
+        except ValueError:
+            continue # Try next format
+        except TypeError:
+            return None
+    return None
+
+def calculate_age(dob_str, reference_date=None):
     """
     Calculates age from a date of birth string.
     Expects date in DD-MM-YYYY format (English numerals).
+    Ages are computed on reference_date (today by default).
     Returns age as an integer or None if parsing fails.
     """
     if not dob_str:
         return None
-    
-    # Convert any Bengali numerals to English first
-    dob_str_english = convert_bengali_numerals_to_english(dob_str)
 
     try:
-        # Attempt to parse common date formats
         # Prioritize DD-MM-YYYY, then YYYY-MM-DD, then MM-DD-YYYY
-        for fmt in ["%d-%m-%Y", "%Y-%m-%d", "%m-%d-%Y", "%d/%m/%Y", "%Y/%m/%d", "%m/%d/%Y"]:
-            try:
-                birth_date = datetime.strptime(dob_str_english, fmt)
-                today = datetime.today()
-                age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-                return age
-            except ValueError:
-                continue # Try next format
-        logger.warning(f"Could not parse date of birth string: {dob_str}. Returning None for age.")
-        return None
+        birth_date = parse_date_of_birth(dob_str)
+        if birth_date is None:
+            logger.warning(f"Could not parse date of birth string: {dob_str}. Returning None for age.")
+            return None
+        today = reference_date or datetime.today()
+        return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
     except Exception as e:
         logger.error(f"Error calculating age for '{dob_str}': {e}")
         return None
 
+def _birth_date_parts(dob_values):
+    """
+    Vectorized parse_date_of_birth: returns (years, months, days) as nullable
+    integer Series aligned with the input.
+
+    Numerals are converted and each format in DOB_FORMATS is applied with one
+    pandas.to_datetime call to the rows still unparsed, so the formats are tried
+    in the same order as parse_date_of_birth. Rows pandas cannot represent (e.g.
+    years outside its datetime range) fall back to parse_date_of_birth.
+    """
+    import pandas as pd # Imported here so parser worker processes do not load pandas
+
+    raw = pd.Series(dob_values, dtype=object)
+    is_text = raw.map(lambda value: isinstance(value, str) and value != '').astype(bool)
+    text = raw.where(is_text).astype('string').str.translate(BENGALI_DIGIT_TABLE)
+
+    years = pd.Series(pd.NA, index=raw.index, dtype='Int64')
+    months = years.copy()
+    days = years.copy()
+
+    unparsed = is_text.copy()
+    for fmt in DOB_FORMATS:
+        if not unparsed.any():
+            break
+        parsed = pd.to_datetime(text[unparsed], format=fmt, errors='coerce')
+        matched = parsed.notna()
+        if matched.any():
+            index = parsed.index[matched]
+            years[index] = parsed[matched].dt.year.astype('Int64')
+            months[index] = parsed[matched].dt.month.astype('Int64')
+            days[index] = parsed[matched].dt.day.astype('Int64')
+            unparsed[index] = False
+
+    # Values valid for strptime but outside pandas' datetime range
+    for index in unparsed[unparsed].index:
+        birth_date = parse_date_of_birth(raw[index])
+        if birth_date is not None:
+            years[index], months[index], days[index] = birth_date.year, birth_date.month, birth_date.day
+
+    return years, months, days
+
+def parse_dates_of_birth(dob_values):
+    """
+    Parses a whole column of date of birth strings at once. Returns a list of
+    datetime.date objects (None where the value cannot be parsed), in input order.
+    """
+    years, months, days = _birth_date_parts(dob_values)
+    return [
+        None if year is None else date(year, month, day)
+        for year, month, day in zip(
+            years.astype(object).where(years.notna(), None),
+            months.astype(object).where(months.notna(), None),
+            days.astype(object).where(days.notna(), None)
+        )
+    ]
+
+def calculate_ages(dob_values, reference_date=None):
+    """
+    Vectorized calculate_age for a whole column of date of birth strings. All
+    ages are computed against one reference date (today by default). Returns a
+    pandas Series of nullable integers aligned with the input; unparsable values are <NA>.
+    """
+    reference_date = reference_date or datetime.today()
+    years, months, days = _birth_date_parts(dob_values)
+    before_birthday = (months > reference_date.month) | ((months == reference_date.month) & (days > reference_date.day))
+    return reference_date.year - years - before_birthday.astype('Int64')
+
+# --- Record parser ---
+# Patterns are compiled once at import time. Each field keeps the exact pattern
+# the parser has always used, so extracted values are unchanged.
+_PARSE_FLAGS = re.MULTILINE | re.IGNORECASE
+
+# (field, pattern, take full match)
+FIELD_PATTERNS = [
+    ('ক্রমিক_নং', re.compile(r'^([০-৯]+|[0-9]+)\.', _PARSE_FLAGS), True),
+    ('নাম', re.compile(r'নাম:?\s*([^,\n।]+)', _PARSE_FLAGS), False),
+    ('ভোটার_নং', re.compile(r'ভোটার\s*নং:?\s*([^,\n।]+)', _PARSE_FLAGS), False),
+    ('পিতার_নাম', re.compile(r'পিতা:?\s*([^,\n।]+)', _PARSE_FLAGS), False),
+    ('মাতার_নাম', re.compile(r'মাতা:?\s*([^,\n।]+)', _PARSE_FLAGS), False),
+    ('পেশা', re.compile(r'পেশা:?\s*([^,।\n]+)', _PARSE_FLAGS), False),
+    ('জন্ম_তারিখ', re.compile(r'জন্ম\s*তারিখ:?\s*([^,\n।]+)', _PARSE_FLAGS), False),
+    ('ঠিকানা', re.compile(r'ঠিকানা:?\s*([^,\n।]+(?:[,\n।][^,\n।]+)*)', _PARSE_FLAGS), False),
+    ('gender', re.compile(r'লিঙ্গ:?\s*(পুরুষ|মহিলা|অন্যান্য|Male|Female|Other)', _PARSE_FLAGS), False),
+]
+_FIELD_INDEX = {field: (pattern, full_match) for field, pattern, full_match in FIELD_PATTERNS}
+
+# Zero-width scanner reporting every position where a field label could start.
+# One pass over a record yields the candidates for all fields in text order;
+# the field's own pattern is then tried only at those positions.
+_LABEL_SCANNER = re.compile(
+    r'(?=(?P<f0>^[০-৯0-9])|(?P<f1>নাম)|(?P<f2>ভোটার)|(?P<f3>পিতা)|(?P<f4>মাতা)'
+    r'|(?P<f5>পেশা)|(?P<f6>জন্ম)|(?P<f7>ঠিকানা)|(?P<f8>লিঙ্গ))',
+    _PARSE_FLAGS
+)
+_LABEL_FIELDS = {f"f{i}": field for i, (field, _, _) in enumerate(FIELD_PATTERNS)}
+
+# A newline plus the rest of its whitespace run, consumed possessively so a long
+# blank stretch is scanned once; 'next' is set when a numbered record follows.
+_RECORD_BOUNDARY = re.compile(r'\n\s*+(?P<next>(?=[০-৯]+\.|[0-9]+\.))?')
+
+REQUIRED_FIELDS = {'ক্রমিক_নং', 'নাম', 'ভোটার_নং'}
+
+def split_records(content):
+    """
+    Yields the raw text of each numbered record (lines starting with Bengali or
+    English numerals followed by a dot). Runs in time linear in the content.
+    """
+    start = 0
+    for boundary in _RECORD_BOUNDARY.finditer(content):
+        if boundary.group('next') is not None:
+            yield content[start:boundary.start()]
+            start = boundary.end()
+    yield content[start:]
+
+def extract_fields(record):
+    """
+    Extracts all known fields from a single record's text in one scan.
+    Each field takes its first match in the record, as with re.search.
+    """
+    found = {}
+    for candidate in _LABEL_SCANNER.finditer(record):
+        field = _LABEL_FIELDS[candidate.lastgroup]
+        if field in found:
+            continue
+        pattern, full_match = _FIELD_INDEX[field]
+        match = pattern.match(record, candidate.start())
+        if match:
+            # For ক্রমিক_নং, take the full match and remove the dot
+            value = match.group(0).strip() if full_match else match.group(1).strip()
+            if field == 'ক্রমিক_নং':
+                value = value.rstrip('.')
+            found[field] = value.strip()
+            if len(found) == len(FIELD_PATTERNS):
+                break
+    # Keep the field order stable regardless of where each label appeared
+    return {field: found[field] for field, _, _ in FIELD_PATTERNS if field in found}
+
+def iter_records(content, default_gender=None):
+    """
+    Parses text file content lazily, yielding one structured record at a time.
+    Only records with a serial number, name and voter number are yielded.
+    """
+    # Remove BOM and normalize newlines
+    content = content.strip().replace('\ufeff', '').replace('\r\n', '\n')
+
+    for record in split_records(content):
+        if not record.strip():
+            continue
+
+        logger.debug(f"Processing record: {record[:100]}...")
+        record_dict = extract_fields(record)
+
+        # If gender not found in text, use default_gender
+        if 'gender' not in record_dict and default_gender:
+            record_dict['gender'] = default_gender
+
+        # Parse 'জন্ম_তারিখ' into a date; age is computed from it at query time
+        birth_date = parse_date_of_birth(record_dict.get('জন্ম_তারিখ'))
+        record_dict['birth_date'] = birth_date.date() if birth_date else None
+
+        # Only add records that have at least a few key fields
+        if REQUIRED_FIELDS.issubset(record_dict):
+            logger.debug(f"Added record with fields: {list(record_dict.keys())}")
+            yield record_dict
+        else:
+            logger.warning(f"Skipped incomplete record: missing required fields")
+
 def process_text_file(content, default_gender=None):
     """Process the text file content and extract structured data."""
-    records = []
-
     try:
-        # Remove BOM and normalize newlines
-        content = content.strip().replace('\ufeff', '').replace('\r\n', '\n')
-
-        # Split into records using both Bengali and English numerals
-        # This pattern looks for lines starting with numbers followed by a dot
-        raw_records = re.split(r'\n\s*(?=(?:[০-৯]+|[0-9]+)\.)', content)
-        logger.info(f"Initial split found {len(raw_records)} potential records")
-
-        for record in raw_records:
-            if not record.strip():
-                continue
-
-            logger.debug(f"Processing record: {record[:100]}...")
-            record_dict = {}
-
-            # Define field patterns with more flexible matching
-            field_patterns = {
-                'ক্রমিক_নং': (r'^([০-৯]+|[0-9]+)\.', True),  # True means take full match
-                'নাম': (r'নাম:?\s*([^,\n।]+)', False),
-                'ভোটার_নং': (r'ভোটার\s*নং:?\s*([^,\n।]+)', False),
-                'পিতার_নাম': (r'পিতা:?\s*([^,\n।]+)', False),
-                'মাতার_নাম': (r'মাতা:?\s*([^,\n।]+)', False),
-                'পেশা': (r'পেশা:?\s*([^,।\n]+)', False),
-                'জন্ম_তারিখ': (r'জন্ম\s*তারিখ:?\s*([^,\n।]+)', False),
-                'ঠিকানা': (r'ঠিকানা:?\s*([^,\n।]+(?:[,\n।][^,\n।]+)*)', False),
-                'gender': (r'লিঙ্গ:?\s*(পুরুষ|মহিলা|অন্যান্য|Male|Female|Other)', False) # Added gender pattern
-            }
-
-            # Extract each field
-            for field, (pattern, full_match) in field_patterns.items():
-                match = re.search(pattern, record, re.MULTILINE | re.IGNORECASE) # Ignore case for gender
-                if match:
-                    # For ক্রমিক_নং, take the full match and remove the dot
-                    value = match.group(0).strip() if full_match else match.group(1).strip()
-                    if field == 'ক্রমিক_নং':
-                        value = value.rstrip('.')
-                    record_dict[field] = value.strip()
-            
-            # If gender not found in text, use default_gender
-            if 'gender' not in record_dict and default_gender:
-                record_dict['gender'] = default_gender
-
-            # Calculate age from 'জন্ম_তারিখ'
-            dob = record_dict.get('জন্ম_তারিখ')
-            if dob:
-                record_dict['age'] = calculate_age(dob)
-            else:
-                record_dict['age'] = None # Ensure age is set to None if DOB is missing
-
-            # Only add records that have at least a few key fields
-            required_fields = {'ক্রমিক_নং', 'নাম', 'ভোটার_নং'}
-            if all(field in record_dict for field in required_fields):
-                records.append(record_dict)
-                logger.debug(f"Added record with fields: {list(record_dict.keys())}")
-            else:
-                logger.warning(f"Skipped incomplete record: missing required fields")
-
+        records = list(iter_records(content, default_gender))
         logger.info(f"Successfully processed {len(records)} complete records")
         return records
 
     except Exception as e:
         logger.error(f"Error processing file: {str(e)}")
         raise Exception(f"Failed to process file: {str(e)}")
+
+def parse_file_content(raw_bytes, default_gender=None):
+    """Decodes an uploaded file and parses it. Module-level so worker processes can run it."""
+    content = raw_bytes.decode('utf-8')
+    return process_text_file(content, default_gender=default_gender)
+
+def parse_files_parallel(files, default_gender=None, max_workers=None):
+    """
+    Parses (file_name, raw_bytes) pairs across a pool of worker processes.
+    Yields (file_name, records, error) in the original file order, each as
+    soon as that file and all earlier ones are parsed, so the caller can write
+    to the database while later files are still being parsed. A file that
+    fails yields its exception as `error` and records=None.
+    """
+    files = list(files)
+    if max_workers is None or max_workers > len(files):
+        max_workers = len(files)
+
+    if max_workers <= 1:
+        for file_name, raw_bytes in files:
+            try:
+                yield file_name, parse_file_content(raw_bytes, default_gender), None
+            except Exception as e:
+                yield file_name, None, e
+        return
+
+    # 'spawn' avoids forking the multi-threaded Streamlit server process
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = [
+            (file_name, executor.submit(parse_file_content, raw_bytes, default_gender))
+            for file_name, raw_bytes in files
+        ]
+        for file_name, future in futures:
+            try:
+                yield file_name, future.result(), None
+            except Exception as e:
+                yield file_name, None, e
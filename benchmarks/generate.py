@@ -0,0 +1,115 @@
+"""
+Seeded generator of synthetic Bengali voter lists in the text format parsed by
+attached_assets.data_processor.process_text_file. The same seed always
+produces the same files, so benchmark runs are comparable.
+
+    python -m benchmarks.generate --records 100000 --output /tmp/voters
+"""
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+from attached_assets.data_processor import BENGALI_NUMERALS
+
+# Records per generated file; real voter lists come split by area and gender
+RECORDS_PER_FILE = 5000
+
+MALE_FIRST_NAMES = [
+    'মোহাম্মদ', 'আব্দুল', 'মোঃ', 'রহিম', 'করিম', 'জসিম', 'হাসান', 'হোসেন', 'কামাল', 'জামাল',
+    'রফিক', 'শফিক', 'আনোয়ার', 'মাহমুদ', 'সাইফুল', 'নজরুল', 'আলমগীর', 'মিজানুর', 'শাহাদাত', 'রাকিব',
+]
+FEMALE_FIRST_NAMES = [
+    'ফাতেমা', 'আয়েশা', 'রহিমা', 'করিমা', 'নাসরিন', 'শাহনাজ', 'রোকেয়া', 'সালমা', 'রাবেয়া', 'মরিয়ম',
+    'জাহানারা', 'শিরিন', 'পারভীন', 'নাজমা', 'হালিমা', 'খাদিজা', 'সুমাইয়া', 'তাসলিমা', 'মাহমুদা', 'রুমানা',
+]
+MALE_SURNAMES = [
+    'উদ্দিন', 'হোসেন', 'ইসলাম', 'রহমান', 'আলী', 'মিয়া', 'সরকার', 'মন্ডল', 'প্রামানিক', 'শেখ',
+    'খান', 'চৌধুরী', 'তালুকদার', 'ভূঁইয়া', 'হক',
+]
+FEMALE_SURNAMES = ['বেগম', 'খাতুন', 'আক্তার', 'বিবি', 'নেসা', 'ইসলাম', 'রহমান', 'সুলতানা']
+OCCUPATIONS = [
+    'কৃষক', 'গৃহিণী', 'ব্যবসা', 'ছাত্র', 'ছাত্রী', 'চাকুরী', 'শিক্ষক', 'দিনমজুর', 'ড্রাইভার',
+    'প্রবাসী', 'অবসরপ্রাপ্ত', 'বেকার', 'দর্জি', 'জেলে',
+]
+VILLAGES = [
+    'চরপাড়া', 'মধ্যপাড়া', 'উত্তরপাড়া', 'দক্ষিণপাড়া', 'পূর্বপাড়া', 'পশ্চিমপাড়া', 'হাটখোলা',
+    'নদীরপাড়', 'বটতলা', 'কাজীপাড়া', 'মিয়াবাড়ী', 'খানবাড়ী', 'পুরাতন বাজার', 'নতুন বাজার',
+]
+UNIONS = ['রামপুর', 'শ্যামপুর', 'গোবিন্দপুর', 'কালিকাপুর', 'সোনাপুর', 'চাঁদপুর', 'ফুলবাড়ী', 'নওদাপাড়া']
+UPAZILAS = ['সদর', 'কালিয়াকৈর', 'শ্রীপুর', 'কাপাসিয়া', 'কালীগঞ্জ', 'টঙ্গী']
+
+ENGLISH_TO_BENGALI = str.maketrans({english: bengali for bengali, english in BENGALI_NUMERALS.items()})
+
+# Birth dates between these are generated (ages of eligible voters)
+OLDEST_BIRTH_DATE = date(1930, 1, 1)
+YOUNGEST_BIRTH_DATE = date(2006, 12, 31)
+
+
+def bengali_digits(value):
+    """Writes a number (or a string of digits) with Bengali numerals."""
+    return str(value).translate(ENGLISH_TO_BENGALI)
+
+
+def full_name(rng, female):
+    if female:
+        return f"{rng.choice(FEMALE_FIRST_NAMES)} {rng.choice(FEMALE_SURNAMES)}"
+    return f"{rng.choice(MALE_FIRST_NAMES)} {rng.choice(MALE_SURNAMES)}"
+
+
+def birth_date_text(rng):
+    """A date of birth as printed in voter lists: mostly Bengali numerals, in any of the parser's formats."""
+    birth_date = OLDEST_BIRTH_DATE + timedelta(days=rng.randrange((YOUNGEST_BIRTH_DATE - OLDEST_BIRTH_DATE).days))
+    text = birth_date.strftime(rng.choice(["%d/%m/%Y", "%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d"]))
+    return bengali_digits(text) if rng.random() < 0.9 else text
+
+
+def voter_record(rng, serial, voter_no, female):
+    """One record in the upload format (see the README's input data format)."""
+    area = f"{rng.choice(VILLAGES)}, {rng.choice(UNIONS)}, {rng.choice(UPAZILAS)}"
+    return (
+        f"{bengali_digits(serial)}.\n"
+        f"নাম: {full_name(rng, female)},\n"
+        f"ভোটার নং: {bengali_digits(voter_no)},\n"
+        f"পিতা: {full_name(rng, False)},\n"
+        f"মাতা: {full_name(rng, True)},\n"
+        f"পেশা: {rng.choice(OCCUPATIONS)},\n"
+        f"জন্ম তারিখ: {birth_date_text(rng)},\n"
+        f"ঠিকানা: {area},\n"
+    )
+
+
+def generate_files(total_records, seed=0, records_per_file=RECORDS_PER_FILE):
+    """
+    Yields (file name, gender, text) for voter lists holding total_records
+    records. Files alternate between male and female lists, as in real uploads.
+    """
+    rng = random.Random(seed)
+    voter_no = 1000000000000 + rng.randrange(10 ** 9)
+    for file_number, start in enumerate(range(0, total_records, records_per_file), start=1):
+        count = min(records_per_file, total_records - start)
+        female = file_number % 2 == 0
+        records = []
+        for serial in range(1, count + 1):
+            voter_no += rng.randrange(1, 50)
+            records.append(voter_record(rng, serial, voter_no, female))
+        yield f"voters_{file_number:04d}.txt", 'Female' if female else 'Male', "\n".join(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Bengali voter list files.")
+    parser.add_argument('--records', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--records-per-file', type=int, default=RECORDS_PER_FILE)
+    parser.add_argument('--output', required=True, help="Directory to write the .txt files to")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    for file_name, gender, text in generate_files(args.records, args.seed, args.records_per_file):
+        with open(os.path.join(args.output, file_name), 'w', encoding='utf-8') as output:
+            output.write(text)
+        print(f"{file_name} ({gender})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+A throwaway PostgreSQL server for benchmarks: initdb into a temporary
+directory, start it on a free port listening only on a Unix socket, and
+delete everything when done. Needs the PostgreSQL server binaries (initdb,
+pg_ctl) on PATH or under `pg_config --bindir`, including the contrib
+extensions (pg_trgm), and must not run as root.
+"""
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+
+def _binary(name):
+    path = shutil.which(name)
+    if path:
+        return path
+    try:
+        bindir = subprocess.run(['pg_config', '--bindir'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        bindir = None
+    if bindir and os.path.exists(os.path.join(bindir, name)):
+        return os.path.join(bindir, name)
+    raise RuntimeError(f"PostgreSQL binary '{name}' not found; install the server or pass --dsn.")
+
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+@contextmanager
+def disposable_postgres(dbname='voters_bench'):
+    """Yields psycopg2 connection parameters for a fresh, empty database."""
+    directory = tempfile.mkdtemp(prefix='voters_bench_pg_')
+    data_dir = os.path.join(directory, 'data')
+    port = _free_port()
+    user = 'bench'
+    subprocess.run(
+        [_binary('initdb'), '-D', data_dir, '-U', user, '--auth=trust', '--encoding=UTF8', '--no-locale'],
+        check=True, capture_output=True
+    )
+    subprocess.run(
+        [_binary('pg_ctl'), '-D', data_dir, '-l', os.path.join(directory, 'server.log'), '-w',
+         '-o', f"-p {port} -k {directory} -c listen_addresses=''", 'start'],
+        check=True, capture_output=True
+    )
+    try:
+        subprocess.run(
+            [_binary('createdb'), '-h', directory, '-p', str(port), '-U', user, dbname],
+            check=True, capture_output=True
+        )
+        yield {'dbname': dbname, 'user': user, 'password': '', 'host': directory, 'port': port}
+    finally:
+        subprocess.run([_binary('pg_ctl'), '-D', data_dir, '-m', 'immediate', '-w', 'stop'], capture_output=True)
+        shutil.rmtree(directory, ignore_errors=True)
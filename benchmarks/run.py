@@ -0,0 +1,228 @@
+"""
+Benchmarks the parser and the Database layer against a disposable PostgreSQL
+server on synthetic voter lists (benchmarks/generate.py) and writes the
+results as JSON. With --baseline, the results are compared with an earlier
+run's JSON and the exit status is 1 if any metric regressed beyond the
+threshold.
+
+    python -m benchmarks.run --sizes 10k,100k --output bench.json
+    python -m benchmarks.run --sizes 10k --baseline bench.json
+
+--dsn runs against an existing database instead; ALL of its data is deleted.
+The read caches are disabled so every call reaches the database.
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+from attached_assets.data_processor import calculate_ages, process_text_file
+from benchmarks.generate import generate_files
+from benchmarks.postgres import disposable_postgres
+from utils import database
+from utils.connection_pool import ConnectionPool
+from utils.index_check import SEARCH_SHAPES
+from utils.metadata_cache import metadata_cache
+from utils.query_cache import QueryCache
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SIZE_SUFFIXES = {'k': 1000, 'm': 1000000}
+
+# Fraction by which a metric may get worse before it counts as a regression
+DEFAULT_THRESHOLD = 0.2
+
+
+def parse_size(text):
+    """Parses record counts such as '10k', '1m' or '25000'."""
+    text = text.strip().lower()
+    if text[-1:] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def timed(function, repeat, warmup=1):
+    """Runs function warmup + repeat times and summarizes the timed runs in milliseconds."""
+    for _ in range(warmup):
+        function()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'median_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        'min_ms': round(samples[0], 3),
+        'runs': repeat,
+    }
+
+
+def throughput(records, seconds):
+    return {'records': records, 'seconds': round(seconds, 3), 'records_per_s': round(records / seconds, 1) if seconds else None}
+
+
+def shape_name(criteria):
+    return "+".join(criteria)
+
+
+def run_size(db, size, seed, repeat):
+    """Runs every benchmark on a fresh data set of `size` records. Returns {metric: result}."""
+    results = {}
+
+    started = time.perf_counter()
+    files = list(generate_files(size, seed))
+    logger.info(f"Generated {size} records in {len(files)} files in {time.perf_counter() - started:.1f}s")
+
+    # Parse throughput (single process, as one worker of parse_files_parallel)
+    parsed = []
+    started = time.perf_counter()
+    for file_name, gender, text in files:
+        parsed.append((file_name, process_text_file(text, default_gender=gender)))
+    parsed_records = sum(len(records) for _, records in parsed)
+    results['parse'] = throughput(parsed_records, time.perf_counter() - started)
+    if parsed_records != size:
+        raise RuntimeError(f"Parser returned {parsed_records} of {size} generated records")
+
+    # Ingest throughput: one batch, one COPY stream per file, one commit
+    db.clear_all_data()
+    started = time.perf_counter()
+    batch_id = db.add_batch(f"bench_{size}")
+    for file_name, records in parsed:
+        db.add_records_bulk(batch_id, file_name, records)
+    db.commit_changes()
+    results['ingest'] = throughput(parsed_records, time.perf_counter() - started)
+    dob_values = [record.get('জন্ম_তারিখ') for _, records in parsed for record in records]
+    del parsed
+
+    # Fresh statistics, as autovacuum would have gathered on a live database
+    with db.cursor() as cur:
+        cur.execute("ANALYZE")
+        db.conn.commit()
+
+    # Search latency per criteria shape (first page, as the search pages fetch it)
+    for criteria in SEARCH_SHAPES:
+        results[f"search:{shape_name(criteria)}"] = timed(
+            lambda: db.search_records_advanced(criteria, limit=25), repeat
+        )
+        results[f"count:{shape_name(criteria)}"] = timed(lambda: db.count_records_advanced(criteria), repeat)
+
+    results['dashboard_stats'] = timed(db.get_dashboard_stats, repeat)
+
+    # Batch listing: metadata lists read from the database, then the first All Data page
+    def list_batches():
+        metadata_cache.invalidate()
+        db.get_all_batches()
+        db.get_batch_files(batch_id)
+    results['batch_listing'] = timed(list_batches, repeat)
+    results['records_page'] = timed(lambda: db.get_records_page(batch_id, limit=100), repeat)
+
+    # Ages: computed at query time in SQL, and vectorized from text for uploads
+    results['analysis_stats'] = timed(db.get_analysis_stats, repeat)
+    started = time.perf_counter()
+    calculate_ages(dob_values)
+    results['calculate_ages'] = throughput(len(dob_values), time.perf_counter() - started)
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Returns (size, metric, baseline value, new value, change) rows, and whether any regressed."""
+    rows = []
+    regressed = False
+    for size, metrics in results.items():
+        for metric, result in metrics.items():
+            previous = baseline.get('results', {}).get(size, {}).get(metric)
+            if not previous:
+                continue
+            if 'median_ms' in result:
+                old, new = previous['median_ms'], result['median_ms']
+                change = (new - old) / old if old else 0.0  # Slower is worse
+            elif result.get('records_per_s'):
+                old, new = previous['records_per_s'], result['records_per_s']
+                change = (old - new) / old if old else 0.0  # Fewer records per second is worse
+            else:
+                continue
+            worse = change > threshold
+            regressed |= worse
+            rows.append((size, metric, old, new, change, worse))
+    return rows, regressed
+
+
+def environment(db):
+    with db.cursor() as cur:
+        cur.execute("SHOW server_version")
+        server_version = cur.fetchone()[0]
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'postgres': server_version,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parser and database layer.")
+    parser.add_argument('--sizes', default='10k', help="Comma-separated record counts, e.g. 10k,100k,1m")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=20, help="Timed runs per latency benchmark")
+    parser.add_argument('--dsn', help="Use this (disposable!) database instead of starting a temporary server")
+    parser.add_argument('--output', help="Write the JSON results to this file (default: stdout)")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown that counts as a regression (default 0.2 = 20%%)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger('attached_assets.data_processor').setLevel(logging.WARNING)
+
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    server = nullcontext({'dsn': args.dsn}) if args.dsn else disposable_postgres()
+    with server as connect_kwargs:
+        # Database normally reads these from Streamlit secrets
+        database._pool = ConnectionPool(connect_kwargs, min_size=1, max_size=4)
+        database._query_cache = QueryCache(max_bytes=0)  # Nothing fits: every read reaches the database
+        db = database.Database()
+
+        report = {
+            'meta': dict(environment(db), seed=args.seed, repeat=args.repeat, sizes=sizes),
+            'results': {},
+        }
+        for size in sizes:
+            logger.info(f"Benchmarking {size} records")
+            report['results'][str(size)] = run_size(db, size, args.seed, args.repeat)
+        db.clear_all_data()
+        db.release()
+        database._pool.closeall()
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        rows, regressed = compare(report['results'], baseline, args.threshold)
+        for size, metric, old, new, change, worse in rows:
+            print(f"{'REGRESSED' if worse else 'ok':9} {size:>8} {metric:40} {old:>12} -> {new:>12} ({change:+.1%})",
+                  file=sys.stderr)
+        sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
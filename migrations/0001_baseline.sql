@@ -0,0 +1,65 @@
+-- Baseline schema: the tables previously created by Database.create_tables()
+-- plus the columns and photo_link default added by add_missing_columns().
+
+-- Batches Table: Stores information about data batches.
+CREATE TABLE IF NOT EXISTS batches (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) UNIQUE NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Records Table: Stores the main data records.
+CREATE TABLE IF NOT EXISTS records (
+    id SERIAL PRIMARY KEY,
+    batch_id INTEGER REFERENCES batches(id) ON DELETE CASCADE,
+    file_name VARCHAR(255),
+    ক্রমিক_নং VARCHAR(50),
+    নাম TEXT,
+    ভোটার_নং VARCHAR(100),
+    পিতার_নাম TEXT,
+    মাতার_নাম TEXT,
+    পেশা TEXT,
+    occupation_details TEXT,
+    জন্ম_তারিখ VARCHAR(100),
+    ঠিকানা TEXT,
+    phone_number VARCHAR(50),
+    whatsapp_number VARCHAR(100),
+    facebook_link TEXT,
+    tiktok_link TEXT,
+    youtube_link TEXT,
+    insta_link TEXT,
+    photo_link TEXT DEFAULT 'https://placehold.co/100x100/EEE/31343C?text=No+Image',
+    description TEXT,
+    political_status TEXT,
+    relationship_status VARCHAR(20) DEFAULT 'Regular',
+    gender VARCHAR(10),
+    age INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Events Table: Stores event information.
+CREATE TABLE IF NOT EXISTS events (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) UNIQUE NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Record-Events Junction Table: Manages the many-to-many relationship between records and events.
+CREATE TABLE IF NOT EXISTS record_events (
+    record_id INTEGER REFERENCES records(id) ON DELETE CASCADE,
+    event_id INTEGER REFERENCES events(id) ON DELETE CASCADE,
+    PRIMARY KEY (record_id, event_id)
+);
+
+-- Columns added after the first deployments; no-ops on fresh databases.
+ALTER TABLE records ADD COLUMN IF NOT EXISTS age INTEGER;
+ALTER TABLE records ADD COLUMN IF NOT EXISTS political_status TEXT;
+ALTER TABLE records ADD COLUMN IF NOT EXISTS tiktok_link TEXT;
+ALTER TABLE records ADD COLUMN IF NOT EXISTS youtube_link TEXT;
+ALTER TABLE records ADD COLUMN IF NOT EXISTS insta_link TEXT;
+ALTER TABLE records ADD COLUMN IF NOT EXISTS occupation_details TEXT;
+ALTER TABLE records ADD COLUMN IF NOT EXISTS whatsapp_number VARCHAR(100);
+
+-- Default photo for records without one (backfilled once here instead of on every page load)
+ALTER TABLE records ALTER COLUMN photo_link SET DEFAULT 'https://placehold.co/100x100/EEE/31343C?text=No+Image';
+UPDATE records SET photo_link = 'https://placehold.co/100x100/EEE/31343C?text=No+Image' WHERE photo_link IS NULL OR photo_link = '';
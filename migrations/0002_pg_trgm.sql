@@ -0,0 +1,2 @@
+-- Trigram support for the substring (ILIKE '%value%') searches on records.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
@@ -0,0 +1,23 @@
+-- migrate:no-transaction
+-- Indexes for the Search / Editable Search filters and the hot batch, file,
+-- relationship, gender and event filters. Built CONCURRENTLY so writes are not
+-- blocked on large tables. Keep in sync with SEARCH_INDEXES in utils/index_check.py.
+
+-- Trigram GIN indexes for the substring-searched text columns
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_name_trgm ON records USING gin (নাম gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_father_name_trgm ON records USING gin (পিতার_নাম gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_mother_name_trgm ON records USING gin (মাতার_নাম gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_address_trgm ON records USING gin (ঠিকানা gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_phone_trgm ON records USING gin (phone_number gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_voter_no_trgm ON records USING gin (ভোটার_নং gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_serial_no_trgm ON records USING gin (ক্রমিক_নং gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_occupation_trgm ON records USING gin (পেশা gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_dob_trgm ON records USING gin (জন্ম_তারিখ gin_trgm_ops);
+
+-- Btree indexes for foreign keys and equality filters; (batch_id, id) also serves
+-- the keyset pagination on the All Data page.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_batch_id ON records (batch_id, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_batch_file ON records (batch_id, file_name, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_relationship_status ON records (relationship_status);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_gender ON records (gender);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_record_events_event_id ON record_events (event_id, record_id);
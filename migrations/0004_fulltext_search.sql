@@ -0,0 +1,57 @@
+-- Full-text search over the record text fields.
+-- bn_normalize() mirrors normalize_bengali_text() in attached_assets/data_processor.py:
+-- Bengali numerals are folded to English, ZWNJ/ZWJ are removed, two-part vowel
+-- signs and nukta letters get one spelling, and Latin text is lower-cased.
+CREATE OR REPLACE FUNCTION bn_normalize(value TEXT) RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT lower(
+        replace(replace(replace(replace(replace(
+            translate(coalesce(value, ''), '০১২৩৪৫৬৭৮৯' || U&'\200C\200D', '0123456789'),
+            U&'\09C7\09BE', U&'\09CB'),
+            U&'\09C7\09D7', U&'\09CC'),
+            U&'\09DC', U&'\09A1\09BC'),
+            U&'\09DD', U&'\09A2\09BC'),
+            U&'\09DF', U&'\09AF\09BC')
+    )
+$$;
+
+-- Search document of one record. Names rank above parents' names and address,
+-- which rank above the rest.
+CREATE OR REPLACE FUNCTION record_search_document(
+    name TEXT, father_name TEXT, mother_name TEXT, address TEXT, occupation TEXT,
+    occupation_details TEXT, voter_no TEXT, serial_no TEXT, phone_number TEXT
+) RETURNS TSVECTOR
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT setweight(to_tsvector('simple', bn_normalize(name)), 'A') ||
+           setweight(to_tsvector('simple', bn_normalize(father_name)), 'B') ||
+           setweight(to_tsvector('simple', bn_normalize(mother_name)), 'B') ||
+           setweight(to_tsvector('simple', bn_normalize(address)), 'B') ||
+           setweight(to_tsvector('simple', bn_normalize(occupation)), 'C') ||
+           setweight(to_tsvector('simple', bn_normalize(occupation_details)), 'C') ||
+           setweight(to_tsvector('simple', bn_normalize(voter_no)), 'C') ||
+           setweight(to_tsvector('simple', bn_normalize(serial_no)), 'C') ||
+           setweight(to_tsvector('simple', bn_normalize(phone_number)), 'C')
+$$;
+
+-- A plain nullable column is added without rewriting records (a generated
+-- column would rewrite the whole table under an exclusive lock). The trigger
+-- keeps it current for new and edited records, and
+-- 0005_backfill_search_document.py fills it for existing ones in batches.
+ALTER TABLE records ADD COLUMN IF NOT EXISTS search_document TSVECTOR;
+
+CREATE OR REPLACE FUNCTION records_set_search_document() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_document := record_search_document(
+        NEW.নাম, NEW.পিতার_নাম, NEW.মাতার_নাম, NEW.ঠিকানা, NEW.পেশা,
+        NEW.occupation_details, NEW.ভোটার_নং, NEW.ক্রমিক_নং, NEW.phone_number
+    );
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS records_set_search_document ON records;
+CREATE TRIGGER records_set_search_document
+    BEFORE INSERT OR UPDATE OF নাম, পিতার_নাম, মাতার_নাম, ঠিকানা, পেশা, occupation_details, ভোটার_নং, ক্রমিক_নং, phone_number
+    ON records
+    FOR EACH ROW EXECUTE FUNCTION records_set_search_document();
@@ -0,0 +1,40 @@
+"""
+Fills records.search_document for records written before 0004 added it, then
+builds its GIN index. Runs in autocommit mode, one chunk per statement, so a
+large table is never locked for the whole backfill; an interrupted run resumes
+where it stopped. Records written meanwhile get their document from the trigger.
+"""
+TRANSACTIONAL = False
+
+CHUNK_SIZE = 10000
+
+
+def migrate(conn):
+    last_id = 0
+    with conn.cursor() as cur:
+        while True:
+            cur.execute("""
+                WITH chunk AS (
+                    SELECT id FROM records
+                    WHERE id > %s AND search_document IS NULL
+                    ORDER BY id
+                    LIMIT %s
+                )
+                UPDATE records r
+                SET search_document = record_search_document(
+                    r.নাম, r.পিতার_নাম, r.মাতার_নাম, r.ঠিকানা, r.পেশা,
+                    r.occupation_details, r.ভোটার_নং, r.ক্রমিক_নং, r.phone_number
+                )
+                FROM chunk
+                WHERE r.id = chunk.id
+                RETURNING r.id
+            """, (last_id, CHUNK_SIZE))
+            updated_ids = [row[0] for row in cur.fetchall()]
+            if not updated_ids:
+                break
+            last_id = max(updated_ids)
+
+        # Built after the backfill, so the index is written once rather than row by row
+        cur.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_search_document ON records USING gin (search_document)"
+        )
@@ -0,0 +1,87 @@
+-- Summary of record counts by batch, file, gender, relationship status and age
+-- group, kept current by statement-level triggers on records. The dashboard and
+-- batch counters read this table instead of scanning records.
+-- NULLs are stored as '' (text) or -1 (age_group) so every group has one key.
+CREATE TABLE IF NOT EXISTS record_counts (
+    batch_id INTEGER NOT NULL,
+    file_name VARCHAR(255) NOT NULL DEFAULT '',
+    gender VARCHAR(10) NOT NULL DEFAULT '',
+    relationship_status VARCHAR(20) NOT NULL DEFAULT '',
+    age_group INTEGER NOT NULL DEFAULT -1,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (batch_id, file_name, gender, relationship_status, age_group)
+);
+
+-- Applies the net change of one INSERT, UPDATE or DELETE statement to record_counts.
+-- Groups whose count reaches zero are removed.
+CREATE OR REPLACE FUNCTION record_counts_apply() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO record_counts AS rc (batch_id, file_name, gender, relationship_status, age_group, count)
+        SELECT COALESCE(batch_id, 0), COALESCE(file_name, ''), COALESCE(gender, ''),
+               COALESCE(relationship_status, ''), COALESCE(age / 10 * 10, -1), COUNT(*)
+        FROM new_rows
+        GROUP BY 1, 2, 3, 4, 5
+        ORDER BY 1, 2, 3, 4, 5
+        ON CONFLICT (batch_id, file_name, gender, relationship_status, age_group)
+        DO UPDATE SET count = rc.count + EXCLUDED.count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO record_counts AS rc (batch_id, file_name, gender, relationship_status, age_group, count)
+        SELECT COALESCE(batch_id, 0), COALESCE(file_name, ''), COALESCE(gender, ''),
+               COALESCE(relationship_status, ''), COALESCE(age / 10 * 10, -1), -COUNT(*)
+        FROM old_rows
+        GROUP BY 1, 2, 3, 4, 5
+        ORDER BY 1, 2, 3, 4, 5
+        ON CONFLICT (batch_id, file_name, gender, relationship_status, age_group)
+        DO UPDATE SET count = rc.count + EXCLUDED.count;
+        DELETE FROM record_counts WHERE count <= 0;
+    ELSE
+        -- Most updates (names, links, ...) leave every group unchanged and write nothing
+        INSERT INTO record_counts AS rc (batch_id, file_name, gender, relationship_status, age_group, count)
+        SELECT batch_id, file_name, gender, relationship_status, age_group, SUM(delta)
+        FROM (
+            SELECT COALESCE(batch_id, 0) AS batch_id, COALESCE(file_name, '') AS file_name,
+                   COALESCE(gender, '') AS gender, COALESCE(relationship_status, '') AS relationship_status,
+                   COALESCE(age / 10 * 10, -1) AS age_group, 1 AS delta
+            FROM new_rows
+            UNION ALL
+            SELECT COALESCE(batch_id, 0), COALESCE(file_name, ''), COALESCE(gender, ''),
+                   COALESCE(relationship_status, ''), COALESCE(age / 10 * 10, -1), -1
+            FROM old_rows
+        ) changes
+        GROUP BY 1, 2, 3, 4, 5
+        HAVING SUM(delta) <> 0
+        ORDER BY 1, 2, 3, 4, 5
+        ON CONFLICT (batch_id, file_name, gender, relationship_status, age_group)
+        DO UPDATE SET count = rc.count + EXCLUDED.count;
+        DELETE FROM record_counts WHERE count <= 0;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+-- Block writes while the triggers are installed and the table is backfilled,
+-- so no statement is counted twice or missed.
+LOCK TABLE records IN SHARE ROW EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS records_counts_insert ON records;
+DROP TRIGGER IF EXISTS records_counts_update ON records;
+DROP TRIGGER IF EXISTS records_counts_delete ON records;
+
+CREATE TRIGGER records_counts_insert AFTER INSERT ON records
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_counts_apply();
+CREATE TRIGGER records_counts_update AFTER UPDATE ON records
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_counts_apply();
+CREATE TRIGGER records_counts_delete AFTER DELETE ON records
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_counts_apply();
+
+TRUNCATE record_counts;
+INSERT INTO record_counts (batch_id, file_name, gender, relationship_status, age_group, count)
+SELECT COALESCE(batch_id, 0), COALESCE(file_name, ''), COALESCE(gender, ''),
+       COALESCE(relationship_status, ''), COALESCE(age / 10 * 10, -1), COUNT(*)
+FROM records
+GROUP BY 1, 2, 3, 4, 5;
@@ -0,0 +1,111 @@
+-- Typed date of birth. birth_date is parsed from জন্ম_তারিখ by the application
+-- (attached_assets/data_processor.parse_date_of_birth) and age is computed from
+-- it at query time, so the stored age column, which went stale every day, is dropped.
+ALTER TABLE records ADD COLUMN IF NOT EXISTS birth_date DATE;
+
+-- Age in whole years on the current date; used by every query that shows or
+-- groups by age. STABLE, as the result changes with the calendar.
+CREATE OR REPLACE FUNCTION age_in_years(birth_date DATE) RETURNS INTEGER
+LANGUAGE sql STABLE PARALLEL SAFE AS $$
+    SELECT date_part('year', age(current_date, birth_date))::integer
+$$;
+
+-- Record counts per birth date, for the exact age distribution on the dashboard.
+CREATE TABLE IF NOT EXISTS birth_date_counts (
+    birth_date DATE PRIMARY KEY,
+    count BIGINT NOT NULL DEFAULT 0
+);
+
+-- record_counts loses its age_group key: ages change with the calendar, birth dates do not.
+LOCK TABLE records IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE OR REPLACE FUNCTION record_counts_apply() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO record_counts AS rc (batch_id, file_name, gender, relationship_status, count)
+        SELECT COALESCE(batch_id, 0), COALESCE(file_name, ''), COALESCE(gender, ''),
+               COALESCE(relationship_status, ''), COUNT(*)
+        FROM new_rows
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (batch_id, file_name, gender, relationship_status)
+        DO UPDATE SET count = rc.count + EXCLUDED.count;
+
+        INSERT INTO birth_date_counts AS bc (birth_date, count)
+        SELECT birth_date, COUNT(*)
+        FROM new_rows
+        WHERE birth_date IS NOT NULL
+        GROUP BY 1
+        ORDER BY 1
+        ON CONFLICT (birth_date) DO UPDATE SET count = bc.count + EXCLUDED.count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO record_counts AS rc (batch_id, file_name, gender, relationship_status, count)
+        SELECT COALESCE(batch_id, 0), COALESCE(file_name, ''), COALESCE(gender, ''),
+               COALESCE(relationship_status, ''), -COUNT(*)
+        FROM old_rows
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (batch_id, file_name, gender, relationship_status)
+        DO UPDATE SET count = rc.count + EXCLUDED.count;
+        DELETE FROM record_counts WHERE count <= 0;
+
+        INSERT INTO birth_date_counts AS bc (birth_date, count)
+        SELECT birth_date, -COUNT(*)
+        FROM old_rows
+        WHERE birth_date IS NOT NULL
+        GROUP BY 1
+        ORDER BY 1
+        ON CONFLICT (birth_date) DO UPDATE SET count = bc.count + EXCLUDED.count;
+        DELETE FROM birth_date_counts WHERE count <= 0;
+    ELSE
+        -- Most updates (names, links, ...) leave every group unchanged and write nothing
+        INSERT INTO record_counts AS rc (batch_id, file_name, gender, relationship_status, count)
+        SELECT batch_id, file_name, gender, relationship_status, SUM(delta)
+        FROM (
+            SELECT COALESCE(batch_id, 0) AS batch_id, COALESCE(file_name, '') AS file_name,
+                   COALESCE(gender, '') AS gender, COALESCE(relationship_status, '') AS relationship_status,
+                   1 AS delta
+            FROM new_rows
+            UNION ALL
+            SELECT COALESCE(batch_id, 0), COALESCE(file_name, ''), COALESCE(gender, ''),
+                   COALESCE(relationship_status, ''), -1
+            FROM old_rows
+        ) changes
+        GROUP BY 1, 2, 3, 4
+        HAVING SUM(delta) <> 0
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (batch_id, file_name, gender, relationship_status)
+        DO UPDATE SET count = rc.count + EXCLUDED.count;
+        DELETE FROM record_counts WHERE count <= 0;
+
+        INSERT INTO birth_date_counts AS bc (birth_date, count)
+        SELECT birth_date, SUM(delta)
+        FROM (
+            SELECT birth_date, 1 AS delta FROM new_rows WHERE birth_date IS NOT NULL
+            UNION ALL
+            SELECT birth_date, -1 FROM old_rows WHERE birth_date IS NOT NULL
+        ) changes
+        GROUP BY 1
+        HAVING SUM(delta) <> 0
+        ORDER BY 1
+        ON CONFLICT (birth_date) DO UPDATE SET count = bc.count + EXCLUDED.count;
+        DELETE FROM birth_date_counts WHERE count <= 0;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+TRUNCATE record_counts;
+ALTER TABLE record_counts DROP CONSTRAINT IF EXISTS record_counts_pkey;
+ALTER TABLE record_counts DROP COLUMN IF EXISTS age_group;
+ALTER TABLE record_counts ADD PRIMARY KEY (batch_id, file_name, gender, relationship_status);
+INSERT INTO record_counts (batch_id, file_name, gender, relationship_status, count)
+SELECT COALESCE(batch_id, 0), COALESCE(file_name, ''), COALESCE(gender, ''),
+       COALESCE(relationship_status, ''), COUNT(*)
+FROM records
+GROUP BY 1, 2, 3, 4;
+
+-- birth_date is still empty here; 0008_backfill_birth_date.py fills it and the
+-- update trigger fills birth_date_counts as it goes.
+ALTER TABLE records DROP COLUMN IF EXISTS age;
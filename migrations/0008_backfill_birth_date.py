@@ -0,0 +1,44 @@
+"""
+Fills records.birth_date from জন্ম_তারিখ for records written before the column
+existed. Runs in autocommit mode, one chunk per statement, so a large table is
+never locked for the whole backfill; an interrupted run resumes where it stopped.
+"""
+from psycopg2.extras import execute_values
+
+from attached_assets.data_processor import parse_dates_of_birth
+
+TRANSACTIONAL = False
+
+CHUNK_SIZE = 10000
+
+
+def migrate(conn):
+    last_id = 0
+    with conn.cursor() as cur:
+        while True:
+            cur.execute("""
+                SELECT id, জন্ম_তারিখ
+                FROM records
+                WHERE id > %s AND birth_date IS NULL AND জন্ম_তারিখ IS NOT NULL AND জন্ম_তারিখ != ''
+                ORDER BY id
+                LIMIT %s
+            """, (last_id, CHUNK_SIZE))
+            rows = cur.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            birth_dates = parse_dates_of_birth([dob for _, dob in rows])
+            values = [(record_id, birth_date) for (record_id, _), birth_date in zip(rows, birth_dates) if birth_date]
+            if values:
+                execute_values(
+                    cur,
+                    """
+                    UPDATE records AS r SET birth_date = v.birth_date
+                    FROM (VALUES %s) AS v(id, birth_date)
+                    WHERE r.id = v.id
+                    """,
+                    values,
+                    template="(%s::integer, %s::date)",
+                    page_size=len(values)
+                )
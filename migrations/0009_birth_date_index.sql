@@ -0,0 +1,3 @@
+-- migrate:no-transaction
+-- Btree index for age-range filters, which are rewritten as birth_date ranges.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_birth_date ON records (birth_date);
@@ -0,0 +1,17 @@
+-- Row version for optimistic concurrency: every UPDATE of a record increments it,
+-- and Database.patch_record / update_records_bulk only write when the version the
+-- editor read is still current. Adding a column with a constant default does not
+-- rewrite the table.
+ALTER TABLE records ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+CREATE OR REPLACE FUNCTION records_bump_version() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.version := OLD.version + 1;
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS records_bump_version ON records;
+CREATE TRIGGER records_bump_version BEFORE UPDATE ON records
+    FOR EACH ROW EXECUTE FUNCTION records_bump_version();
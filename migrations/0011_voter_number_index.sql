@@ -0,0 +1,5 @@
+-- migrate:no-transaction
+-- Expression index for matching voter numbers regardless of Bengali or English
+-- numerals (Database.link_photos_by_voter_number). The expression must stay
+-- identical to VOTER_NUMBER_KEY in utils/database.py for the planner to use it.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_voter_no_digits ON records (translate(ভোটার_নং, '০১২৩৪৫৬৭৮৯', '0123456789'));
@@ -0,0 +1,139 @@
+-- Summaries for the Analysis page: birth_date_counts gains a batch_id key and
+-- occupation_counts is added, so the per-batch age and occupation breakdowns
+-- are read from summary rows like the other counts instead of scanning records.
+-- NULL batch ids are stored as 0, as in record_counts.
+CREATE TABLE IF NOT EXISTS occupation_counts (
+    batch_id INTEGER NOT NULL,
+    occupation TEXT NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (batch_id, occupation)
+);
+
+-- Writes wait while the summaries are rebuilt below; reads continue.
+LOCK TABLE records IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE OR REPLACE FUNCTION record_counts_apply() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO record_counts AS rc (batch_id, file_name, gender, relationship_status, count)
+        SELECT COALESCE(batch_id, 0), COALESCE(file_name, ''), COALESCE(gender, ''),
+               COALESCE(relationship_status, ''), COUNT(*)
+        FROM new_rows
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (batch_id, file_name, gender, relationship_status)
+        DO UPDATE SET count = rc.count + EXCLUDED.count;
+
+        INSERT INTO birth_date_counts AS bc (batch_id, birth_date, count)
+        SELECT COALESCE(batch_id, 0), birth_date, COUNT(*)
+        FROM new_rows
+        WHERE birth_date IS NOT NULL
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (batch_id, birth_date) DO UPDATE SET count = bc.count + EXCLUDED.count;
+
+        INSERT INTO occupation_counts AS oc (batch_id, occupation, count)
+        SELECT COALESCE(batch_id, 0), পেশা, COUNT(*)
+        FROM new_rows
+        WHERE পেশা IS NOT NULL AND পেশা != ''
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (batch_id, occupation) DO UPDATE SET count = oc.count + EXCLUDED.count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO record_counts AS rc (batch_id, file_name, gender, relationship_status, count)
+        SELECT COALESCE(batch_id, 0), COALESCE(file_name, ''), COALESCE(gender, ''),
+               COALESCE(relationship_status, ''), -COUNT(*)
+        FROM old_rows
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (batch_id, file_name, gender, relationship_status)
+        DO UPDATE SET count = rc.count + EXCLUDED.count;
+        DELETE FROM record_counts WHERE count <= 0;
+
+        INSERT INTO birth_date_counts AS bc (batch_id, birth_date, count)
+        SELECT COALESCE(batch_id, 0), birth_date, -COUNT(*)
+        FROM old_rows
+        WHERE birth_date IS NOT NULL
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (batch_id, birth_date) DO UPDATE SET count = bc.count + EXCLUDED.count;
+        DELETE FROM birth_date_counts WHERE count <= 0;
+
+        INSERT INTO occupation_counts AS oc (batch_id, occupation, count)
+        SELECT COALESCE(batch_id, 0), পেশা, -COUNT(*)
+        FROM old_rows
+        WHERE পেশা IS NOT NULL AND পেশা != ''
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (batch_id, occupation) DO UPDATE SET count = oc.count + EXCLUDED.count;
+        DELETE FROM occupation_counts WHERE count <= 0;
+    ELSE
+        -- Most updates (names, links, ...) leave every group unchanged and write nothing
+        INSERT INTO record_counts AS rc (batch_id, file_name, gender, relationship_status, count)
+        SELECT batch_id, file_name, gender, relationship_status, SUM(delta)
+        FROM (
+            SELECT COALESCE(batch_id, 0) AS batch_id, COALESCE(file_name, '') AS file_name,
+                   COALESCE(gender, '') AS gender, COALESCE(relationship_status, '') AS relationship_status,
+                   1 AS delta
+            FROM new_rows
+            UNION ALL
+            SELECT COALESCE(batch_id, 0), COALESCE(file_name, ''), COALESCE(gender, ''),
+                   COALESCE(relationship_status, ''), -1
+            FROM old_rows
+        ) changes
+        GROUP BY 1, 2, 3, 4
+        HAVING SUM(delta) <> 0
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (batch_id, file_name, gender, relationship_status)
+        DO UPDATE SET count = rc.count + EXCLUDED.count;
+        DELETE FROM record_counts WHERE count <= 0;
+
+        INSERT INTO birth_date_counts AS bc (batch_id, birth_date, count)
+        SELECT batch_id, birth_date, SUM(delta)
+        FROM (
+            SELECT COALESCE(batch_id, 0) AS batch_id, birth_date, 1 AS delta FROM new_rows WHERE birth_date IS NOT NULL
+            UNION ALL
+            SELECT COALESCE(batch_id, 0), birth_date, -1 FROM old_rows WHERE birth_date IS NOT NULL
+        ) changes
+        GROUP BY 1, 2
+        HAVING SUM(delta) <> 0
+        ORDER BY 1, 2
+        ON CONFLICT (batch_id, birth_date) DO UPDATE SET count = bc.count + EXCLUDED.count;
+        DELETE FROM birth_date_counts WHERE count <= 0;
+
+        INSERT INTO occupation_counts AS oc (batch_id, occupation, count)
+        SELECT batch_id, occupation, SUM(delta)
+        FROM (
+            SELECT COALESCE(batch_id, 0) AS batch_id, পেশা AS occupation, 1 AS delta
+            FROM new_rows WHERE পেশা IS NOT NULL AND পেশা != ''
+            UNION ALL
+            SELECT COALESCE(batch_id, 0), পেশা, -1
+            FROM old_rows WHERE পেশা IS NOT NULL AND পেশা != ''
+        ) changes
+        GROUP BY 1, 2
+        HAVING SUM(delta) <> 0
+        ORDER BY 1, 2
+        ON CONFLICT (batch_id, occupation) DO UPDATE SET count = oc.count + EXCLUDED.count;
+        DELETE FROM occupation_counts WHERE count <= 0;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+TRUNCATE birth_date_counts;
+ALTER TABLE birth_date_counts DROP CONSTRAINT IF EXISTS birth_date_counts_pkey;
+ALTER TABLE birth_date_counts ADD COLUMN IF NOT EXISTS batch_id INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE birth_date_counts ADD PRIMARY KEY (batch_id, birth_date);
+INSERT INTO birth_date_counts (batch_id, birth_date, count)
+SELECT COALESCE(batch_id, 0), birth_date, COUNT(*)
+FROM records
+WHERE birth_date IS NOT NULL
+GROUP BY 1, 2;
+
+TRUNCATE occupation_counts;
+INSERT INTO occupation_counts (batch_id, occupation, count)
+SELECT COALESCE(batch_id, 0), পেশা, COUNT(*)
+FROM records
+WHERE পেশা IS NOT NULL AND পেশা != ''
+GROUP BY 1, 2;
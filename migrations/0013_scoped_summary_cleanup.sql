@@ -0,0 +1,130 @@
+-- The summary triggers removed emptied groups with an unconditional
+-- DELETE ... WHERE count <= 0, which scanned the whole summary table on every
+-- statement (a one-row edit paid three full scans). Only groups the statement
+-- decremented can reach zero, and those are exactly the keys in old_rows, so
+-- the cleanup is now limited to them and uses each table's primary key.
+CREATE OR REPLACE FUNCTION record_counts_apply() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO record_counts AS rc (batch_id, file_name, gender, relationship_status, count)
+        SELECT COALESCE(batch_id, 0), COALESCE(file_name, ''), COALESCE(gender, ''),
+               COALESCE(relationship_status, ''), COUNT(*)
+        FROM new_rows
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (batch_id, file_name, gender, relationship_status)
+        DO UPDATE SET count = rc.count + EXCLUDED.count;
+
+        INSERT INTO birth_date_counts AS bc (batch_id, birth_date, count)
+        SELECT COALESCE(batch_id, 0), birth_date, COUNT(*)
+        FROM new_rows
+        WHERE birth_date IS NOT NULL
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (batch_id, birth_date) DO UPDATE SET count = bc.count + EXCLUDED.count;
+
+        INSERT INTO occupation_counts AS oc (batch_id, occupation, count)
+        SELECT COALESCE(batch_id, 0), পেশা, COUNT(*)
+        FROM new_rows
+        WHERE পেশা IS NOT NULL AND পেশা != ''
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (batch_id, occupation) DO UPDATE SET count = oc.count + EXCLUDED.count;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO record_counts AS rc (batch_id, file_name, gender, relationship_status, count)
+        SELECT COALESCE(batch_id, 0), COALESCE(file_name, ''), COALESCE(gender, ''),
+               COALESCE(relationship_status, ''), -COUNT(*)
+        FROM old_rows
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (batch_id, file_name, gender, relationship_status)
+        DO UPDATE SET count = rc.count + EXCLUDED.count;
+
+        INSERT INTO birth_date_counts AS bc (batch_id, birth_date, count)
+        SELECT COALESCE(batch_id, 0), birth_date, -COUNT(*)
+        FROM old_rows
+        WHERE birth_date IS NOT NULL
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (batch_id, birth_date) DO UPDATE SET count = bc.count + EXCLUDED.count;
+
+        INSERT INTO occupation_counts AS oc (batch_id, occupation, count)
+        SELECT COALESCE(batch_id, 0), পেশা, -COUNT(*)
+        FROM old_rows
+        WHERE পেশা IS NOT NULL AND পেশা != ''
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (batch_id, occupation) DO UPDATE SET count = oc.count + EXCLUDED.count;
+    ELSE
+        -- Most updates (names, links, ...) leave every group unchanged and write nothing
+        INSERT INTO record_counts AS rc (batch_id, file_name, gender, relationship_status, count)
+        SELECT batch_id, file_name, gender, relationship_status, SUM(delta)
+        FROM (
+            SELECT COALESCE(batch_id, 0) AS batch_id, COALESCE(file_name, '') AS file_name,
+                   COALESCE(gender, '') AS gender, COALESCE(relationship_status, '') AS relationship_status,
+                   1 AS delta
+            FROM new_rows
+            UNION ALL
+            SELECT COALESCE(batch_id, 0), COALESCE(file_name, ''), COALESCE(gender, ''),
+                   COALESCE(relationship_status, ''), -1
+            FROM old_rows
+        ) changes
+        GROUP BY 1, 2, 3, 4
+        HAVING SUM(delta) <> 0
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (batch_id, file_name, gender, relationship_status)
+        DO UPDATE SET count = rc.count + EXCLUDED.count;
+
+        INSERT INTO birth_date_counts AS bc (batch_id, birth_date, count)
+        SELECT batch_id, birth_date, SUM(delta)
+        FROM (
+            SELECT COALESCE(batch_id, 0) AS batch_id, birth_date, 1 AS delta FROM new_rows WHERE birth_date IS NOT NULL
+            UNION ALL
+            SELECT COALESCE(batch_id, 0), birth_date, -1 FROM old_rows WHERE birth_date IS NOT NULL
+        ) changes
+        GROUP BY 1, 2
+        HAVING SUM(delta) <> 0
+        ORDER BY 1, 2
+        ON CONFLICT (batch_id, birth_date) DO UPDATE SET count = bc.count + EXCLUDED.count;
+
+        INSERT INTO occupation_counts AS oc (batch_id, occupation, count)
+        SELECT batch_id, occupation, SUM(delta)
+        FROM (
+            SELECT COALESCE(batch_id, 0) AS batch_id, পেশা AS occupation, 1 AS delta
+            FROM new_rows WHERE পেশা IS NOT NULL AND পেশা != ''
+            UNION ALL
+            SELECT COALESCE(batch_id, 0), পেশা, -1
+            FROM old_rows WHERE পেশা IS NOT NULL AND পেশা != ''
+        ) changes
+        GROUP BY 1, 2
+        HAVING SUM(delta) <> 0
+        ORDER BY 1, 2
+        ON CONFLICT (batch_id, occupation) DO UPDATE SET count = oc.count + EXCLUDED.count;
+    END IF;
+
+    -- Remove the groups this DELETE or UPDATE emptied, looked up by primary key
+    DELETE FROM record_counts
+    WHERE (batch_id, file_name, gender, relationship_status) IN (
+        SELECT COALESCE(batch_id, 0), COALESCE(file_name, ''), COALESCE(gender, ''), COALESCE(relationship_status, '')
+        FROM old_rows
+    )
+    AND count <= 0;
+
+    DELETE FROM birth_date_counts
+    WHERE (batch_id, birth_date) IN (
+        SELECT COALESCE(batch_id, 0), birth_date FROM old_rows WHERE birth_date IS NOT NULL
+    )
+    AND count <= 0;
+
+    DELETE FROM occupation_counts
+    WHERE (batch_id, occupation) IN (
+        SELECT COALESCE(batch_id, 0), পেশা FROM old_rows WHERE পেশা IS NOT NULL AND পেশা != ''
+    )
+    AND count <= 0;
+    RETURN NULL;
+END
+$$;
@@ -1,6 +1,6 @@
 import streamlit as st
 import os
-from attached_assets.data_processor import process_text_file
+from attached_assets.data_processor import parse_files_parallel
 from utils.database import Database
 from utils.styling import apply_custom_styling
 import logging
@@ -54,22 +54,30 @@ def upload_page():
                     # Start a single transaction for all files in this upload session
                     # db.conn.autocommit is already False from __init__
 
-                    for uploaded_file in uploaded_files:
+                    # Parse files in parallel worker processes; results arrive in upload order
+                    # and are written while the remaining files are still being parsed.
+                    files = [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files]
+                    parsed_files = parse_files_parallel(
+                        files,
+                        default_gender=selected_gender if selected_gender else None,
+                        max_workers=int(st.secrets.get("UPLOAD_PARSE_WORKERS", os.cpu_count() or 1))
+                    )
+
+                    for file_name, records, parse_error in parsed_files:
                         try:
-                            content = uploaded_file.read().decode('utf-8')
-                            records = process_text_file(content, default_gender=selected_gender if selected_gender else None)
+                            if parse_error:
+                                raise parse_error
                             total_records_processed += len(records)
 
-                            for record in records:
-                                db.add_record(batch_id, uploaded_file.name, record)
-                                total_records_added_to_db += 1
+                            # Stream the whole file into the database in one bulk COPY
+                            total_records_added_to_db += db.add_records_bulk(batch_id, file_name, records)
                             
-                            logger.info(f"Records from file '{uploaded_file.name}' prepared for insertion.")
+                            logger.info(f"Records from file '{file_name}' prepared for insertion.")
 
                         except Exception as file_e:
                             # Log the error for this specific file but don't rollback the whole transaction yet
-                            logger.error(f"Failed to process and add records for file {uploaded_file.name}: {file_e}")
-                            st.error(f"ফাইল '{uploaded_file.name}' প্রক্রিয়াকরণ এবং যোগ করতে ব্যর্থ: {file_e}. এই ফাইলের কোনো রেকর্ড যোগ করা হয়নি।")
+                            logger.error(f"Failed to process and add records for file {file_name}: {file_e}")
+                            st.error(f"ফাইল '{file_name}' প্রক্রিয়াকরণ এবং যোগ করতে ব্যর্থ: {file_e}. এই ফাইলের কোনো রেকর্ড যোগ করা হয়নি।")
                             # Continue to next file, the overall transaction will be rolled back later if needed
 
                 # After processing all files, attempt to commit all changes
@@ -91,10 +99,10 @@ def upload_page():
     batches = db.get_all_batches()
 
     if batches:
+        record_counts = db.get_batch_record_counts()
         for batch in batches:
             with st.expander(f"ব্যাচ: {batch['name']} ({batch['created_at'].strftime('%Y-%m-%d %H:%M')})"):
-                records = db.get_batch_records(batch['id'])
-                st.write(f"মোট রেকর্ড: {len(records)}")
+                st.write(f"মোট রেকর্ড: {record_counts.get(batch['id'], 0)}")
     else:
         st.info("কোন ব্যাচ পাওয়া যায়নি")
 
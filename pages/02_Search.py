@@ -2,11 +2,14 @@ import streamlit as st
 import pandas as pd
 from utils.database import Database
 from utils.styling import apply_custom_styling
+from utils.search_paging import start_search, get_search, current_page, render_page_navigation, render_bulk_actions
 import logging
 
 logger = logging.getLogger(__name__)
 apply_custom_styling()
 
+FULLTEXT_PAGE_SIZE = 20
+
 def display_result_card(result, db):
     """
     Displays a single search result in a well-formatted card.
@@ -22,8 +25,7 @@ def display_result_card(result, db):
             st.markdown(f"**ক্রমিক নং:** {result.get('ক্রমিক_নং', 'N/A')}")
 
         # Location info (Batch and File)
-        batch_info = db.get_batch_by_id(result['batch_id'])
-        location_str = batch_info['name'] if batch_info else "Unknown Batch"
+        location_str = result.get('batch_name') or "Unknown Batch"
         if result.get('file_name'):
             location_str += f" / {result['file_name']}"
         st.markdown(f"📍 **স্থান:** {location_str}")
@@ -71,6 +73,28 @@ def display_result_card(result, db):
         st.markdown(f"**সম্পর্কের ধরণ:** {result.get('relationship_status', 'N/A')}")
 
 
+def display_fulltext_results(db, query):
+    """Shows one page of ranked free-text search results."""
+    try:
+        total = db.count_fulltext(query)
+        if not total:
+            st.info("আপনার অনুসন্ধানের সাথে মেলে এমন কোনো ফলাফল পাওয়া যায়নি।")
+            return
+
+        total_pages = (total + FULLTEXT_PAGE_SIZE - 1) // FULLTEXT_PAGE_SIZE
+        st.success(f"\"{query}\" এর জন্য {total}টি ফলাফল পাওয়া গেছে")
+        if st.session_state.get('fulltext_page', 1) > total_pages:
+            st.session_state.fulltext_page = 1
+        page = st.number_input(f"পৃষ্ঠা (মোট {total_pages})", min_value=1, max_value=total_pages, step=1, key='fulltext_page')
+
+        results = db.search_fulltext(query, limit=FULLTEXT_PAGE_SIZE, offset=(page - 1) * FULLTEXT_PAGE_SIZE)
+        for result in results:
+            display_result_card(result, db)
+    except Exception as e:
+        logger.error(f"Full-text search error: {str(e)}")
+        st.error(f"অনুসন্ধানে সমস্যা হয়েছে: {str(e)}")
+
+
 def search_page():
     """
     The main function for the search page.
@@ -84,6 +108,22 @@ def search_page():
 
     db = Database()
 
+    # Free-text search over all text fields, ranked by relevance
+    with st.container(border=True):
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            fulltext = st.text_input("সাধারণ অনুসন্ধান", placeholder="নাম, গ্রাম, ভোটার নং... যেকোনো কিছু লিখুন")
+        with col2:
+            st.write("")
+            st.write("")
+            if st.button("খুঁজুন", use_container_width=True):
+                st.session_state.fulltext_query = fulltext.strip()
+                st.session_state.fulltext_page = 1
+
+    if st.session_state.get('fulltext_query'):
+        display_fulltext_results(db, st.session_state.fulltext_query)
+        st.markdown("---")
+
     # Search fields within a container for better layout
     with st.container(border=True):
         col1, col2 = st.columns(2)
@@ -98,6 +138,11 @@ def search_page():
             occupation = st.text_input("পেশা")
             address = st.text_input("ঠিকানা")
             gender = st.selectbox("লিঙ্গ", options=['সব', 'Male', 'Female', 'Other']) # Gender search filter
+        age_col1, age_col2 = st.columns(2)
+        with age_col1:
+            age_min = st.number_input("সর্বনিম্ন বয়স", min_value=0, max_value=150, value=0, step=1, help="০ = কোনো সীমা নেই")
+        with age_col2:
+            age_max = st.number_input("সর্বোচ্চ বয়স", min_value=0, max_value=150, value=0, step=1, help="০ = কোনো সীমা নেই")
             
     # Search button
     if st.button("অনুসন্ধান করুন", type="primary", use_container_width=True):
@@ -112,6 +157,8 @@ def search_page():
                     'পেশা': occupation,
                     'ঠিকানা': address,
                     'জন্ম_তারিখ': date_of_birth,
+                    'age_min': age_min,
+                    'age_max': age_max,
                     'gender': gender # Include gender in search criteria
                 }
                 # Remove empty criteria to avoid searching on empty strings, but keep 'gender' if 'সব' is selected
@@ -121,19 +168,30 @@ def search_page():
                     st.warning("অনুসন্ধানের জন্য অন্তত একটি ফিল্টার পূরণ করুন।")
                     return
 
-                results = db.search_records_advanced(search_criteria)
-
-                if results:
-                    st.success(f"{len(results)}টি ফলাফল পাওয়া গেছে")
-                    # Display results in the improved card format
-                    for result in results:
-                        display_result_card(result, db)
-                else:
-                    st.info("আপনার অনুসন্ধানের সাথে মেলে এমন কোনো ফলাফল পাওয়া যায়নি।")
+                start_search('field_search', db, search_criteria)
 
         except Exception as e:
             logger.error(f"Search error: {str(e)}")
             st.error(f"অনুসন্ধানে সমস্যা হয়েছে: {str(e)}")
+            return
+
+    # Show the current page of the last field search; navigation only fetches one page
+    search = get_search('field_search')
+    if search:
+        if not search['total']:
+            st.info("আপনার অনুসন্ধানের সাথে মেলে এমন কোনো ফলাফল পাওয়া যায়নি।")
+            return
+        try:
+            results = current_page('field_search', db)
+            st.success(f"{search['total']}টি ফলাফল পাওয়া গেছে")
+            render_page_navigation('field_search', results)
+            render_bulk_actions('field_search', db, results)
+            # Display results in the improved card format
+            for result in results:
+                display_result_card(result, db)
+        except Exception as e:
+            logger.error(f"Search error: {str(e)}")
+            st.error(f"অনুসন্ধানে সমস্যা হয়েছে: {str(e)}")
 
 if __name__ == "__main__":
     search_page()
@@ -1,13 +1,25 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from utils.database import Database
+from utils.database import Database, RecordConflictError, RECORD_EDITABLE_COLUMNS
 from utils.styling import apply_custom_styling
+from utils.thumbnails import get_thumbnail_cache
 import logging
 
 logger = logging.getLogger(__name__)
 apply_custom_styling()
 
+PAGE_SIZE_OPTIONS = [50, 100, 250, 500]
+
+def comparable_cell(value):
+    """
+    Normalizes a cell for change detection: NULL/NaN and '' (all editable
+    columns are text) compare equal, so untouched empty cells are not written.
+    """
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return None
+    return None if value == '' else value
+
 def all_data_page():
     if 'authenticated' not in st.session_state or not st.session_state.authenticated:
         st.warning("অনুগ্রহ করে প্রথমে লগইন করুন")
@@ -27,12 +39,8 @@ def all_data_page():
         if st.button("🔴 সম্পূর্ণ ডাটাবেস মুছে ফেলুন (সাবধান!)", type="secondary", use_container_width=True):
             if st.session_state.get('confirm_clear_db', False):
                 try:
-                    # Delete all records first (which will also delete record_events due to CASCADE)
-                    with db.conn.cursor() as cur:
-                        cur.execute("DELETE FROM records")
-                        cur.execute("DELETE FROM batches")
-                        cur.execute("DELETE FROM events")
-                    db.conn.commit()
+                    # Deletes records, batches and events (record_events go with them via CASCADE)
+                    db.clear_all_data()
                     st.success("✅ সম্পূর্ণ ডাটাবেস সফলভাবে মুছে ফেলা হয়েছে!")
                     st.session_state.pop('confirm_clear_db', None) # Reset confirmation
                     st.rerun()
@@ -89,12 +97,8 @@ def all_data_page():
         if st.button("🔴 সম্পূর্ণ ডাটাবেস মুছে ফেলুন (সাবধান!)", type="secondary", use_container_width=True):
             if st.session_state.get('confirm_clear_db', False):
                 try:
-                    # Delete all records first (which will also delete record_events due to CASCADE)
-                    with db.conn.cursor() as cur:
-                        cur.execute("DELETE FROM records")
-                        cur.execute("DELETE FROM batches")
-                        cur.execute("DELETE FROM events")
-                    db.conn.commit()
+                    # Deletes records, batches and events (record_events go with them via CASCADE)
+                    db.clear_all_data()
                     st.success("✅ সম্পূর্ণ ডাটাবেস সফলভাবে মুছে ফেলা হয়েছে!")
                     st.session_state.pop('confirm_clear_db', None) # Reset confirmation
                     st.rerun()
@@ -115,24 +119,61 @@ def all_data_page():
         key="file_selector" # Added a unique key for the selectbox
     )
 
-    # --- Data Display and Editing ---
-    if selected_file_name == 'সব':
-        records = db.get_batch_records(selected_batch_id)
-    else:
-        records = db.get_file_records(selected_batch_id, selected_file_name)
+    # --- Pagination (keyset on records.id; only the visible page is fetched) ---
+    file_filter = None if selected_file_name == 'সব' else selected_file_name
+
+    nav_col1, nav_col2, nav_col3 = st.columns([1, 2, 1])
+    with nav_col1:
+        page_size = st.selectbox("প্রতি পৃষ্ঠায় রেকর্ড", options=PAGE_SIZE_OPTIONS, index=1, key="page_size_selector")
+    with nav_col2:
+        jump_serial = st.text_input("ক্রমিক নং এ যান", placeholder="যেমন: ১২৫", key="jump_serial")
+    with nav_col3:
+        st.write("")
+        jump_clicked = st.button("➡️ যান", use_container_width=True)
+
+    # Reset to the first page whenever the batch, file or page size changes
+    view_key = (selected_batch_id, file_filter, page_size)
+    if st.session_state.get('all_data_view') != view_key:
+        st.session_state.all_data_view = view_key
+        st.session_state.all_data_cursors = [None]
+
+    if jump_clicked and jump_serial:
+        target_id = db.find_record_id_by_serial(selected_batch_id, jump_serial, file_filter)
+        if target_id is not None:
+            st.session_state.all_data_cursors = [None, target_id - 1]
+        else:
+            st.warning(f"ক্রমিক নং '{jump_serial}' পাওয়া যায়নি।")
+
+    cursors = st.session_state.all_data_cursors
+    # Fetch one extra row to know whether a next page exists
+    records = db.get_records_page(selected_batch_id, file_filter, after_id=cursors[-1], limit=page_size + 1)
+    has_next_page = len(records) > page_size
+    records = records[:page_size]
 
     if records:
         df = pd.DataFrame(records)
-        st.write(f"মোট রেকর্ড: {len(records)}")
+        # Photos are shown as small thumbnails served from this server's cache
+        thumbnail_urls = get_thumbnail_cache().urls(df['photo_link'])
+        df.insert(0, 'thumbnail', [thumbnail_urls[link] for link in df['photo_link']])
+        total = db.count_records(selected_batch_id, file_filter)
+        st.write(f"মোট রেকর্ড: {total} | পৃষ্ঠা {len(cursors)} | এই পৃষ্ঠায়: {len(records)}")
+
+        prev_col, next_col, _ = st.columns([1, 1, 4])
+        with prev_col:
+            st.button("◀️ আগের পৃষ্ঠা", disabled=len(cursors) <= 1, on_click=lambda: cursors.pop(), use_container_width=True)
+        with next_col:
+            last_id = int(records[-1]['id'])
+            st.button("পরের পৃষ্ঠা ▶️", disabled=not has_next_page, on_click=lambda: cursors.append(last_id), use_container_width=True)
 
-        # IMPORTANT: Update original_df in session state whenever records are loaded or filtered
-        # This ensures that the comparison in st.data_editor is always against the currently displayed data
-        st.session_state.original_df = df.copy()
+        # The editor keeps its edited-rows delta in session state under this key;
+        # the save counter gives a fresh editor once the delta has been written.
+        editor_key = f"data_editor_{cursors[-1]}_{st.session_state.get('all_data_saves', 0)}"
 
-        edited_df = st.data_editor(
+        st.data_editor(
             df,
             column_config={
-                'id': None, 'batch_id': None, 'file_name': None, 'created_at': None, 'batch_name': None,
+                'id': None, 'batch_id': None, 'file_name': None, 'created_at': None, 'batch_name': None, 'birth_date': None, 'version': None,
+                'age': st.column_config.NumberColumn('বয়স', disabled=True, help="জন্ম তারিখ থেকে গণনা করা"),
                 'ক্রমিক_নং': st.column_config.TextColumn('ক্রমিক নং', width="small"),
                 'নাম': st.column_config.TextColumn('নাম', width="medium"),
                 'ভোটার_নং': st.column_config.TextColumn('ভোটার নং', width="medium"),
@@ -148,7 +189,8 @@ def all_data_page():
                 'tiktok_link': st.column_config.LinkColumn('Tiktok Link'),
                 'youtube_link': st.column_config.LinkColumn('Youtube Link'),
                 'insta_link': st.column_config.LinkColumn('Insta Link'),
-                'photo_link': st.column_config.ImageColumn('ছবি', help="ছবির লিঙ্ক দিন"),
+                'thumbnail': st.column_config.ImageColumn('ছবি', width="small"),
+                'photo_link': st.column_config.LinkColumn('ছবির লিঙ্ক', help="ছবির লিঙ্ক দিন"),
                 'description': st.column_config.TextColumn('বিবরণ'),
                 'political_status': st.column_config.TextColumn('Political Status'),
                 'relationship_status': st.column_config.SelectboxColumn(
@@ -161,7 +203,7 @@ def all_data_page():
             },
             hide_index=True,
             use_container_width=True,
-            key="data_editor"
+            key=editor_key
         )
 
         # --- Action Buttons ---
@@ -170,40 +212,34 @@ def all_data_page():
         with col1:
             if st.button("💾 পরিবর্তন সংরক্ষণ", type="primary", use_container_width=True):
                 try:
-                    # Retrieve the original_df from session state
-                    original_df = st.session_state.original_df
-                    
-                    # Ensure both DataFrames have the same index before comparing
-                    # This step is crucial if the index somehow got misaligned
-                    original_df = original_df.set_index('id', drop=False)
-                    edited_df = edited_df.set_index('id', drop=False)
-
-                    # Identify editable columns
-                    editable_cols = [
-                        'ক্রমিক_নং', 'নাম', 'ভোটার_নং', 'পিতার_নাম', 'মাতার_নাম', 'পেশা', 
-                        'occupation_details', 'ঠিকানা', 'জন্ম_তারিখ', 'phone_number', 
-                        'whatsapp_number', 'facebook_link', 'tiktok_link', 'youtube_link', 'insta_link',
-                        'photo_link', 'description', 'political_status', 'relationship_status', 'gender' 
-                    ]
-                    
-                    # Compare only the editable columns
-                    # Use .align to ensure identical labels for comparison
-                    original_subset, edited_subset = original_df[editable_cols].align(edited_df[editable_cols], join='inner', axis=None)
-                    changes = edited_subset.compare(original_subset)
-                    
-                    if not changes.empty:
-                        updated_count = 0
-                        for idx in changes.index:
-                            record_id = int(original_df.loc[idx, 'id']) # Use original_df for record_id
-                            updated_data = edited_df.loc[idx].to_dict()
-                            db.update_record(record_id, updated_data)
-                            updated_count += 1
+                    # edited_rows maps row positions in df to {column: new value}
+                    edited_rows = st.session_state.get(editor_key, {}).get('edited_rows', {})
+                    changes = {}
+                    versions = {}
+                    for position, edits in edited_rows.items():
+                        original = df.iloc[int(position)]
+                        changed = {
+                            column: value for column, value in edits.items()
+                            if column in RECORD_EDITABLE_COLUMNS
+                            and comparable_cell(value) != comparable_cell(original[column])
+                        }
+                        if changed:
+                            changes[int(original['id'])] = changed
+                            versions[int(original['id'])] = int(original['version'])
+
+                    if changes:
+                        updated_count = db.update_records_bulk(changes, expected_versions=versions)
                         st.success(f"{updated_count} টি রেকর্ডের পরিবর্তন সফলভাবে সংরক্ষিত হয়েছে!")
-                        # After saving, re-fetch data or update original_df to reflect saved changes
-                        st.session_state.original_df = edited_df.copy() # Update session state with the new state
+                        st.session_state.all_data_saves = st.session_state.get('all_data_saves', 0) + 1
                         st.rerun() # Rerun to refresh the data editor with the latest saved data
                     else:
                         st.info("কোনো পরিবর্তন সনাক্ত করা যায়নি।")
+                except RecordConflictError as e:
+                    st.error(
+                        "এই পৃষ্ঠা লোড করার পরে অন্য কেউ কিছু রেকর্ড পরিবর্তন করেছেন (আইডি: "
+                        f"{', '.join(str(record_id) for record_id in sorted(e.versions))})। "
+                        "কোনো পরিবর্তন সংরক্ষণ করা হয়নি; পৃষ্ঠাটি রিফ্রেশ করে আবার সম্পাদনা করুন।"
+                    )
                 except Exception as e:
                     logger.error(f"Update error: {str(e)}")
                     st.error(f"পরিবর্তন সংরক্ষণে সমস্যা হয়েছে: {str(e)}")
@@ -216,6 +252,7 @@ def all_data_page():
                 event_map = {event['name']: event['id'] for event in all_events}
                 
                 record_options = {f"{rec['ক্রমিক_নং']}: {rec['নাম']}": rec['id'] for rec in records}
+                events_by_record = {rec['id']: rec.get('events', []) for rec in records}
                 selected_record_display = st.selectbox(
                     "রেকর্ড নির্বাচন করুন",
                     options=record_options.keys(),
@@ -224,7 +261,7 @@ def all_data_page():
 
                 if selected_record_display:
                     selected_record_id = record_options[selected_record_display]
-                    assigned_events_names = db.get_events_for_record(selected_record_id)
+                    assigned_events_names = events_by_record[selected_record_id]
 
                     selected_events = st.multiselect(
                         "নির্ধারণ করার জন্য ইভেন্ট নির্বাচন করুন",
@@ -273,12 +310,8 @@ def all_data_page():
     if st.button("🔴 সম্পূর্ণ ডাটাবেস মুছে ফেলুন (সাবধান!)", type="secondary", use_container_width=True):
         if st.session_state.get('confirm_clear_db', False):
             try:
-                # Delete all records first (which will also delete record_events due to CASCADE)
-                with db.conn.cursor() as cur:
-                    cur.execute("DELETE FROM records")
-                    cur.execute("DELETE FROM batches")
-                    cur.execute("DELETE FROM events")
-                db.conn.commit()
+                # Deletes records, batches and events (record_events go with them via CASCADE)
+                db.clear_all_data()
                 st.success("✅ সম্পূর্ণ ডাটাবেস সফলভাবে মুছে ফেলা হয়েছে!")
                 st.session_state.pop('confirm_clear_db', None) # Reset confirmation
                 st.rerun()
@@ -38,21 +38,22 @@ def analysis_page():
         if selected_batch != 'সব ব্যাচ':
             selected_batch_id = next(batch['id'] for batch in batches if batch['name'] == selected_batch)
 
+        # All counts for the page come from the trigger-maintained summary tables
+        stats = db.get_analysis_stats(selected_batch_id)
+
         # Total records metrics
         total_metrics_col1, total_metrics_col2 = st.columns(2)
 
         with total_metrics_col1:
             # Overall statistics
             if selected_batch == 'সব ব্যাচ':
-                total_records = sum(len(db.get_batch_records(batch['id'])) for batch in batches)
-                st.metric("মোট রেকর্ড (সব ব্যাচ)", total_records)
+                st.metric("মোট রেকর্ড (সব ব্যাচ)", stats['total'])
             else:
-                batch_records = db.get_batch_records(selected_batch_id)
-                st.metric(f"মোট রেকর্ড ({selected_batch})", len(batch_records))
+                st.metric(f"মোট রেকর্ড ({selected_batch})", stats['total'])
 
         # --- Gender Distribution Analysis ---
         st.subheader("লিঙ্গ অনুযায়ী বিতরণ")
-        gender_stats = db.get_gender_stats(selected_batch_id)
+        gender_stats = stats['genders']
 
         if gender_stats:
             df_gender = pd.DataFrame(gender_stats)
@@ -87,15 +88,11 @@ def analysis_page():
 
         # --- Age Distribution Analysis ---
         st.subheader("বয়স অনুযায়ী বিতরণ")
-        # Fetch age distribution from dashboard stats (which now includes it)
-        dashboard_stats = db.get_dashboard_stats()
-        age_distribution_data = dashboard_stats.get('age_distribution', [])
+        # Age groups are already ordered by their lower bound
+        age_distribution_data = stats['age_distribution']
 
         if age_distribution_data:
             df_age = pd.DataFrame(age_distribution_data)
-            # Sort age groups for better visualization
-            df_age['age_group_sort_key'] = df_age['age_group'].apply(lambda x: int(x.split('-')[0]) if x != 'Unknown' else -1)
-            df_age = df_age.sort_values('age_group_sort_key')
 
             fig_age = px.bar(
                 df_age,
@@ -122,10 +119,7 @@ def analysis_page():
 
         # --- Occupation Distribution Analysis ---
         st.subheader("পেশা অনুযায়ী বিতরণ")
-        if selected_batch == 'সব ব্যাচ':
-            occupation_stats = db.get_occupation_stats()
-        else:
-            occupation_stats = db.get_batch_occupation_stats(selected_batch_id)
+        occupation_stats = stats['occupations']
 
         if occupation_stats:
             # Convert to DataFrame for visualization
@@ -163,13 +157,11 @@ def analysis_page():
         # --- Batch-wise Record Distribution (if 'সব ব্যাচ' selected) ---
         if selected_batch == 'সব ব্যাচ':
             st.subheader("ব্যাচ অনুযায়ী রেকর্ড বিতরণ")
-            batch_stats = []
-            for batch in batches:
-                records = db.get_batch_records(batch['id'])
-                batch_stats.append({
-                    'ব্যাচ': batch['name'],
-                    'রেকর্ড': len(records)
-                })
+            batch_counts = {item['batch_id']: item['count'] for item in stats['batches']}
+            batch_stats = [
+                {'ব্যাচ': batch['name'], 'রেকর্ড': batch_counts.get(batch['id'], 0)}
+                for batch in batches
+            ]
 
             batch_df = pd.DataFrame(batch_stats)
             fig_bar = px.bar(
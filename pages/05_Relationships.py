@@ -2,12 +2,22 @@ import streamlit as st
 import pandas as pd
 from utils.database import Database
 from utils.styling import apply_custom_styling
+from utils.thumbnails import get_thumbnail_cache
 import logging
 from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 apply_custom_styling()
 
+# Relationship lists shown on this page
+RELATIONSHIP_LISTS = {
+    'Friend': "🤝 বন্ধু তালিকা",
+    'Enemy': "⚔️ শত্রু তালিকা",
+    'Connected': "🔗 সংযুক্ত তালিকা",
+}
+# Cards shown per page
+RELATIONSHIP_PAGE_SIZE = 20
+
 def get_record_location(db, record):
     """Get batch and file information for a record."""
     try:
@@ -33,17 +43,8 @@ def display_relationship_card(record, db):
         cols = st.columns([1, 3])
 
         with cols[0]:
-            # Profile image - Add robust handling for photo_link
-            photo_link = record.get('photo_link')
-            if photo_link and photo_link.strip():
-                # Use a try-except block to catch potential issues with st.image
-                try:
-                    st.image(photo_link, width=100)
-                except Exception as e:
-                    logger.warning(f"Could not load image from {photo_link}: {e}. Displaying placeholder.")
-                    st.image("https://placehold.co/100x100/EEE/31343C?text=No+Image", width=100)
-            else:
-                st.image("https://placehold.co/100x100/EEE/31343C?text=No+Image", width=100)
+            # Profile image: a cached thumbnail served by this server (placeholder if missing or unreachable)
+            st.image(get_thumbnail_cache().url(record.get('photo_link')), width=100)
 
 
         with cols[1]:
@@ -132,38 +133,42 @@ def relationships_page():
         format_func=lambda x: f"ব্যাচ: {x}"
     )
 
-    # Create tabs for Friend, Enemy and Connected lists
-    tab1, tab2, tab3 = st.tabs(["🤝 বন্ধু তালিকা", "⚔️ শত্রু তালিকা", "🔗 সংযুক্ত তালিকা"])
-
-    def display_relationship_section(relationship_type):
-        # Get records based on selection
-        if selected_batch == 'সব ব্যাচ':
-            records = db.get_relationship_records(relationship_type)
-        else:
-            batch_id = next(batch['id'] for batch in batches if batch['name'] == selected_batch)
-            # Filter records in Python after fetching all of them
-            all_relationship_records = db.get_relationship_records(relationship_type)
-            records = [r for r in all_relationship_records if r['batch_id'] == batch_id]
-
-        if not records:
-            st.info(f"এই ক্যাটাগরিতে কোনো রেকর্ড যোগ করা হয়নি।")
-            return
-
-        # Show total count
-        st.write(f"মোট: {len(records)}")
-
-        # Display each record in a card format
-        for record in records:
-            display_relationship_card(record, db)
-
-    with tab1:
-        display_relationship_section('Friend')
+    # Only the selected list is queried and rendered (st.tabs would run all three on every rerun)
+    relationship_type = st.radio(
+        "তালিকা",
+        options=list(RELATIONSHIP_LISTS),
+        format_func=RELATIONSHIP_LISTS.get,
+        horizontal=True,
+        label_visibility="collapsed",
+        key='relationship_list'
+    )
 
-    with tab2:
-        display_relationship_section('Enemy')
+    batch_id = None if selected_batch == 'সব ব্যাচ' else next(batch['id'] for batch in batches if batch['name'] == selected_batch)
+    total = db.count_relationship_records(relationship_type, batch_id)
+    if not total:
+        st.info(f"এই ক্যাটাগরিতে কোনো রেকর্ড যোগ করা হয়নি।")
+        return
 
-    with tab3:
-        display_relationship_section('Connected')
+    # Show total count and one page of cards
+    total_pages = (total + RELATIONSHIP_PAGE_SIZE - 1) // RELATIONSHIP_PAGE_SIZE
+    page_key = f"relationship_page_{relationship_type}_{batch_id}"
+    if st.session_state.get(page_key, 1) > total_pages:
+        st.session_state[page_key] = total_pages
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.write(f"মোট: {total}")
+    with col2:
+        page = st.number_input(f"পৃষ্ঠা (মোট {total_pages})", min_value=1, max_value=total_pages, step=1, key=page_key)
+
+    records = db.get_relationship_records(
+        relationship_type, batch_id=batch_id,
+        limit=RELATIONSHIP_PAGE_SIZE, offset=(page - 1) * RELATIONSHIP_PAGE_SIZE
+    )
+    # Queue the page's missing thumbnails together; the cards show placeholders until they are stored
+    get_thumbnail_cache().warm(record.get('photo_link') for record in records)
+    # Display each record in a card format
+    for record in records:
+        display_relationship_card(record, db)
 
 if __name__ == "__main__":
     relationships_page()
@@ -11,7 +11,7 @@ apply_custom_styling()
 
 def get_relationship_stats(db, batch_id=None):
     """Get statistics for all relationship statuses"""
-    with db.conn.cursor() as cur:
+    with db.cursor() as cur:
         query = """
             SELECT relationship_status, COUNT(*) as count
             FROM records
@@ -31,7 +31,7 @@ def get_relationship_stats(db, batch_id=None):
 
 def get_batch_relationship_stats(db, selected_batch_id=None):
     """Get relationship statistics per batch"""
-    with db.conn.cursor() as cur:
+    with db.cursor() as cur:
         query = """
             SELECT b.name as batch_name, r.relationship_status, COUNT(*) as count
             FROM records r
@@ -1,45 +1,73 @@
 import streamlit as st
-import requests
-import base64
+import pandas as pd
+from utils.image_upload import ImgBBUploader, IMGBB_UPLOAD_URL, DEFAULT_MAX_DIMENSION, DEFAULT_QUALITY, upload_images
 
-# Set ImgBB API Key
+# Set ImgBB API Key; IMGBB_UPLOAD_URL can point uploads at a stand-in server
 IMGBB_API_KEY = st.secrets["IMGBB_API_KEY"]
-UPLOAD_URL = "https://api.imgbb.com/1/upload"
+UPLOAD_URL = st.secrets.get("IMGBB_UPLOAD_URL", IMGBB_UPLOAD_URL)
+# Concurrent uploads per batch of photos
+UPLOAD_WORKERS = int(st.secrets.get("IMGBB_UPLOAD_WORKERS", 4))
 
 # Streamlit UI
 st.title("Genarate Image Link")
 
 # Upload Button
-uploaded_file = st.file_uploader("Upload an Image", type=["png", "jpg", "jpeg"])
+uploaded_files = st.file_uploader("Upload Images", type=["png", "jpg", "jpeg"], accept_multiple_files=True)
 
-if uploaded_file is not None:
-    # Convert image to base64
-    image_bytes = uploaded_file.read()
-    encoded_image = base64.b64encode(image_bytes).decode("utf-8")
+# Photos are resized and re-encoded before upload
+with st.expander("Compression settings"):
+    col1, col2 = st.columns(2)
+    with col1:
+        max_dimension = st.number_input("Max width / height (px)", min_value=200, max_value=8000, value=DEFAULT_MAX_DIMENSION, step=100)
+    with col2:
+        quality = st.slider("JPEG quality", min_value=30, max_value=95, value=DEFAULT_QUALITY)
 
-    # Upload to ImgBB
-    response = requests.post(
-        UPLOAD_URL,
-        data={
-            "key": IMGBB_API_KEY,
-            "image": encoded_image
-        },
+if uploaded_files and st.button(f"Upload {len(uploaded_files)} image(s)", type="primary", use_container_width=True):
+    progress_bar = st.progress(0.0, text="Uploading...")
+    results = upload_images(
+        [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files],
+        ImgBBUploader(IMGBB_API_KEY, UPLOAD_URL),
+        max_workers=UPLOAD_WORKERS,
+        max_dimension=max_dimension,
+        quality=quality,
+        progress=lambda done, total: progress_bar.progress(done / total, text=f"Uploaded {done} / {total}"),
     )
+    progress_bar.empty()
+    # Kept across reruns so the links are not lost (and nothing is uploaded twice)
+    st.session_state.image_upload_results = results
 
-    # Process response
-    if response.status_code == 200:
-        data = response.json()
-        image_url = data["data"]["url"]
-
-        # Show the uploaded image
-        st.image(uploaded_file, caption="Uploaded Image", use_container_width=True)
-
-        # Display the shareable link
-        st.success("Image uploaded successfully!")
-        #st.text_input("Shareable Link (Copy Manually):", image_url)
-
-        # Copy Button (Works natively in Streamlit)
-        st.code(image_url, language="")
+results = st.session_state.get('image_upload_results')
+if results:
+    uploaded = [result for result in results if result['url']]
+    failed = [result for result in results if not result['url']]
+    if uploaded:
+        st.success(f"{len(uploaded)} image(s) uploaded successfully!")
+    if failed:
+        st.error(f"Failed to upload {len(failed)} image(s). Please try them again.")
 
+    if len(results) == 1 and uploaded:
+        # Show the uploaded image and its link, ready to copy
+        st.image(uploaded[0]['url'], caption="Uploaded Image", use_container_width=True)
+        st.code(uploaded[0]['url'], language="")
     else:
-        st.error("Failed to upload image. Please try again.")
+        df = pd.DataFrame(results)
+        df['original_size'] = (df['original_size'] / 1024).round(1)
+        df['uploaded_size'] = (df['uploaded_size'] / 1024).round(1)
+        st.dataframe(
+            df,
+            column_config={
+                'file_name': 'File',
+                'url': st.column_config.LinkColumn('Link'),
+                'original_size': 'Original (KB)',
+                'uploaded_size': 'Uploaded (KB)',
+                'error': 'Error',
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+        st.download_button(
+            "Download links (CSV)",
+            df[['file_name', 'url', 'error']].to_csv(index=False).encode('utf-8'),
+            file_name="image_links.csv",
+            mime="text/csv"
+        )
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 from utils.database import Database
+from utils.facet_index import ids_from_bitset
 from utils.styling import apply_custom_styling
 import logging
 
@@ -10,73 +11,168 @@ logger = logging.getLogger(__name__)
 # Apply custom styling to the page
 apply_custom_styling()
 
+# Records shown per page of the filter results
+FILTER_PAGE_SIZE = 50
+
+# Columns shown in the results table, in display order
+DISPLAY_COLUMNS = [
+    'ক্রমিক_নং', 'নাম', 'ভোটার_নং', 'পিতার_নাম', 'মাতার_নাম',
+    'পেশা', 'ঠিকানা', 'জন্ম_তারিখ', 'phone_number',
+    'facebook_link', 'relationship_status', 'gender', 'batch_name', 'events'
+]
+
+def build_expression(clauses):
+    """ANDs the non-empty filter clauses into one facet index expression (None when there are none)."""
+    clauses = [clause for clause in clauses.values() if clause is not None]
+    if not clauses:
+        return None
+    return ('and', *clauses)
+
+def filter_clauses(selected_events, event_mode, excluded_events, relationships, genders, batch_ids):
+    """Turns the widget selections into one facet index expression per filter."""
+    clauses = {}
+    if selected_events:
+        clauses['event'] = ('and' if event_mode == 'all' else 'or', *[('event', event_id) for event_id in selected_events])
+    if excluded_events:
+        clauses['excluded_event'] = ('not', ('or', *[('event', event_id) for event_id in excluded_events]))
+    if relationships:
+        clauses['relationship'] = ('or', *[('relationship', status) for status in relationships])
+    if genders:
+        clauses['gender'] = ('or', *[('gender', gender) for gender in genders])
+    if batch_ids:
+        clauses['batch'] = ('or', *[('batch', batch_id) for batch_id in batch_ids])
+    return clauses
+
+def counts_without(index, facet, clauses):
+    """Facet value counts under every filter except the facet's own, so each option shows what selecting it adds."""
+    return index.facet_counts(facet, build_expression({key: clause for key, clause in clauses.items() if key != facet}))
+
 def event_filter_page():
     """
-    Streamlit page to filter and display records based on a selected event.
-    It provides a dropdown to select an event and shows all associated records
-    in a clean, readable table upon filtering.
+    Streamlit page to filter records by any combination of events, relationship
+    status, gender and batch. Matches and per-option counts come from the
+    in-process facet bitmap index; only the records on the shown page are
+    read from the database.
     """
     # Check if the user is authenticated before showing the page content
     if 'authenticated' not in st.session_state or not st.session_state.authenticated:
         st.warning("অনুগ্রহ করে প্রথমে লগইন করুন")
         return
 
-    st.title("🗓️ ইভেন্ট অনুযায়ী ফিল্টার")
-    st.markdown("এখানে আপনি একটি নির্দিষ্ট ইভেন্টের জন্য নির্ধারিত সমস্ত রেকর্ড দেখতে পারেন।")
+    st.title("🗓️ ইভেন্ট অনুযায়ী ফিল্টার")
+    st.markdown("ইভেন্ট, সম্পর্কের ধরণ, লিঙ্গ এবং ব্যাচ একসাথে মিলিয়ে রেকর্ড ফিল্টার করুন।")
 
     db = Database()
 
-    # --- Event Selection Dropdown ---
     try:
-        # Fetch all available events from the database
         all_events = db.get_all_events()
         if not all_events:
             st.info("কোন ইভেন্ট পাওয়া যায়নি। অনুগ্রহ করে প্রথমে 'ইভেন্ট ম্যানেজমেন্ট' পেজ থেকে একটি ইভেন্ট তৈরি করুন।")
             return
+        event_names = {event['id']: event['name'] for event in all_events}
+        batch_names = {batch['id']: batch['name'] for batch in db.get_all_batches()}
+        index = db.get_facet_index()
 
-        # Create a mapping from event name to event ID for easy lookup
-        event_map = {event['name']: event['id'] for event in all_events}
-        
-        # Display a selectbox for the user to choose an event
-        selected_event_name = st.selectbox(
-            "একটি ইভেন্ট নির্বাচন করুন",
-            options=event_map.keys(),
-            help="তালিকা থেকে একটি ইভেন্ট নির্বাচন করে ফিল্টার করুন।"
+        # Counts depend on the other filters, so they are computed from the
+        # selections of the previous run before the widgets are drawn
+        clauses = filter_clauses(
+            st.session_state.get('facet_events', []),
+            st.session_state.get('facet_event_mode', 'all'),
+            st.session_state.get('facet_excluded_events', []),
+            st.session_state.get('facet_relationships', []),
+            st.session_state.get('facet_genders', []),
+            st.session_state.get('facet_batches', []),
         )
+        event_counts = counts_without(index, 'event', clauses)
+        relationship_counts = counts_without(index, 'relationship', clauses)
+        gender_counts = counts_without(index, 'gender', clauses)
+        batch_counts = counts_without(index, 'batch', clauses)
+
+        # --- Filters ---
+        with st.container(border=True):
+            col1, col2 = st.columns(2)
+            with col1:
+                selected_events = st.multiselect(
+                    "ইভেন্ট",
+                    options=list(event_names),
+                    format_func=lambda event_id: f"{event_names[event_id]} ({event_counts.get(event_id, 0)})",
+                    key='facet_events'
+                )
+                event_mode = st.radio(
+                    "ইভেন্ট মেলানো",
+                    options=['all', 'any'],
+                    format_func=lambda mode: "সবগুলো ইভেন্টে (AND)" if mode == 'all' else "যেকোনো একটিতে (OR)",
+                    horizontal=True,
+                    key='facet_event_mode'
+                )
+                excluded_events = st.multiselect(
+                    "বাদ দিন (এই ইভেন্টে থাকা রেকর্ড)",
+                    options=list(event_names),
+                    format_func=lambda event_id: event_names[event_id],
+                    key='facet_excluded_events'
+                )
+            with col2:
+                relationships = st.multiselect(
+                    "সম্পর্কের ধরণ",
+                    options=sorted(set(relationship_counts).union(st.session_state.get('facet_relationships', []))),
+                    format_func=lambda status: f"{status or 'N/A'} ({relationship_counts.get(status, 0)})",
+                    key='facet_relationships'
+                )
+                genders = st.multiselect(
+                    "লিঙ্গ",
+                    options=sorted(set(gender_counts).union(st.session_state.get('facet_genders', []))),
+                    format_func=lambda gender: f"{gender or 'অনির্ধারিত'} ({gender_counts.get(gender, 0)})",
+                    key='facet_genders'
+                )
+                batch_ids = st.multiselect(
+                    "ব্যাচ",
+                    options=list(batch_names),
+                    format_func=lambda batch_id: f"{batch_names[batch_id]} ({batch_counts.get(batch_id, 0)})",
+                    key='facet_batches'
+                )
 
-        # --- Filter Button ---
-        if st.button("🔍 ফিল্টার করুন", type="primary", use_container_width=True):
-            if selected_event_name:
-                selected_event_id = event_map[selected_event_name]
-
-                with st.spinner(f"'{selected_event_name}' ইভেন্টের জন্য রেকর্ড আনা হচ্ছে..."):
-                    # Fetch records associated with the selected event from the database
-                    records = db.get_records_for_event(selected_event_id)
-
-                    if records:
-                        st.success(f"'{selected_event_name}' ইভেন্টের জন্য {len(records)} টি রেকর্ড পাওয়া গেছে।")
-                        
-                        # Convert the list of records to a pandas DataFrame for display
-                        df = pd.DataFrame(records)
-                        
-                        # Define which columns to display and in what order
-                        display_columns = [
-                            'ক্রমিক_নং', 'নাম', 'ভোটার_নং', 'পিতার_নাম', 'মাতার_নাম', 
-                            'পেশা', 'ঠিকানা', 'জন্ম_তারিখ', 'phone_number', 
-                            'facebook_link', 'relationship_status', 'gender', 'batch_name' # Added gender
-                        ]
-                        
-                        # Ensure only existing columns are selected to prevent errors
-                        df_display = df[[col for col in display_columns if col in df.columns]]
-
-                        # Display the data in a table
-                        st.dataframe(
-                            df_display,
-                            hide_index=True,
-                            use_container_width=True
-                        )
-                    else:
-                        st.info(f"'{selected_event_name}' ইভেন্টের জন্য কোনো রেকর্ড নির্ধারিত করা হয়নি।")
+        clauses = filter_clauses(selected_events, event_mode, excluded_events, relationships, genders, batch_ids)
+        expression = build_expression(clauses)
+        if expression is None:
+            st.info("রেকর্ড দেখতে অন্তত একটি ফিল্টার নির্বাচন করুন।")
+            return
+
+        matches = index.match(expression)
+        total = matches.bit_count()
+        if not total:
+            st.info("এই ফিল্টারগুলোর সাথে মেলে এমন কোনো রেকর্ড পাওয়া যায়নি।")
+            return
+
+        # Keyset paging over the matching ids; reset whenever the filters change
+        if st.session_state.get('facet_filter_expression') != expression:
+            st.session_state.facet_filter_expression = expression
+            st.session_state.facet_filter_cursors = [None]
+        cursors = st.session_state.facet_filter_cursors
+        page_ids = ids_from_bitset(matches, after_id=cursors[-1], limit=FILTER_PAGE_SIZE)
+        total_pages = (total + FILTER_PAGE_SIZE - 1) // FILTER_PAGE_SIZE
+
+        st.success(f"{total} টি রেকর্ড পাওয়া গেছে।")
+        prev_col, page_col, next_col = st.columns([1, 2, 1])
+        with prev_col:
+            st.button("◀️ আগের পৃষ্ঠা", disabled=len(cursors) <= 1, on_click=cursors.pop, use_container_width=True)
+        with page_col:
+            st.markdown(f"<div style='text-align:center'>পৃষ্ঠা {len(cursors)} / {total_pages}</div>", unsafe_allow_html=True)
+        with next_col:
+            st.button("পরের পৃষ্ঠা ▶️", disabled=len(cursors) >= total_pages,
+                      on_click=lambda: cursors.append(page_ids[-1]), use_container_width=True)
+
+        records = db.get_records_by_ids(page_ids)
+        df = pd.DataFrame(records)
+        # Ensure only existing columns are selected to prevent errors
+        df_display = df[[col for col in DISPLAY_COLUMNS if col in df.columns]]
+        st.dataframe(
+            df_display,
+            column_config={
+                'events': st.column_config.ListColumn('ইভেন্টস'),
+            },
+            hide_index=True,
+            use_container_width=True
+        )
 
     except Exception as e:
         logger.error(f"Error fetching or displaying event data: {e}")
@@ -3,7 +3,6 @@ import pandas as pd
 import plotly.express as px
 from utils.database import Database
 from utils.styling import apply_custom_styling
-from attached_assets.data_processor import calculate_age
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,46 +14,10 @@ def age_management_page():
         return
 
     st.title("🎂 বয়স ম্যানেজমেন্ট এবং বিশ্লেষণ")
-    st.markdown("এখানে আপনি বিদ্যমান রেকর্ডগুলির বয়স পুনরায় গণনা এবং আপডেট করতে পারেন এবং বয়স বিতরণ দেখতে পারেন।")
+    st.markdown("বয়স প্রতিটি রেকর্ডের জন্ম তারিখ থেকে সবসময় আজকের তারিখ অনুযায়ী গণনা করা হয়, তাই আলাদাভাবে আপডেট করার প্রয়োজন নেই।")
 
     db = Database()
 
-    # --- Age Recalculation Section ---
-    st.subheader("বয়স পুনরায় গণনা করুন")
-    st.info("এই বৈশিষ্ট্যটি বিদ্যমান সমস্ত রেকর্ডের জন্য জন্ম তারিখের উপর ভিত্তি করে বয়স পুনরায় গণনা করবে এবং আপডেট করবে।")
-
-    if st.button("🔄 সমস্ত বয়স আপডেট করুন", type="primary", use_container_width=True):
-        try:
-            with st.spinner("বয়স আপডেট করা হচ্ছে... এটি কিছু সময় নিতে পারে।"):
-                records_to_update = db.get_all_records_with_dob()
-                updated_count = 0
-                
-                # Start a transaction for bulk updates
-                # db.conn.autocommit is already False from __init__, so no need to set it again
-                # However, ensure a fresh transaction context is used if needed.
-                # The key is to commit/rollback before any Streamlit state changes/reruns.
-
-                for record in records_to_update:
-                    record_id = record['id']
-                    dob_str = record['জন্ম_তারিখ']
-                    new_age = calculate_age(dob_str)
-                    
-                    if new_age is not None:
-                        db.update_record_age(record_id, new_age)
-                        updated_count += 1
-                
-                db.commit_changes() # Commit all updates at once
-                
-                # Move st.success and st.rerun outside the transaction scope
-                st.success(f"✅ সফলভাবে {updated_count} টি রেকর্ডের বয়স আপডেট করা হয়েছে!")
-                st.rerun() # Rerun to refresh the page and stats
-        except Exception as e:
-            db.rollback_changes() # Rollback on error
-            logger.error(f"Error updating all ages: {e}")
-            st.error(f"বয়স আপডেট করার সময় একটি সমস্যা হয়েছে: {str(e)}")
-
-    st.markdown("---")
-
     # --- Age Distribution Analysis ---
     st.subheader("বয়স অনুযায়ী বিতরণ")
 
@@ -91,7 +54,7 @@ def age_management_page():
             use_container_width=True
         )
     else:
-        st.info("বয়স বিশ্লেষণের জন্য কোন ডাটা পাওয়া যায়নি। অনুগ্রহ করে প্রথমে রেকর্ড আপলোড করুন বা বয়স আপডেট করুন।")
+        st.info("বয়স বিশ্লেষণের জন্য কোন ডাটা পাওয়া যায়নি। অনুগ্রহ করে প্রথমে রেকর্ড আপলোড করুন।")
 
 if __name__ == "__main__":
     age_management_page()
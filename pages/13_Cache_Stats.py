@@ -0,0 +1,123 @@
+import streamlit as st
+import pandas as pd
+from utils.database import Database
+from utils.styling import apply_custom_styling
+from utils.thumbnails import get_thumbnail_cache
+import logging
+
+logger = logging.getLogger(__name__)
+apply_custom_styling()
+
+def format_bytes(size):
+    """Formats a byte count as KB/MB for display."""
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    return f"{size / 1024:.1f} KB"
+
+def cache_stats_page():
+    """
+    Admin page showing the state of this server process's caches and
+    connection pool, for sizing them to the actual traffic.
+    """
+    if 'authenticated' not in st.session_state or not st.session_state.authenticated:
+        st.warning("অনুগ্রহ করে প্রথমে লগইন করুন")
+        return
+
+    st.title("🧮 ক্যাশ ও সংযোগ পরিসংখ্যান")
+    st.caption("এই পরিসংখ্যান শুধুমাত্র বর্তমান সার্ভার প্রসেসের জন্য।")
+
+    db = Database()
+
+    # --- Query result cache ---
+    st.subheader("কোয়েরি ক্যাশ")
+    stats = db.query_cache_stats()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("এন্ট্রি", stats['entries'])
+    with col2:
+        st.metric("আকার", f"{format_bytes(stats['bytes'])} / {format_bytes(stats['max_bytes'])}")
+    with col3:
+        st.metric("হিট রেট", f"{stats['hit_rate']:.1%}")
+    with col4:
+        st.metric("Evictions", stats['evictions'])
+
+    st.dataframe(
+        pd.DataFrame([
+            {'কাউন্টার': 'Hits', 'মান': stats['hits']},
+            {'কাউন্টার': 'Misses', 'মান': stats['misses']},
+            {'কাউন্টার': 'Invalidations (table writes)', 'মান': stats['invalidations']},
+            {'কাউন্টার': 'Expirations (TTL)', 'মান': stats['expirations']},
+            {'কাউন্টার': 'Too large to cache', 'মান': stats['oversized']},
+            {'কাউন্টার': 'Default TTL (s)', 'মান': stats['default_ttl'] or 'None'},
+        ]).astype(str),
+        hide_index=True,
+        use_container_width=True
+    )
+    if stats['table_versions']:
+        st.markdown("##### টেবিল ভার্সন")
+        st.dataframe(
+            pd.DataFrame([{'টেবিল': table, 'ভার্সন': version} for table, version in sorted(stats['table_versions'].items())]),
+            hide_index=True,
+            use_container_width=True
+        )
+
+    # --- Metadata cache ---
+    st.subheader("মেটাডাটা ক্যাশ (ব্যাচ, ইভেন্ট, ফাইল)")
+    metadata = db.metadata_cache_stats()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("এন্ট্রি", metadata['entries'])
+    with col2:
+        st.metric("হিট রেট", f"{metadata['hit_rate']:.1%}")
+    with col3:
+        st.metric("Hits / Misses", f"{metadata['hits']} / {metadata['misses']}")
+    with col4:
+        st.metric("Invalidations / Expirations", f"{metadata['invalidations']} / {metadata['expirations']}")
+
+    # --- Facet bitmap index ---
+    st.subheader("ফিল্টার ইনডেক্স (ইভেন্ট, সম্পর্ক, লিঙ্গ, ব্যাচ)")
+    facets = db.facet_index_stats()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("রেকর্ড", facets['records'] if facets['loaded'] else "—")
+    with col2:
+        st.metric("আকার", format_bytes(facets['bytes']))
+    with col3:
+        st.metric("Builds / Updates", f"{facets['builds']} / {facets['updates']}")
+    with col4:
+        st.metric("Invalidations", facets['invalidations'])
+
+    # --- Photo thumbnails ---
+    st.subheader("ছবির থাম্বনেইল ক্যাশ")
+    thumbnails = get_thumbnail_cache().stats()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("ফাইল", thumbnails['entries'])
+    with col2:
+        st.metric("আকার", f"{format_bytes(thumbnails['bytes'])} / {format_bytes(thumbnails['max_bytes'])}")
+    with col3:
+        st.metric("Disk hits / Fetches", f"{thumbnails['disk_hits']} / {thumbnails['fetches']}")
+    with col4:
+        st.metric("Failed fetches", thumbnails['failures'])
+
+    # --- Connection pool ---
+    st.subheader("ডাটাবেস সংযোগ পুল")
+    pool = db.pool_stats()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("ব্যবহৃত / সর্বোচ্চ", f"{pool['in_use']} / {pool['max_size']}")
+    with col2:
+        st.metric("Saturation", f"{pool['saturation']:.0%}")
+    with col3:
+        st.metric("Peak in use", pool['peak_in_use'])
+    with col4:
+        st.metric("Checkout timeouts", pool['timeouts'])
+
+    st.markdown("---")
+    if st.button("🧹 ক্যাশ খালি করুন", use_container_width=True):
+        db.clear_caches()
+        st.success("ক্যাশ খালি করা হয়েছে।")
+        st.rerun()
+
+if __name__ == "__main__":
+    cache_stats_page()
@@ -0,0 +1,109 @@
+import streamlit as st
+import pandas as pd
+from utils.database import Database
+from utils.image_upload import ImgBBUploader, IMGBB_UPLOAD_URL, DEFAULT_MAX_DIMENSION, DEFAULT_QUALITY
+from utils.photo_linking import link_photos
+from utils.styling import apply_custom_styling
+import logging
+
+logger = logging.getLogger(__name__)
+apply_custom_styling()
+
+# Report labels for each file outcome
+STATUS_LABELS = {
+    'linked': "✅ যুক্ত হয়েছে",
+    'no_voter_number': "⚠️ ফাইলের নামে ভোটার নং নেই",
+    'no_record': "⚠️ এই ভোটার নং এর কোনো রেকর্ড নেই",
+    'duplicate': "⚠️ একই ভোটার নং এর আরেকটি ছবি আছে",
+    'upload_failed': "❌ আপলোড ব্যর্থ",
+    'link_failed': "❌ আপলোড হয়েছে, কিন্তু রেকর্ডে যুক্ত করা যায়নি",
+}
+
+def photo_linking_page():
+    """
+    Uploads a set of photos (or zip archives of them) named by ভোটার_নং and
+    writes the resulting links into the matching records' photo_link.
+    """
+    if 'authenticated' not in st.session_state or not st.session_state.authenticated:
+        st.warning("অনুগ্রহ করে প্রথমে লগইন করুন")
+        return
+
+    st.title("🖼️ ভোটার নং অনুযায়ী ছবি যুক্ত করুন")
+    st.markdown(
+        "ছবিগুলোর ফাইলের নাম ভোটার নং হতে হবে (বাংলা বা ইংরেজি সংখ্যায়, যেমন `১২৩৪৫৬৭৮৯০.jpg`)। "
+        "একাধিক ছবি অথবা একটি zip ফাইল আপলোড করুন।"
+    )
+
+    db = Database()
+
+    uploaded_files = st.file_uploader(
+        "ছবি বা zip ফাইল নির্বাচন করুন",
+        type=["png", "jpg", "jpeg", "zip"],
+        accept_multiple_files=True
+    )
+
+    with st.expander("কমপ্রেশন সেটিংস"):
+        col1, col2 = st.columns(2)
+        with col1:
+            max_dimension = st.number_input("সর্বোচ্চ দৈর্ঘ্য / প্রস্থ (px)", min_value=200, max_value=8000, value=DEFAULT_MAX_DIMENSION, step=100)
+        with col2:
+            quality = st.slider("JPEG কোয়ালিটি", min_value=30, max_value=95, value=DEFAULT_QUALITY)
+
+    if uploaded_files and st.button("📤 আপলোড এবং যুক্ত করুন", type="primary", use_container_width=True):
+        uploader = ImgBBUploader(st.secrets["IMGBB_API_KEY"], st.secrets.get("IMGBB_UPLOAD_URL", IMGBB_UPLOAD_URL))
+        progress_bar = st.progress(0.0, text="ছবি আপলোড করা হচ্ছে...")
+        try:
+            report = link_photos(
+                db, uploaded_files, uploader,
+                progress=lambda done, total: progress_bar.progress(done / total, text=f"আপলোড হয়েছে {done} / {total}"),
+                max_workers=int(st.secrets.get("IMGBB_UPLOAD_WORKERS", 4)),
+                max_dimension=max_dimension,
+                quality=quality,
+            )
+            st.session_state.photo_linking_report = report
+        except Exception as e:
+            logger.error(f"Photo linking failed: {e}")
+            st.error(f"ছবি যুক্ত করতে সমস্যা হয়েছে: {e}")
+        finally:
+            progress_bar.empty()
+
+    report = st.session_state.get('photo_linking_report')
+    if report:
+        linked = [entry for entry in report if entry['status'] == 'linked']
+        unmatched = [entry for entry in report if entry['status'] != 'linked']
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("মোট ছবি", len(report))
+        with col2:
+            st.metric("যুক্ত হয়েছে", len(linked))
+        with col3:
+            st.metric("রেকর্ড আপডেট", sum(entry['records'] for entry in linked))
+
+        df = pd.DataFrame(report)
+        unmatched_mask = df['status'] != 'linked'
+        df['status'] = df['status'].map(STATUS_LABELS)
+        column_config = {
+            'file_name': 'ফাইল',
+            'voter_no': 'ভোটার নং',
+            'status': 'অবস্থা',
+            'url': st.column_config.LinkColumn('ছবির লিঙ্ক'),
+            'records': 'রেকর্ড',
+        }
+
+        if unmatched:
+            st.subheader(f"যুক্ত হয়নি ({len(unmatched)} টি)")
+            unmatched_df = df[unmatched_mask]
+            st.dataframe(unmatched_df, column_config=column_config, hide_index=True, use_container_width=True)
+            st.download_button(
+                "📥 অমিল ফাইলের তালিকা (CSV)",
+                unmatched_df.to_csv(index=False).encode('utf-8'),
+                file_name="unmatched_photos.csv",
+                mime="text/csv"
+            )
+
+        with st.expander(f"সব ফাইল ({len(report)} টি)"):
+            st.dataframe(df, column_config=column_config, hide_index=True, use_container_width=True)
+
+if __name__ == "__main__":
+    photo_linking_page()
@@ -0,0 +1,231 @@
+"""
+Tests for utils/connection_pool.py using fake connections passed as connect=:
+the max_size bound under concurrent checkouts, checkout timeouts, replacement
+of expired and unhealthy connections, and the reset done by putconn().
+"""
+import threading
+import time
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+from psycopg2 import extensions
+
+from utils.connection_pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+
+class FakeConnection:
+    """Records the calls the pool makes; `broken` makes every query fail."""
+    def __init__(self):
+        self.autocommit = True
+        self.closed = 0
+        self.broken = False
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        if self.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeConnect:
+    """Stands in for psycopg2.connect and keeps every connection it opened."""
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.opened = []
+        self._lock = threading.Lock()
+
+    def __call__(self, **kwargs):
+        time.sleep(self.delay)
+        conn = FakeConnection()
+        with self._lock:
+            self.opened.append(conn)
+        return conn
+
+
+def make_pool(connect=None, **kwargs):
+    kwargs.setdefault('min_size', 0)
+    return ConnectionPool({}, connect=connect or FakeConnect(), **kwargs)
+
+
+def test_invalid_sizes_are_refused():
+    for sizes in ({'min_size': -1}, {'max_size': 0}, {'min_size': 3, 'max_size': 2}):
+        with pytest.raises(ValueError):
+            make_pool(**sizes)
+
+
+def test_min_size_connections_are_opened_up_front():
+    connect = FakeConnect()
+    pool = make_pool(connect, min_size=2, max_size=4)
+    assert len(connect.opened) == 2
+    assert pool.stats()['idle'] == 2
+    assert all(conn.autocommit is False for conn in connect.opened)
+
+
+def test_max_size_is_never_exceeded_under_threads():
+    # A slow connect widens the window in which concurrent callers could over-open
+    connect = FakeConnect(delay=0.01)
+    pool = make_pool(connect, max_size=3, checkout_timeout=10)
+    in_use, peak = [0], [0]
+    lock = threading.Lock()
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(5):
+                with pool.connection():
+                    with lock:
+                        in_use[0] += 1
+                        peak[0] = max(peak[0], in_use[0])
+                    time.sleep(0.002)
+                    with lock:
+                        in_use[0] -= 1
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert not errors
+    assert peak[0] <= 3 and len(connect.opened) <= 3
+    stats = pool.stats()
+    assert stats['peak_in_use'] <= 3 and stats['size'] <= 3
+    assert stats['checkouts'] == stats['returns'] == 60
+    assert stats['waits'] > 0
+
+
+def test_checkout_times_out_when_the_pool_is_exhausted():
+    pool = make_pool(max_size=1)
+    conn = pool.getconn()
+    started = time.monotonic()
+    with pytest.raises(PoolTimeoutError):
+        pool.getconn(timeout=0.1)
+    assert time.monotonic() - started >= 0.1
+    assert pool.stats()['timeouts'] == 1
+
+    pool.putconn(conn)
+    assert pool.getconn(timeout=0.1) is conn
+
+
+def test_waiting_checkout_gets_the_returned_connection():
+    pool = make_pool(max_size=1)
+    conn = pool.getconn()
+    threading.Timer(0.05, pool.putconn, args=(conn,)).start()
+    assert pool.getconn(timeout=5) is conn
+    assert pool.stats()['waits'] == 1
+
+
+def test_failed_connect_frees_its_slot():
+    attempts = []
+
+    def connect(**kwargs):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise psycopg2.OperationalError("could not connect to server")
+        return FakeConnection()
+
+    pool = make_pool(connect, max_size=1)
+    with pytest.raises(psycopg2.OperationalError):
+        pool.getconn()
+    assert pool.stats()['size'] == 0
+    assert pool.getconn(timeout=0.1) is not None
+
+
+def test_expired_connections_are_replaced(monkeypatch):
+    connect = FakeConnect()
+    pool = make_pool(connect, max_size=2, max_lifetime=60)
+    first = pool.getconn()
+    pool.putconn(first)
+
+    real_monotonic = time.monotonic
+    monkeypatch.setattr(time, 'monotonic', lambda: real_monotonic() + 120)
+    second = pool.getconn()
+    assert second is not first and first.closed
+    assert pool.stats()['expired'] == 1 and pool.stats()['size'] == 1
+
+
+def test_unhealthy_connections_are_replaced():
+    connect = FakeConnect()
+    pool = make_pool(connect, max_size=2, health_check_after=0)
+    first = pool.getconn()
+    pool.putconn(first)
+    first.broken = True
+
+    second = pool.getconn()
+    assert second is not first and first.closed
+    assert pool.stats()['health_check_failures'] == 1
+
+    # Closed by the server while idle: not reused, even without a health check
+    pool.putconn(second)
+    second.closed = 2
+    assert pool.getconn() is not second
+
+
+def test_putconn_rolls_back_an_open_transaction():
+    pool = make_pool(max_size=1)
+    conn = pool.getconn()
+    conn.status = extensions.TRANSACTION_STATUS_INTRANS
+    conn.autocommit = True
+    pool.putconn(conn)
+    assert conn.rollbacks == 1 and conn.autocommit is False and not conn.closed
+    assert pool.getconn() is conn
+
+
+@pytest.mark.parametrize('status', [extensions.TRANSACTION_STATUS_UNKNOWN, extensions.TRANSACTION_STATUS_INERROR])
+def test_putconn_discards_connections_that_cannot_be_reset(status):
+    connect = FakeConnect()
+    pool = make_pool(connect, max_size=1)
+    conn = pool.getconn()
+    conn.status = status
+    # A failed transaction on a dead connection cannot be rolled back
+    conn.broken = status == extensions.TRANSACTION_STATUS_INERROR
+    pool.putconn(conn)
+    assert conn.closed
+    assert pool.stats()['size'] == 0 and pool.stats()['connections_closed'] == 1
+
+
+def test_putconn_discard_and_unknown_connections():
+    pool = make_pool(max_size=2)
+    conn = pool.getconn()
+    pool.putconn(conn, discard=True)
+    assert conn.closed and pool.stats()['size'] == 0
+
+    pool.putconn(FakeConnection())
+    assert pool.stats()['returns'] == 1
+
+
+def test_closeall_refuses_further_checkouts():
+    pool = make_pool(min_size=1, max_size=1)
+    pool.closeall()
+    assert pool.stats()['size'] == 0
+    with pytest.raises(psycopg2.InterfaceError):
+        pool.getconn()
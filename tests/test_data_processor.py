@@ -0,0 +1,177 @@
+"""
+Regression tests for the record parser in attached_assets/data_processor.py:
+the single-pass parser must extract exactly what the original per-field
+parser did, and must stay linear on adversarial input.
+"""
+import logging
+import random
+import re
+import time
+
+import pytest
+
+from attached_assets import data_processor
+from attached_assets.data_processor import extract_fields, iter_records, split_records
+from benchmarks.generate import generate_files
+
+
+# --- Reference: the original parser (one re.split, then nine re.search calls per record) ---
+
+REFERENCE_FIELD_PATTERNS = {
+    'ক্রমিক_নং': (r'^([০-৯]+|[0-9]+)\.', True),
+    'নাম': (r'নাম:?\s*([^,\n।]+)', False),
+    'ভোটার_নং': (r'ভোটার\s*নং:?\s*([^,\n।]+)', False),
+    'পিতার_নাম': (r'পিতা:?\s*([^,\n।]+)', False),
+    'মাতার_নাম': (r'মাতা:?\s*([^,\n।]+)', False),
+    'পেশা': (r'পেশা:?\s*([^,।\n]+)', False),
+    'জন্ম_তারিখ': (r'জন্ম\s*তারিখ:?\s*([^,\n।]+)', False),
+    'ঠিকানা': (r'ঠিকানা:?\s*([^,\n।]+(?:[,\n।][^,\n।]+)*)', False),
+    'gender': (r'লিঙ্গ:?\s*(পুরুষ|মহিলা|অন্যান্য|Male|Female|Other)', False),
+}
+
+
+def reference_parse(content, default_gender=None):
+    """The pre-rewrite process_text_file, minus age calculation."""
+    content = content.strip().replace('\ufeff', '').replace('\r\n', '\n')
+    records = []
+    for record in re.split(r'\n\s*(?=(?:[০-৯]+|[0-9]+)\.)', content):
+        if not record.strip():
+            continue
+        record_dict = {}
+        for field, (pattern, full_match) in REFERENCE_FIELD_PATTERNS.items():
+            match = re.search(pattern, record, re.MULTILINE | re.IGNORECASE)
+            if match:
+                value = match.group(0).strip() if full_match else match.group(1).strip()
+                if field == 'ক্রমিক_নং':
+                    value = value.rstrip('.')
+                record_dict[field] = value.strip()
+        if 'gender' not in record_dict and default_gender:
+            record_dict['gender'] = default_gender
+        if all(field in record_dict for field in ('ক্রমিক_নং', 'নাম', 'ভোটার_নং')):
+            records.append(record_dict)
+    return records
+
+
+def parse(content, default_gender=None):
+    """The current parser's output, without the birth_date it adds."""
+    records = []
+    for record in iter_records(content, default_gender):
+        record.pop('birth_date')
+        records.append(record)
+    return records
+
+
+@pytest.fixture(autouse=True)
+def quiet_parser(caplog):
+    # Incomplete records log a warning each; keep that out of the timings
+    caplog.set_level(logging.ERROR, logger=data_processor.logger.name)
+
+
+# --- Equivalence with the original parser ---
+
+README_SAMPLE = """1.
+নাম: John Doe,
+ভোটার নং: 123456789,
+পিতা: Richard Doe,
+মাতা: Jane Doe,
+পেশা: Farmer,
+জন্ম তারিখ: 01-01-1980,
+ঠিকানা: 123 Main Street, Gazipur,
+
+2.
+নাম: Mary Smith,
+ভোটার নং: 987654321,
+পিতা: Robert Smith,
+মাতা: Susan Smith,
+পেশা: Teacher,
+জন্ম তারিখ: 05-10-1992,
+ঠিকানা: 456 Oak Avenue, Dhaka,
+"""
+
+EDGE_CASE_SAMPLE = (
+    "\ufeff১. নাম: রহিম উদ্দিন, ভোটার নং: ১২৩৪৫, লিঙ্গ: পুরুষ\r\n"
+    "ঠিকানা: চরপাড়া, রামপুর। জন্ম তারিখ: ০১/০২/১৯৮০\r\n"
+    "\r\n   \r\n"
+    "2. ভোটার নং 555 নাম করিমা বেগম লিঙ্গ female পেশা গৃহিণী\n"
+    "3.\n"  # No name or voter number: skipped
+    "   4. পিতা: আব্দুল, নাম: দ্বিতীয় নাম, নাম: তৃতীয়, ভোটার নং: 9\n"
+    "ঠিকানা:\n\nমাতা: ফাতেমা\n"
+    "5.নাম:জসিম,ভোটারনং:77,জন্মতারিখ:1990-05-06"
+)
+
+
+def test_parse_matches_reference_on_generated_lists():
+    for _, gender, text in generate_files(2000, seed=7, records_per_file=500):
+        assert parse(text, gender) == reference_parse(text, gender)
+
+
+@pytest.mark.parametrize('sample', [README_SAMPLE, EDGE_CASE_SAMPLE])
+@pytest.mark.parametrize('default_gender', [None, 'Female'])
+def test_parse_matches_reference_on_samples(sample, default_gender):
+    assert parse(sample, default_gender) == reference_parse(sample, default_gender)
+
+
+def test_parse_matches_reference_on_shuffled_fragments():
+    fragments = [
+        "১.", "12.", "\n", "\n\n", "  ", ",", "।", ":", "নাম", "নাম:", "ভোটার", "ভোটার নং:", "নং",
+        "পিতা:", "মাতা", "পেশা:", "জন্ম", "তারিখ:", "জন্ম তারিখ:", "ঠিকানা:", "লিঙ্গ:", "মহিলা",
+        "Male", "OTHER", "রহিম", "০১-০১-১৯৮০", "x", "7", "\n৩.",
+    ]
+    rng = random.Random(5)
+    for _ in range(2000):
+        text = ''.join(rng.choice(fragments) for _ in range(rng.randrange(1, 40)))
+        assert parse(text) == reference_parse(text), repr(text)
+
+
+# --- Linear scaling on adversarial input ---
+
+ADVERSARIAL_INPUTS = {
+    'newline run': lambda n: "1. নাম: a, ভোটার নং: 1" + "\n" * n + "2. নাম: b, ভোটার নং: 2",
+    'newline run before text': lambda n: "1. নাম: a" + "\n" * n + "x",
+    'whitespace and newline run': lambda n: "1. নাম: a" + " \n\t" * n + "x",
+    'repeated labels': lambda n: "1. " + "নাম" * n,
+    'repeated labels with colons': lambda n: "1. " + "ভোটার নং: " * n,
+    'whitespace after label': lambda n: "1. নাম:" + " " * n,
+    'long address': lambda n: "1. নাম: a, ভোটার নং: 1, ঠিকানা: " + "ক," * n,
+    'empty numbered lines': lambda n: "1.\n" * n,
+}
+
+SMALL_SIZE = 20000
+LARGE_SIZE = 4 * SMALL_SIZE
+
+
+def best_time(function, repeats=3):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+@pytest.mark.parametrize('name', list(ADVERSARIAL_INPUTS))
+def test_parser_scales_linearly(name):
+    make_input = ADVERSARIAL_INPUTS[name]
+    small, large = make_input(SMALL_SIZE), make_input(LARGE_SIZE)
+
+    def run(content):
+        return lambda: (list(split_records(content)), list(iter_records(content)))
+
+    small_time = best_time(run(small))
+    large_time = best_time(run(large))
+    # 4x the input: linear is ~4x the time, quadratic ~16x. The floor keeps
+    # timer noise on very fast inputs from failing the test.
+    assert large_time <= max(8 * small_time, 0.05), (
+        f"{name}: {small_time:.4f}s for {len(small)} chars, {large_time:.4f}s for {len(large)} chars"
+    )
+
+
+def test_split_records_on_long_blank_stretch():
+    content = "1. a" + "\n \n" * 50000 + "2. b"
+    assert list(split_records(content)) == ["1. a", "2. b"]
+
+
+def test_extract_fields_takes_first_match():
+    assert extract_fields("1. নাম: প্রথম, নাম: দ্বিতীয়, ভোটার নং: 5") == {
+        'ক্রমিক_নং': '1', 'নাম': 'প্রথম', 'ভোটার_নং': '5',
+    }
@@ -0,0 +1,74 @@
+"""
+Tests for the pure helpers in utils/database.py: the COPY FROM STDIN payload
+and which COPY failures fall back to INSERT.
+"""
+import re
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+pytest.importorskip("streamlit")
+
+from utils.database import copy_payload, copy_unsupported
+
+_COPY_UNESCAPES = {'\\\\': '\\', '\\t': '\t', '\\n': '\n', '\\r': '\r'}
+
+
+def parse_copy_text(payload):
+    """Decodes a COPY text-format stream the way the server does (for the escapes copy_payload writes)."""
+    rows = []
+    for line in payload.split('\n')[:-1]:
+        rows.append(tuple(
+            None if field == '\\N' else re.sub(r'\\[\\tnr]', lambda match: _COPY_UNESCAPES[match.group()], field)
+            for field in line.split('\t')
+        ))
+    return rows
+
+
+@pytest.mark.parametrize('value, encoded', [
+    ('plain', 'plain'),
+    ('মোহাম্মদ করিম', 'মোহাম্মদ করিম'),
+    ('a\tb', 'a\\tb'),
+    ('line 1\nline 2', 'line 1\\nline 2'),
+    ('line 1\r\nline 2', 'line 1\\r\\nline 2'),
+    ('C:\\photos\\1.jpg', 'C:\\\\photos\\\\1.jpg'),
+    ('\\N', '\\\\N'),  # The text "\N" is not NULL
+    ('\\t', '\\\\t'),
+    ('', ''),
+    (None, '\\N'),
+    (42, '42'),
+])
+def test_copy_payload_escapes_values(value, encoded):
+    assert copy_payload([(value,)]).getvalue() == encoded + '\n'
+
+
+def test_copy_payload_rows_round_trip():
+    rows = [
+        (1, 'file.txt', None, '', 'tab\there', 'new\nline', 'back\\slash', '\\N'),
+        (2, 'file.txt', '', None, '\r', '\\\t\n', 'ঠিকানা: ঢাকা', 'end\\'),
+    ]
+    payload = copy_payload(rows).getvalue()
+    assert payload.count('\n') == len(rows)
+    assert all(line.count('\t') == 7 for line in payload.split('\n')[:-1])
+    assert parse_copy_text(payload) == [tuple(None if value is None else str(value) for value in row) for row in rows]
+
+
+def test_copy_payload_of_no_rows_is_empty():
+    assert copy_payload([]).getvalue() == ''
+
+
+class PgError(psycopg2.Error):
+    pgcode = None
+
+
+@pytest.mark.parametrize('pgcode, unsupported', [
+    ('0A000', True),   # feature_not_supported, e.g. a proxy that rejects COPY
+    ('42501', True),   # insufficient_privilege
+    ('22P02', False),  # invalid_text_representation: bad data fails INSERT too
+    ('23505', False),  # unique_violation
+    ('57014', False),  # query_canceled
+    (None, False),     # client-side errors, such as a lost connection
+])
+def test_only_refused_copy_falls_back(pgcode, unsupported):
+    error = type('Error', (PgError,), {'pgcode': pgcode})("COPY failed")
+    assert copy_unsupported(error) is unsupported
@@ -0,0 +1,149 @@
+"""
+Tests for utils/facet_index.py: bitset helpers, expression evaluation and
+counts, incremental updates, replay of updates made during a build, and the
+single-flight build.
+"""
+import threading
+
+import pytest
+
+from utils.facet_index import FacetIndex, bitset_from_ids, ids_from_bitset
+
+# (batch_id, gender, relationship_status, record_ids) groups and (event_id, record_ids) members
+RECORD_GROUPS = [
+    (1, 'Male', 'Regular', [1, 2, 3]),
+    (1, 'Female', 'Friend', [4, 5]),
+    (2, 'Female', 'Regular', [6, 7, 8]),
+    (2, None, None, [9]),
+]
+EVENT_MEMBERS = [(10, [1, 4, 6]), (11, [4, 9])]
+
+
+def loader():
+    return RECORD_GROUPS, EVENT_MEMBERS
+
+
+@pytest.fixture
+def index():
+    index = FacetIndex(max_age=0)
+    index.ensure(loader)
+    return index
+
+
+def test_bitset_round_trip():
+    record_ids = [0, 3, 7, 8, 64, 1000]
+    bitset = bitset_from_ids(record_ids)
+    assert bitset == sum(1 << record_id for record_id in record_ids)
+    assert ids_from_bitset(bitset) == record_ids
+    assert bitset_from_ids([]) == 0 and ids_from_bitset(0) == []
+
+
+def test_ids_from_bitset_pages():
+    bitset = bitset_from_ids([2, 5, 9, 40, 41])
+    assert ids_from_bitset(bitset, limit=2) == [2, 5]
+    assert ids_from_bitset(bitset, after_id=5, limit=2) == [9, 40]
+    assert ids_from_bitset(bitset, after_id=4) == [5, 9, 40, 41]
+    assert ids_from_bitset(bitset, after_id=41) == []
+
+
+def test_and_or_not(index):
+    assert ids_from_bitset(index.match(('and', ('batch', 1), ('gender', 'Female')))) == [4, 5]
+    assert ids_from_bitset(index.match(('or', ('event', 10), ('event', 11)))) == [1, 4, 6, 9]
+    assert ids_from_bitset(index.match(('not', ('batch', 1)))) == [6, 7, 8, 9]
+    assert ids_from_bitset(index.match(('and', ('relationship', 'Regular'), ('not', ('event', 10))))) == [2, 3, 7, 8]
+    assert ids_from_bitset(index.match(None)) == list(range(1, 10))
+    assert index.match(('gender', 'Unknown')) == 0
+
+
+def test_missing_values_are_indexed_as_empty_strings(index):
+    assert ids_from_bitset(index.match(('gender', ''))) == [9]
+
+
+def test_counts(index):
+    assert index.count(('and', ('batch', 2), ('gender', 'Female'))) == 3
+    assert index.facet_counts('gender') == {'Male': 3, 'Female': 5, '': 1}
+    assert index.facet_counts('batch', ('event', 10)) == {1: 2, 2: 1}
+    assert index.stats()['records'] == 9
+
+
+def test_updates(index):
+    index.set_value('relationship', [2, 3], 'Friend')
+    assert index.facet_counts('relationship') == {'Regular': 4, 'Friend': 4, '': 1}
+    index.add_members('event', 12, [7, 8])
+    index.remove_members('event', 10, [1])
+    assert ids_from_bitset(index.match(('or', ('event', 10), ('event', 12)))) == [4, 6, 7, 8]
+    index.replace_members('event', 4, [12])
+    assert index.facet_counts('event') == {10: 1, 11: 1, 12: 3}
+
+
+def test_queries_before_the_first_build_raise():
+    with pytest.raises(RuntimeError, match="not built"):
+        FacetIndex().count(None)
+
+
+def test_updates_during_a_build_are_replayed():
+    index = FacetIndex(max_age=0)
+
+    def racing_loader():
+        rows = loader()
+        # Committed after the loader read its rows, so the loaded rows miss it
+        index.set_value('gender', [1], 'Female')
+        return rows
+
+    index.ensure(racing_loader)
+    assert ids_from_bitset(index.match(('gender', 'Male'))) == [2, 3]
+    assert index.stats()['replayed'] == 1 and not index.stats()['stale']
+
+
+def test_invalidation_during_a_build_loads_again():
+    index = FacetIndex(max_age=0, max_build_attempts=3)
+    calls = []
+
+    def invalidating_loader():
+        calls.append(1)
+        if len(calls) == 1:
+            index.invalidate()
+        return loader()
+
+    index.ensure(invalidating_loader)
+    assert len(calls) == 2 and not index.stats()['stale']
+
+    # Raced on every attempt: the last load is installed but stays stale
+    index.invalidate()
+    index.ensure(lambda: index.invalidate() or loader())
+    assert index.stats()['stale'] and index.stats()['builds'] == 2
+
+
+def test_concurrent_readers_share_one_build():
+    index = FacetIndex(max_age=0)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return loader()
+
+    threads = [threading.Thread(target=index.ensure, args=(slow_loader,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert index.count(None) == 9
+
+
+def test_failed_build_leaves_the_index_stale():
+    index = FacetIndex(max_age=0)
+
+    def failing_loader():
+        raise ConnectionError("database unavailable")
+
+    with pytest.raises(ConnectionError):
+        index.ensure(failing_loader)
+    assert not index.stats()['loaded']
+    index.ensure(loader)
+    assert index.count(None) == 9
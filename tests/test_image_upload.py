@@ -0,0 +1,234 @@
+"""
+Tests for utils/image_upload.py: compression, retry/backoff and per-file
+error handling, using a fake uploader in place of ImgBB, and ImgBBUploader
+itself against a local stand-in for the ImgBB API.
+"""
+import base64
+import io
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("requests")
+
+from utils import image_upload
+from utils.image_upload import ImgBBUploader, UploadError, compress_image, upload_images, upload_with_retries
+
+
+class FakeUploader:
+    """Stands in for ImgBBUploader: fails with the queued errors first, then returns a link."""
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.uploads = []
+
+    def upload(self, name, data):
+        self.uploads.append((name, data))
+        if self.errors:
+            raise self.errors.pop(0)
+        return f"https://images.example/{name}"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(image_upload.time, 'sleep', delays.append)
+    return delays
+
+
+def image_bytes(size=(100, 80), mode='RGB', format='PNG', **options):
+    """A noisy image, so that it compresses like a photo rather than a flat colour."""
+    output = io.BytesIO()
+    Image.effect_noise(size, 64).convert(mode).save(output, format=format, **options)
+    return output.getvalue()
+
+
+# --- Compression ---
+
+def test_compress_image_shrinks_to_max_dimension():
+    compressed = compress_image(image_bytes((900, 600)), max_dimension=480)
+    with Image.open(io.BytesIO(compressed)) as image:
+        assert image.format == 'JPEG'
+        assert image.size == (480, 320)
+
+
+def test_compress_image_flattens_transparency():
+    compressed = compress_image(image_bytes((800, 800), mode='RGBA'), max_dimension=400)
+    with Image.open(io.BytesIO(compressed)) as image:
+        assert image.mode == 'RGB'
+        assert image.size == (400, 400)
+
+
+def test_compress_image_keeps_smaller_original():
+    original = image_bytes((100, 100), format='JPEG', quality=10)
+    assert compress_image(original, quality=100) == original
+
+
+# --- Retries ---
+
+def test_retries_retryable_errors_with_exponential_backoff(sleeps, monkeypatch):
+    monkeypatch.setattr(image_upload.random, 'random', lambda: 0.5)  # No jitter
+    uploader = FakeUploader([UploadError("503"), UploadError("429")])
+    assert upload_with_retries(uploader, 'a.jpg', b'x', retries=3, backoff=1.0) == "https://images.example/a.jpg"
+    assert len(uploader.uploads) == 3
+    assert sleeps == [1.0, 2.0]
+
+
+def test_gives_up_after_retries(sleeps):
+    uploader = FakeUploader([UploadError("503")] * 5)
+    with pytest.raises(UploadError):
+        upload_with_retries(uploader, 'a.jpg', b'x', retries=2)
+    assert len(uploader.uploads) == 3
+    assert len(sleeps) == 2
+
+
+def test_does_not_retry_permanent_errors(sleeps):
+    uploader = FakeUploader([UploadError("400", retryable=False)])
+    with pytest.raises(UploadError):
+        upload_with_retries(uploader, 'a.jpg', b'x')
+    assert len(uploader.uploads) == 1
+    assert sleeps == []
+
+
+# --- Batches ---
+
+def test_upload_images_returns_results_in_input_order(sleeps):
+    files = [(f"{number}.png", image_bytes((600 + number, 400))) for number in range(6)]
+    progress = []
+    results = upload_images(files, FakeUploader([UploadError("503")]), max_workers=3, max_dimension=300,
+                            progress=lambda done, total: progress.append((done, total)))
+    assert [result['file_name'] for result in results] == [name for name, _ in files]
+    assert all(result['url'] == f"https://images.example/{result['file_name']}" for result in results)
+    assert all(result['uploaded_size'] < result['original_size'] for result in results)
+    assert progress[-1] == (6, 6)
+
+
+def test_one_bad_file_does_not_abort_the_batch(sleeps, monkeypatch):
+    monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 1000)  # 2x this raises DecompressionBombError
+    files = [
+        ('good.png', image_bytes((20, 20))),
+        ('bomb.png', image_bytes((200, 200))),
+        ('not-an-image.png', b'not an image'),
+        ('rejected.png', image_bytes((20, 20))),
+    ]
+
+    class Uploader(FakeUploader):
+        def upload(self, name, data):
+            if name == 'rejected.png':
+                raise UploadError("400", retryable=False)
+            return super().upload(name, data)
+
+    results = {result['file_name']: result for result in upload_images(files, Uploader())}
+    assert results['good.png']['url'] and results['good.png']['error'] is None
+    for name in ('bomb.png', 'not-an-image.png', 'rejected.png'):
+        assert results[name]['url'] is None and results[name]['error']
+
+
+def test_unexpected_compression_errors_are_reported_per_file(monkeypatch):
+    def compress(data, max_dimension, quality):
+        if data == b'bad':
+            raise ValueError("conversion from I;16 to RGB not supported")
+        return data
+
+    monkeypatch.setattr(image_upload, 'compress_image', compress)
+    results = upload_images([('a', b'ok'), ('b', b'bad')], FakeUploader())
+    assert results[0]['url'] == "https://images.example/a"
+    assert results[1]['error'] == "conversion from I;16 to RGB not supported"
+
+
+# --- ImgBB API (local stand-in server) ---
+
+class ImgBBServer(ThreadingHTTPServer):
+    """Answers uploads with the queued (status, body) responses, then with success; records every form posted."""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), ImgBBHandler)
+        self.responses = []
+        self.uploads = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/1/upload"
+
+
+class ImgBBHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        self.server.uploads.append({field: values[0] for field, values in form.items()})
+        if self.server.responses:
+            status, body = self.server.responses.pop(0)
+        else:
+            status, body = 200, json.dumps({'data': {'url': f"https://i.ibb.co/x/{form['name'][0]}.jpg"}, 'success': True})
+        body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def imgbb():
+    server = ImgBBServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_uploader_posts_the_api_form(imgbb):
+    uploader = ImgBBUploader('secret-key', upload_url=imgbb.url)
+    assert uploader.upload('photo', b'\xff\xd8jpeg') == "https://i.ibb.co/x/photo.jpg"
+    assert imgbb.uploads == [{'key': 'secret-key', 'image': base64.b64encode(b'\xff\xd8jpeg').decode(), 'name': 'photo'}]
+
+
+@pytest.mark.parametrize('status, retryable', [(429, True), (500, True), (503, True), (400, False), (403, False)])
+def test_uploader_classifies_error_statuses(imgbb, status, retryable):
+    imgbb.responses.append((status, json.dumps({'error': {'message': 'nope'}})))
+    with pytest.raises(UploadError) as error:
+        ImgBBUploader('key', upload_url=imgbb.url).upload('a', b'x')
+    assert error.value.retryable is retryable
+    assert str(status) in str(error.value)
+
+
+@pytest.mark.parametrize('body', ['not json', json.dumps({'data': {}}), json.dumps({'data': None}), json.dumps([])])
+def test_uploader_rejects_responses_without_a_link(imgbb, body):
+    imgbb.responses.append((200, body))
+    with pytest.raises(UploadError, match="did not contain an image URL") as error:
+        ImgBBUploader('key', upload_url=imgbb.url).upload('a', b'x')
+    assert error.value.retryable is False
+
+
+def test_uploader_connection_errors_are_retryable():
+    with socket.socket() as unused:
+        unused.bind(('127.0.0.1', 0))
+        port = unused.getsockname()[1]
+    # Nothing listens on the port any more, so the connection is refused
+    with pytest.raises(UploadError, match="Upload request failed") as error:
+        ImgBBUploader('key', upload_url=f"http://127.0.0.1:{port}/1/upload", timeout=2).upload('a', b'x')
+    assert error.value.retryable is True
+
+
+def test_uploads_are_retried_against_the_server(imgbb, sleeps):
+    imgbb.responses.extend([(503, '{}'), (429, '{}')])
+    uploader = ImgBBUploader('key', upload_url=imgbb.url)
+    assert upload_with_retries(uploader, 'a', b'x', retries=3) == "https://i.ibb.co/x/a.jpg"
+    assert len(imgbb.uploads) == 3 and len(sleeps) == 2
+
+
+def test_upload_images_through_the_server(imgbb, sleeps):
+    imgbb.responses.append((400, json.dumps({'error': {'message': 'Invalid image'}})))
+    files = [(f"{number}.png", image_bytes((40, 40))) for number in range(3)]
+    results = upload_images(files, ImgBBUploader('key', upload_url=imgbb.url), max_workers=1)
+    assert results[0]['url'] is None and '400' in results[0]['error']
+    assert [result['url'] for result in results[1:]] == ["https://i.ibb.co/x/1.png.jpg", "https://i.ibb.co/x/2.png.jpg"]
+    assert len(imgbb.uploads) == 3
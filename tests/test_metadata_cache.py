@@ -0,0 +1,100 @@
+"""
+Tests for utils/metadata_cache.py: hits and copies, namespace invalidation,
+invalidation racing a load, and max_age expiry.
+"""
+import threading
+import time
+
+from utils.metadata_cache import MetadataCache
+
+
+class Loader:
+    """Returns the current rows and counts its calls."""
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return [dict(row) for row in self.rows]
+
+
+def test_hits_return_private_copies():
+    cache = MetadataCache()
+    loader = Loader([{'id': 1, 'name': 'Batch 1'}])
+    rows = cache.get(('batches',), loader)
+    rows[0]['name'] = 'changed by a page'
+    assert cache.get(('batches',), loader) == [{'id': 1, 'name': 'Batch 1'}]
+    assert loader.calls == 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    assert stats['hit_rate'] == 0.5
+
+
+def test_invalidate_drops_only_the_given_namespaces():
+    cache = MetadataCache()
+    batches, events, files = Loader([{'id': 1}]), Loader([{'id': 2}]), Loader([{'file_name': 'a.txt'}])
+    for key, loader in ((('batches',), batches), (('events',), events), (('batch_files', 1), files)):
+        cache.get(key, loader)
+
+    cache.invalidate('events')
+    for key, loader in ((('batches',), batches), (('events',), events), (('batch_files', 1), files)):
+        cache.get(key, loader)
+    assert (batches.calls, events.calls, files.calls) == (1, 2, 1)
+
+    cache.invalidate()
+    assert cache.stats()['entries'] == 0
+
+
+def test_invalidation_during_a_load_does_not_store_the_stale_result():
+    cache = MetadataCache()
+    loader = Loader([{'id': 1, 'name': 'old'}])
+    loading, invalidated = threading.Event(), threading.Event()
+
+    def slow_loader():
+        rows = loader()
+        loading.set()
+        invalidated.wait(5)
+        return rows
+
+    result = {}
+    reader = threading.Thread(target=lambda: result.update(rows=cache.get(('events',), slow_loader)))
+    reader.start()
+    loading.wait(5)
+    # A write commits and invalidates after the loader read the old rows
+    loader.rows = [{'id': 1, 'name': 'new'}]
+    cache.invalidate('events')
+    invalidated.set()
+    reader.join(5)
+
+    assert result['rows'] == [{'id': 1, 'name': 'old'}]  # The racing reader still gets what it loaded
+    assert cache.stats()['entries'] == 0
+    assert cache.get(('events',), loader) == [{'id': 1, 'name': 'new'}]
+
+
+def test_entries_older_than_max_age_are_reloaded(monkeypatch):
+    cache = MetadataCache(max_age=60)
+    loader = Loader([{'id': 1}])
+    cache.get(('batches',), loader)
+    cache.get(('batches',), loader)
+    assert loader.calls == 1
+
+    real_monotonic = time.monotonic
+    monkeypatch.setattr(time, 'monotonic', lambda: real_monotonic() + 61)
+    loader.rows = [{'id': 1}, {'id': 2}]
+    assert cache.get(('batches',), loader) == [{'id': 1}, {'id': 2}]
+    assert loader.calls == 2 and cache.stats()['expirations'] == 1
+
+    # The reloaded entry is fresh again
+    cache.get(('batches',), loader)
+    assert loader.calls == 2
+
+
+def test_no_max_age_keeps_entries_until_invalidated(monkeypatch):
+    cache = MetadataCache(max_age=None)
+    loader = Loader([{'id': 1}])
+    cache.get(('batches',), loader)
+    real_monotonic = time.monotonic
+    monkeypatch.setattr(time, 'monotonic', lambda: real_monotonic() + 10 ** 6)
+    cache.get(('batches',), loader)
+    assert loader.calls == 1
@@ -0,0 +1,126 @@
+"""
+Tests for utils/photo_linking.py: voter numbers from photo file names, and
+link_photos() saving links chunk by chunk with a fake database and uploader.
+"""
+import io
+import logging
+import zipfile
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("requests")
+
+from utils.image_upload import UploadError
+from utils.photo_linking import link_photos, voter_number_from_filename
+
+
+@pytest.mark.parametrize('name, voter_no', [
+    # Bengali, English and mixed digits
+    ('১২৩৪৫৬৭৮৯০.jpg', '1234567890'),
+    ('1234567890.jpg', '1234567890'),
+    ('১২৩৪৫67890.jpg', '1234567890'),
+    # Separators and surrounding text
+    ('voter-1234567890 (1).jpeg', '1234567890'),
+    ('voter_১২৩৪৫৬ (2).png', '123456'),
+    ('12 345678.png', '345678'),
+    ('১২৩৪_৫৬৭৮৯০১.jpg', '5678901'),
+    ('1234.5678.jpg', '1234'),  # Equal runs: the first one
+    # Extensions and directories
+    ('9876543210.JPG', '9876543210'),
+    ('9876543210.JPEG', '9876543210'),
+    ('9876543210', '9876543210'),
+    ('photos/2024/9876543210.png', '9876543210'),
+    ('photo1234.jpg.png', '1234'),
+    # No voter number
+    ('photo.jpg', None),
+    ('.jpg', None),
+    ('', None),
+    ('٠١٢٣٤٥.jpg', None),  # Arabic-Indic digits are not voter numbers
+])
+def test_voter_number_from_filename(name, voter_no):
+    assert voter_number_from_filename(name) == voter_no
+
+
+class UploadedFile(io.BytesIO):
+    """Stands in for Streamlit's UploadedFile, which is a named BytesIO."""
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+
+
+class FakeUploader:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+
+    def upload(self, name, data):
+        if name in self.failing:
+            raise UploadError("400", retryable=False)
+        return f"https://images.example/{name}"
+
+
+class FakeDatabase:
+    """Knows the given voter numbers (one record each); fail_on lists the link calls (1-based) that raise."""
+    def __init__(self, voter_numbers, fail_on=()):
+        self.voter_numbers = {voter_no: record_id for record_id, voter_no in enumerate(voter_numbers, start=1)}
+        self.fail_on = set(fail_on)
+        self.link_calls = []
+
+    def find_voter_numbers(self, voter_numbers):
+        return set(voter_numbers) & set(self.voter_numbers)
+
+    def link_photos_by_voter_number(self, photo_links):
+        self.link_calls.append(dict(photo_links))
+        if len(self.link_calls) in self.fail_on:
+            raise ConnectionError("server closed the connection unexpectedly")
+        return {voter_no: [self.voter_numbers[voter_no]] for voter_no in photo_links if voter_no in self.voter_numbers}
+
+
+def png_bytes():
+    output = io.BytesIO()
+    Image.new('RGB', (8, 8), 'red').save(output, format='PNG')
+    return output.getvalue()
+
+
+def photo_files(*names):
+    return [UploadedFile(name, png_bytes()) for name in names]
+
+
+def test_links_are_saved_per_chunk():
+    db = FakeDatabase(['1001', '1002', '1003'])
+    report = link_photos(db, photo_files('1001.png', '1002.png', '1003.png'), FakeUploader(), chunk_size=2)
+    assert db.link_calls == [
+        {'1001': "https://images.example/1001.png", '1002': "https://images.example/1002.png"},
+        {'1003': "https://images.example/1003.png"},
+    ]
+    assert [(entry['status'], entry['records']) for entry in report] == [('linked', 1)] * 3
+
+
+def test_a_failed_chunk_keeps_the_saved_links_and_reports_its_urls(caplog):
+    db = FakeDatabase(['1001', '1002', '1003', '1004'], fail_on=[2])
+    with caplog.at_level(logging.ERROR):
+        report = link_photos(db, photo_files('1001.png', '1002.png', '1003.png', '1004.png'), FakeUploader(), chunk_size=1)
+    statuses = {entry['file_name']: entry['status'] for entry in report}
+    assert statuses == {'1001.png': 'linked', '1002.png': 'link_failed', '1003.png': 'linked', '1004.png': 'linked'}
+    assert report[1]['url'] == "https://images.example/1002.png"
+    assert "https://images.example/1002.png" in caplog.text
+    assert len(db.link_calls) == 4
+
+
+def test_files_that_are_not_linked():
+    db = FakeDatabase(['1001', '1002'])
+    files = photo_files('1001.png', 'photo.png', '1001 (1).png', '9999.png', '1002.png')
+    report = link_photos(db, files, FakeUploader(failing=['1002.png']))
+    assert [entry['status'] for entry in report] == ['linked', 'no_voter_number', 'duplicate', 'no_record', 'upload_failed']
+    assert db.link_calls == [{'1001': "https://images.example/1001.png"}]
+
+
+def test_photos_inside_zip_archives():
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr('photos/১০০১.png', png_bytes())
+        zf.writestr('__MACOSX/photos/._১০০১.png', b'')
+        zf.writestr('photos/notes.txt', b'not a photo')
+    db = FakeDatabase(['1001'])
+    report = link_photos(db, [UploadedFile('photos.zip', archive.getvalue())], FakeUploader())
+    assert [(entry['file_name'], entry['voter_no'], entry['status']) for entry in report] == [('১০০১.png', '1001', 'linked')]
@@ -0,0 +1,195 @@
+"""
+Tests for utils/query_cache.py: table-version invalidation, writes racing a
+cached read, LRU eviction within the byte budget, TTL expiry and the
+cached_query decorator.
+"""
+import pickle
+import threading
+import time
+
+from utils.query_cache import QueryCache, cached_query
+
+
+class Reader:
+    """A minimal Database stand-in for cached_query: a query_cache and an in-memory 'records' table."""
+    def __init__(self, cache, rows):
+        self.query_cache = cache
+        self._in_transaction = False
+        self.rows = rows
+        self.calls = 0
+        self.during_query = None  # Called while the query runs, e.g. to simulate a concurrent write
+
+    @cached_query('records')
+    def get_records(self, batch_id=None):
+        self.calls += 1
+        rows = [dict(row) for row in self.rows if batch_id is None or row['batch_id'] == batch_id]
+        if self.during_query:
+            self.during_query()
+        return rows
+
+    @cached_query('records', ttl=60)
+    def get_record_count(self):
+        self.calls += 1
+        return len(self.rows)
+
+    def add_record(self, row):
+        self.rows.append(row)
+        self.query_cache.bump('records')
+
+
+def make_reader(**cache_options):
+    return Reader(QueryCache(**cache_options), [{'id': 1, 'batch_id': 1}, {'id': 2, 'batch_id': 2}])
+
+
+def test_results_are_cached_per_arguments():
+    reader = make_reader()
+    assert reader.get_records(batch_id=1) == [{'id': 1, 'batch_id': 1}]
+    assert reader.get_records(batch_id=1) == [{'id': 1, 'batch_id': 1}]
+    assert reader.get_records(batch_id=2) == [{'id': 2, 'batch_id': 2}]
+    assert reader.calls == 2
+
+
+def test_hits_return_private_copies():
+    reader = make_reader()
+    reader.get_records()[0]['id'] = 99
+    assert reader.get_records()[0]['id'] == 1
+
+
+def test_writes_invalidate_dependent_results():
+    reader = make_reader()
+    reader.get_records()
+    reader.add_record({'id': 3, 'batch_id': 1})
+    assert len(reader.get_records()) == 3
+    assert reader.calls == 2
+    assert reader.query_cache.stats()['invalidations'] == 1
+
+
+def test_bumping_other_tables_keeps_results():
+    reader = make_reader()
+    reader.get_records()
+    reader.query_cache.bump('events')
+    reader.get_records()
+    assert reader.calls == 1
+
+
+def test_write_during_a_read_does_not_store_the_stale_result():
+    reader = make_reader()
+    # The write commits after the query read its rows, before the result is cached
+    reader.during_query = lambda: reader.add_record({'id': 3, 'batch_id': 1})
+    assert len(reader.get_records()) == 2
+    reader.during_query = None
+    assert reader.query_cache.stats()['entries'] == 0
+    assert len(reader.get_records()) == 3
+
+
+def test_write_during_a_read_in_another_thread():
+    reader = make_reader()
+    reading, written = threading.Event(), threading.Event()
+
+    def wait_for_write():
+        reading.set()
+        written.wait(5)
+    reader.during_query = wait_for_write
+
+    thread = threading.Thread(target=reader.get_records)
+    thread.start()
+    reading.wait(5)
+    reader.add_record({'id': 3, 'batch_id': 1})
+    written.set()
+    thread.join(5)
+
+    reader.during_query = None
+    assert len(reader.get_records()) == 3
+
+
+def test_reads_in_a_transaction_bypass_the_cache():
+    reader = make_reader()
+    reader.get_records()
+    reader._in_transaction = True
+    reader.rows.append({'id': 3, 'batch_id': 1})  # Uncommitted write, no bump yet
+    assert len(reader.get_records()) == 3
+    reader._in_transaction = False
+    assert reader.query_cache.stats()['entries'] == 1
+
+
+def entry_size(value):
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def test_eviction_keeps_the_cache_within_its_byte_budget():
+    value = ['x' * 100]
+    size = entry_size(value)
+    cache = QueryCache(max_bytes=size * 3)
+    for number in range(5):
+        cache.put(('key', number), value, ())
+        assert cache.stats()['bytes'] <= cache.max_bytes
+    stats = cache.stats()
+    assert (stats['entries'], stats['bytes'], stats['evictions']) == (3, size * 3, 2)
+    assert cache.get(('key', 0), ())[0] is False
+    assert cache.get(('key', 4), ()) == (True, value)
+
+
+def test_eviction_is_least_recently_used_first():
+    value = ['x' * 100]
+    cache = QueryCache(max_bytes=entry_size(value) * 2)
+    cache.put('a', value, ())
+    cache.put('b', value, ())
+    cache.get('a', ())  # 'b' is now the least recently used
+    cache.put('c', value, ())
+    assert cache.get('a', ())[0] and cache.get('c', ())[0]
+    assert cache.get('b', ())[0] is False
+
+
+def test_replacing_an_entry_does_not_count_it_twice():
+    cache = QueryCache()
+    cache.put('a', ['x' * 100], ())
+    cache.put('a', ['y' * 10], ())
+    assert cache.stats()['bytes'] == entry_size(['y' * 10])
+
+
+def test_results_larger_than_the_cache_are_not_stored():
+    cache = QueryCache(max_bytes=100)
+    cache.put('small', [1], ())
+    cache.put('huge', ['x' * 1000], ())
+    stats = cache.stats()
+    assert stats['oversized'] == 1 and stats['entries'] == 1 and stats['evictions'] == 0
+
+
+def test_ttl_expiry_reloads(monkeypatch):
+    reader = make_reader()
+    real_monotonic = time.monotonic
+    now = [real_monotonic()]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+
+    assert reader.get_record_count() == 2
+    reader.rows.append({'id': 3, 'batch_id': 1})  # Written by another process: no bump here
+    now[0] += 59
+    assert reader.get_record_count() == 2
+    now[0] += 2
+    assert reader.get_record_count() == 3
+    assert reader.calls == 2 and reader.query_cache.stats()['expirations'] == 1
+
+
+def test_default_ttl_applies_to_methods_without_their_own(monkeypatch):
+    reader = make_reader(default_ttl=10)
+    real_monotonic = time.monotonic
+    now = [real_monotonic()]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+
+    reader.get_records()
+    now[0] += 11
+    reader.get_records()
+    reader.get_record_count()
+    now[0] += 11
+    reader.get_record_count()  # Its own 60 s TTL has not run out
+    assert reader.calls == 3
+
+
+def test_clear_keeps_table_versions():
+    cache = QueryCache()
+    cache.bump('records')
+    cache.put('a', [1], cache.versions(['records']))
+    cache.clear()
+    stats = cache.stats()
+    assert stats['entries'] == 0 and stats['bytes'] == 0
+    assert stats['table_versions'] == {'records': 1}
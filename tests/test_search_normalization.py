@@ -0,0 +1,132 @@
+"""
+Tests for the search normalization shared by Python and SQL:
+normalize_bengali_text() and fulltext_query() are pinned against fixed
+expected outputs, and normalize_bengali_text() is checked against the
+bn_normalize() definition in migrations/0004_fulltext_search.sql, evaluated
+here step by step, so the two cannot drift apart without a database.
+"""
+import os
+import re
+
+import pytest
+
+from attached_assets.data_processor import normalize_bengali_text
+
+MIGRATION = os.path.join(os.path.dirname(__file__), '..', 'migrations', '0004_fulltext_search.sql')
+
+
+# --- bn_normalize() as written in the migration ---
+
+def sql_string(literal):
+    """Decodes a SQL string literal: 'text' or U&'\\XXXX' (PostgreSQL Unicode escapes)."""
+    if literal.startswith("U&'"):
+        return re.sub(r'\\([0-9A-Fa-f]{4})', lambda match: chr(int(match.group(1), 16)), literal[3:-1])
+    return literal[1:-1].replace("''", "'")
+
+
+def sql_expression(expression):
+    """Decodes a concatenation of string literals ('a' || U&'b')."""
+    return ''.join(sql_string(part.strip()) for part in expression.split('||'))
+
+
+def load_bn_normalize():
+    """Returns a Python function doing exactly the steps of the SQL bn_normalize()."""
+    with open(MIGRATION, encoding='utf-8') as f:
+        sql = f.read()
+    body = re.search(r"FUNCTION bn_normalize\(value TEXT\).*?\$\$(.*?)\$\$", sql, re.S).group(1)
+    literal = r"(?:U&)?'(?:[^']|'')*'"
+    translate = re.search(
+        rf"translate\(coalesce\(value, ''\), ((?:{literal}\s*\|\|\s*)*{literal}), ({literal})\)", body
+    )
+    source, target = sql_expression(translate.group(1)), sql_expression(translate.group(2))
+    # The replace() calls wrap the translate(), innermost first
+    replacements = [
+        (sql_string(old), sql_string(new))
+        for old, new in re.findall(rf"({literal}),\s*({literal})\)", body[translate.end():])
+    ]
+    assert len(target) == 10 and len(replacements) == 5, "bn_normalize() changed shape; update this test"
+
+    def bn_normalize(value):
+        # translate() maps source[i] to target[i] and deletes source characters without a target
+        table = {ord(char): (target[i] if i < len(target) else None) for i, char in enumerate(source)}
+        text = (value or '').translate(table)
+        for old, new in replacements:
+            text = text.replace(old, new)
+        return text.lower()
+    return bn_normalize
+
+
+bn_normalize = load_bn_normalize()
+
+# Decomposed spellings are written as escapes so that editors do not recompose them
+MOHAMMAD_DECOMPOSED = 'ম\u09c7\u09beহাম্মদ'   # ো typed as ে + া
+GAUTAM_DECOMPOSED = 'গ\u09c7\u09d7তম'         # ৌ typed as ে + ৗ
+BARI_DECOMPOSED = 'বা\u09a1\u09bcি'           # ড + ়
+ASHAR_PRECOMPOSED = 'আষা\u09dd'               # ঢ়
+MOYNA_PRECOMPOSED = 'ম\u09dfনা'               # য়
+
+SAMPLES = [
+    'মোহাম্মদ আব্দুল করিম',
+    MOHAMMAD_DECOMPOSED, 'ম\u09cbহাম্মদ',
+    GAUTAM_DECOMPOSED, 'গ\u09ccতম',
+    BARI_DECOMPOSED, 'বা\u09dcি',
+    ASHAR_PRECOMPOSED, 'আষা\u09a2\u09bc',
+    MOYNA_PRECOMPOSED, 'ম\u09af\u09bcনা',
+    'র\u200cয\u200d্যাব',                        # ZWNJ / ZWJ inside a word
+    'ভোটার নং: ১২৩৪৫৬৭৮৯০',
+    '০১৭১১-২২৩৩৪৪',
+    'Dhaka UNIVERSITY, রোড ৫',
+    'Mixed ১২ and 34 digits',
+    '',
+]
+
+
+@pytest.mark.parametrize('text', SAMPLES)
+def test_python_matches_sql_bn_normalize(text):
+    assert normalize_bengali_text(text) == bn_normalize(text)
+
+
+def test_sql_and_python_share_one_spelling_per_word():
+    for spellings in (SAMPLES[1:3], SAMPLES[3:5], SAMPLES[5:7], SAMPLES[7:9], SAMPLES[9:11]):
+        assert spellings[0] != spellings[1]
+        assert len({bn_normalize(text) for text in spellings}) == 1
+        assert len({normalize_bengali_text(text) for text in spellings}) == 1
+
+
+# --- Pinned outputs ---
+
+@pytest.mark.parametrize('text, normalized', [
+    ('১২৩৪৫৬৭৮৯০', '1234567890'),
+    (MOHAMMAD_DECOMPOSED, 'ম\u09cbহাম্মদ'),
+    (GAUTAM_DECOMPOSED, 'গ\u09ccতম'),
+    ('বা\u09dcি', BARI_DECOMPOSED),
+    (ASHAR_PRECOMPOSED, 'আষা\u09a2\u09bc'),
+    (MOYNA_PRECOMPOSED, 'ম\u09af\u09bcনা'),
+    ('র\u200cয\u200d্যাব', 'রয্যাব'),
+    ('Dhaka ঢাকা', 'dhaka ঢাকা'),
+    ('', ''),
+    (None, None),
+    (42, 42),
+])
+def test_normalize_bengali_text(text, normalized):
+    assert normalize_bengali_text(text) == normalized
+
+
+# --- fulltext_query() ---
+
+@pytest.mark.parametrize('text, query', [
+    ('করিম', "'করিম':*"),
+    ('মোহাম্মদ করিম', "'মোহাম্মদ':* & 'করিম':*"),
+    (MOHAMMAD_DECOMPOSED, "'ম\u09cbহাম্মদ':*"),
+    ('বা\u09dcি', f"'{BARI_DECOMPOSED}':*"),
+    ('ভোটার নং: ১২৩৪', "'ভোটার':* & 'নং':* & '1234':*"),
+    ('ঢাকা।  রোড-৫', "'ঢাকা':* & 'রোড':* & '5':*"),
+    ("O'Brien & Co", "'o':* & 'brien':* & 'co':*"),
+    ('DHAKA', "'dhaka':*"),
+    ('  ,;। ', None),
+    ('', None),
+    (None, None),
+])
+def test_fulltext_query(text, query):
+    database = pytest.importorskip("utils.database", reason="utils.database needs psycopg2 and streamlit")
+    assert database.fulltext_query(text) == query
@@ -0,0 +1,247 @@
+"""
+Tests for utils/thumbnails.py: the SSRF guards (address and host checks,
+redirects, content type, size limits), address pinning and the non-blocking
+url()/warm() path, against a local HTTP server.
+"""
+import io
+import ipaddress
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("requests")
+pytest.importorskip("streamlit")
+pytest.importorskip("psycopg2")
+
+from utils import thumbnails
+from utils.thumbnails import ThumbnailCache
+
+
+def jpeg_bytes(size=(400, 300)):
+    output = io.BytesIO()
+    Image.new('RGB', size, 'blue').save(output, format='JPEG')
+    return output.getvalue()
+
+
+class PhotoServer(ThreadingHTTPServer):
+    """Serves self.routes: path -> (status, headers, body); records every request's path and Host header."""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), PhotoHandler)
+        self.routes = {}
+        self.requests = []
+
+    def url(self, path, host='photos.test'):
+        return f"http://{host}:{self.server_address[1]}{path}"
+
+
+class PhotoHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get('Host')))
+        status, headers, body = self.server.routes.get(self.path, (404, {}, b''))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if 'Content-Length' not in headers and body is not None:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+# Fake DNS for the tests; every other name fails to resolve
+HOSTS = {
+    'photos.test': '127.0.0.1',
+    'metadata.test': '169.254.169.254',
+    'intranet.test': '10.1.2.3',
+    'v6-loopback.test': '::1',
+}
+
+
+@pytest.fixture
+def dns(monkeypatch):
+    # socket is shared with urllib3, so a request re-resolving a host name would also end up here
+    real_getaddrinfo = socket.getaddrinfo
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        try:
+            ipaddress.ip_address(host)
+            return real_getaddrinfo(host, port, *args, **kwargs)
+        except ValueError:
+            pass
+        if host not in HOSTS:
+            raise socket.gaierror(f"unknown host {host}")
+        address = HOSTS[host]
+        family = socket.AF_INET6 if ':' in address else socket.AF_INET
+        return [(family, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', (address, port))]
+    monkeypatch.setattr(thumbnails.socket, 'getaddrinfo', getaddrinfo)
+
+
+@pytest.fixture
+def local_is_public(monkeypatch):
+    # The stand-in server is on loopback; only that address counts as public in these tests
+    monkeypatch.setattr(thumbnails, 'is_public_address', lambda ip: ip == ipaddress.ip_address('127.0.0.1'))
+
+
+@pytest.fixture
+def server():
+    server = PhotoServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ThumbnailCache(str(tmp_path), url_prefix='app/static/thumbnails/', placeholder_urls=('https://none.example/',))
+
+
+# --- Address and host checks ---
+
+@pytest.mark.parametrize('host', ['metadata.test', 'intranet.test', 'v6-loopback.test', 'photos.test'])
+def test_non_public_addresses_are_rejected(cache, dns, host):
+    with pytest.raises(ValueError, match="non-public"):
+        cache._resolve(f"http://{host}/a.jpg")
+
+
+def test_real_address_checks():
+    for address in ('127.0.0.1', '10.0.0.1', '192.168.1.1', '169.254.169.254', '::1', 'fe80::1', '::ffff:127.0.0.1'):
+        assert not thumbnails.is_public_address(ipaddress.ip_address(address))
+    assert thumbnails.is_public_address(ipaddress.ip_address('93.184.216.34'))
+
+
+def test_hosts_outside_the_allow_list_are_rejected(tmp_path, dns, local_is_public):
+    cache = ThumbnailCache(str(tmp_path), allowed_hosts=['ibb.co'])
+    with pytest.raises(ValueError, match="not an allowed photo host"):
+        cache._resolve("http://photos.test/a.jpg")
+    with pytest.raises(ValueError, match="not an http"):
+        cache._resolve("file:///etc/passwd")
+
+
+def test_allow_list_accepts_subdomains(tmp_path, dns, local_is_public):
+    HOSTS['i.photos.test'] = '127.0.0.1'
+    try:
+        cache = ThumbnailCache(str(tmp_path), allowed_hosts=['photos.test'])
+        assert cache._resolve("http://i.photos.test/a.jpg") == ipaddress.ip_address('127.0.0.1')
+    finally:
+        del HOSTS['i.photos.test']
+
+
+# --- Fetching ---
+
+def test_fetch_connects_to_the_checked_address(cache, dns, local_is_public, server):
+    # photos.test only exists in the fake resolver, so the request must go to the address _resolve() returned
+    server.routes['/a.jpg'] = (200, {'Content-Type': 'image/jpeg'}, jpeg_bytes())
+    thumbnail = cache.get(server.url('/a.jpg'))
+    with Image.open(io.BytesIO(thumbnail)) as image:
+        assert max(image.size) == thumbnails.THUMBNAIL_SIZE
+    assert server.requests == [('/a.jpg', f"photos.test:{server.server_address[1]}")]
+    assert cache.stats()['fetches'] == 1
+
+
+def test_redirect_to_a_private_host_is_not_followed(cache, dns, local_is_public, server):
+    server.routes['/a.jpg'] = (302, {'Location': 'http://metadata.test/latest/meta-data/'}, b'')
+    assert cache.get(server.url('/a.jpg')) == cache.placeholder
+    assert [path for path, _ in server.requests] == ['/a.jpg']
+    assert cache.stats()['failures'] == 1
+
+
+def test_redirects_between_allowed_urls_are_followed(cache, dns, local_is_public, server):
+    server.routes['/old.jpg'] = (301, {'Location': '/new.jpg'}, b'')
+    server.routes['/new.jpg'] = (200, {'Content-Type': 'image/jpeg'}, jpeg_bytes())
+    assert cache.get(server.url('/old.jpg')) != cache.placeholder
+    assert [path for path, _ in server.requests] == ['/old.jpg', '/new.jpg']
+
+
+def test_redirect_loops_stop(cache, dns, local_is_public, server):
+    server.routes['/loop.jpg'] = (302, {'Location': '/loop.jpg'}, b'')
+    assert cache.get(server.url('/loop.jpg')) == cache.placeholder
+    assert len(server.requests) == thumbnails.MAX_REDIRECTS + 1
+
+
+def test_non_image_responses_are_rejected(cache, dns, local_is_public, server):
+    server.routes['/page'] = (200, {'Content-Type': 'text/html'}, jpeg_bytes())
+    assert cache.get(server.url('/page')) == cache.placeholder
+    assert cache.stats()['failures'] == 1
+
+
+def test_declared_size_over_the_limit_is_rejected(cache, dns, local_is_public, server, monkeypatch):
+    monkeypatch.setattr(thumbnails, 'MAX_SOURCE_BYTES', 1000)
+    server.routes['/big.jpg'] = (200, {'Content-Type': 'image/jpeg'}, jpeg_bytes((2000, 2000)))
+    assert cache.get(server.url('/big.jpg')) == cache.placeholder
+
+
+def test_undeclared_size_over_the_limit_is_rejected(cache, dns, local_is_public, server, monkeypatch):
+    monkeypatch.setattr(thumbnails, 'MAX_SOURCE_BYTES', 1000)
+    body = jpeg_bytes((2000, 2000))
+    assert len(body) > 1000
+
+    # No Content-Length: the body is only cut off by the read limit
+
+    class Handler(PhotoHandler):
+        def do_GET(self):
+            self.server.requests.append((self.path, self.headers.get('Host')))
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.wfile.write(body)
+
+    server.RequestHandlerClass = Handler
+    assert cache.get(server.url('/big.jpg')) == cache.placeholder
+
+
+def test_decompression_bombs_become_failures(cache, dns, local_is_public, server, monkeypatch):
+    monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 1000)
+    server.routes['/bomb.jpg'] = (200, {'Content-Type': 'image/jpeg'}, jpeg_bytes((200, 200)))
+    assert cache.get(server.url('/bomb.jpg')) == cache.placeholder
+    assert cache.stats()['failures'] == 1
+
+
+def test_failed_urls_are_not_fetched_again(cache, dns, local_is_public, server):
+    assert cache.get(server.url('/missing.jpg')) == cache.placeholder
+    assert cache.get(server.url('/missing.jpg')) == cache.placeholder
+    assert len(server.requests) == 1
+
+
+# --- Serving by URL ---
+
+def test_url_never_fetches_and_warms_in_the_background(cache, dns, local_is_public, server):
+    server.routes['/a.jpg'] = (200, {'Content-Type': 'image/jpeg'}, jpeg_bytes())
+    photo = server.url('/a.jpg')
+    assert cache.url(photo) == cache.placeholder_url == 'app/static/thumbnails/placeholder.jpg'
+
+    deadline = time.monotonic() + 5
+    while cache.url(photo) == cache.placeholder_url and time.monotonic() < deadline:
+        time.sleep(0.01)
+    thumbnail_url = cache.url(photo)
+    assert thumbnail_url.startswith('app/static/thumbnails/') and thumbnail_url != cache.placeholder_url
+    assert len(server.requests) == 1
+
+
+def test_links_without_a_photo_use_the_placeholder(cache):
+    assert cache.urls([None, '', 'https://none.example/', 'not a url']) == {
+        None: cache.placeholder_url, '': cache.placeholder_url,
+        'https://none.example/': cache.placeholder_url, 'not a url': cache.placeholder_url,
+    }
+    assert cache.stats()['queued'] == 0
+
+
+def test_eviction_keeps_the_cache_within_max_bytes(tmp_path):
+    cache = ThumbnailCache(str(tmp_path), max_bytes=2500)
+    for number in range(5):
+        cache._store(cache._path(f"https://photos.example/{number}.jpg"), b'x' * 1000)
+        time.sleep(0.01)
+    stats = cache.stats()
+    assert stats['bytes'] <= 2500 and stats['evictions'] == 3
+    assert (tmp_path / thumbnails.PLACEHOLDER_FILE_NAME).exists()
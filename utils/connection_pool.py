@@ -0,0 +1,251 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the checkout timeout."""
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of PostgreSQL connections shared by every
+    Streamlit session in the server process.
+
+    Connections are handed out with getconn() and given back with putconn().
+    Idle connections are health-checked before reuse, connections older than
+    max_lifetime are retired, and counters describing pool saturation are
+    available through stats().
+    """
+    def __init__(self, connect_kwargs, min_size=1, max_size=20, max_lifetime=1800,
+                 health_check_after=30, checkout_timeout=10, connect=psycopg2.connect):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1.")
+        self._connect_kwargs = dict(connect_kwargs)
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self.checkout_timeout = checkout_timeout
+
+        self._cond = threading.Condition()
+        self._idle = deque()      # (conn, last_used) pairs, most recently returned on the right
+        self._created_at = {}     # id(conn) -> creation time, for every live connection
+        self._in_use = set()      # id(conn) of checked-out connections
+        self._size = 0            # live connections plus connections being opened
+        self._closed = False
+        self._counters = {
+            'connections_created': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'returns': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+            'expired': 0,
+            'peak_in_use': 0,
+            'total_wait_seconds': 0.0,
+        }
+
+        for _ in range(min_size):
+            with self._cond:
+                self._size += 1
+            conn = self._open()
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+
+    # --- Connection lifecycle ---
+    def _open(self):
+        """
+        Opens a new connection into a slot the caller has already reserved
+        (self._size += 1 under the lock); the slot is freed if opening fails.
+        """
+        try:
+            conn = self._connect(**self._connect_kwargs)
+            conn.autocommit = False
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created_at[id(conn)] = time.monotonic()
+            self._counters['connections_created'] += 1
+        return conn
+
+    def _close(self, conn):
+        """Closes a connection and frees its slot. Must be called without the lock held."""
+        try:
+            if not conn.closed:
+                conn.close()
+        except psycopg2.Error as e:
+            logger.warning(f"Error closing pooled connection: {e}")
+        with self._cond:
+            self._created_at.pop(id(conn), None)
+            self._in_use.discard(id(conn))
+            self._size -= 1
+            self._counters['connections_closed'] += 1
+            self._cond.notify()
+
+    def _expired(self, conn, now):
+        created_at = self._created_at.get(id(conn), now)
+        return self.max_lifetime is not None and now - created_at > self.max_lifetime
+
+    def _healthy(self, conn, last_used, now):
+        """Checks a connection before it is handed out."""
+        if conn.closed:
+            return False
+        if now - last_used < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Pooled connection failed health check: {e}")
+            return False
+
+    # --- Checkout / return ---
+    def getconn(self, timeout=None):
+        """
+        Checks a connection out of the pool, opening a new one if the pool is
+        below max_size, otherwise waiting up to `timeout` seconds for one to
+        be returned.
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        wait_started = time.monotonic()
+
+        while True:
+            candidate = None
+            open_new = False
+            with self._cond:
+                if self._closed:
+                    raise psycopg2.InterfaceError("Connection pool is closed.")
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._counters['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f"No database connection available after {timeout} seconds "
+                            f"({self.max_size} connections in use)."
+                        )
+                    if not waited:
+                        waited = True
+                        self._counters['waits'] += 1
+                    self._cond.wait(remaining)
+                if self._idle:
+                    candidate = self._idle.pop()
+                else:
+                    self._size += 1 # Reserve the slot now, so concurrent callers cannot exceed max_size
+                    open_new = True
+
+            if open_new:
+                conn = self._open()
+                break
+
+            conn, last_used = candidate
+            now = time.monotonic()
+            if self._expired(conn, now):
+                with self._cond:
+                    self._counters['expired'] += 1
+                self._close(conn)
+                continue
+            if not self._healthy(conn, last_used, now):
+                with self._cond:
+                    self._counters['health_check_failures'] += 1
+                self._close(conn)
+                continue
+            break
+
+        with self._cond:
+            self._in_use.add(id(conn))
+            self._counters['checkouts'] += 1
+            self._counters['peak_in_use'] = max(self._counters['peak_in_use'], len(self._in_use))
+            if waited:
+                self._counters['total_wait_seconds'] += time.monotonic() - wait_started
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """
+        Returns a connection to the pool. Any open transaction is rolled back;
+        broken, expired or explicitly discarded connections are closed instead
+        of being reused.
+        """
+        with self._cond:
+            if id(conn) not in self._in_use:
+                logger.warning("Attempted to return a connection that is not checked out of this pool.")
+                return
+            self._counters['returns'] += 1
+
+        if not discard and not conn.closed:
+            try:
+                status = conn.get_transaction_status()
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    discard = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if not discard and conn.autocommit:
+                    conn.autocommit = False
+            except psycopg2.Error as e:
+                logger.warning(f"Discarding pooled connection that could not be reset: {e}")
+                discard = True
+
+        now = time.monotonic()
+        if not discard and self._expired(conn, now):
+            with self._cond:
+                self._counters['expired'] += 1
+            discard = True
+
+        if discard or conn.closed or self._closed:
+            self._close(conn)
+            return
+
+        with self._cond:
+            self._in_use.discard(id(conn))
+            self._idle.append((conn, now))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager that checks out a connection and always returns it."""
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    # --- Introspection / shutdown ---
+    def stats(self):
+        """Returns a snapshot of the pool's size and saturation counters."""
+        with self._cond:
+            stats = dict(self._counters)
+            stats.update({
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'saturation': len(self._in_use) / self.max_size,
+            })
+        return stats
+
+    def closeall(self):
+        """Closes every idle connection and refuses further checkouts."""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            self._close(conn)
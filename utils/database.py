@@ -1,145 +1,371 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import errorcodes
+from psycopg2.extras import RealDictCursor, execute_values
+import io
+import json
 import logging
 import os
+import threading
 import streamlit as st
+from contextlib import contextmanager
 from datetime import datetime
+from itertools import islice
 import re # For Bengali numeral conversion
 
+from attached_assets.data_processor import BENGALI_NUMERALS, convert_bengali_numerals_to_english, normalize_bengali_text, parse_date_of_birth
+from utils.connection_pool import ConnectionPool
+from utils.facet_index import facet_index
+from utils.migrations import ensure_schema
+from utils.metadata_cache import metadata_cache
+from utils.query_cache import QueryCache, cached_query
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Process-wide connection pool shared by every Streamlit session and rerun
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+    Returns the process-wide connection pool, creating it on first use.
+    Pool limits can be tuned with the optional DB_POOL_* secrets.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    {
+                        'dbname': st.secrets["DB_NAME"],
+                        'user': st.secrets["DB_USER"],
+                        'password': st.secrets["DB_PASSWORD"],
+                        'host': st.secrets["DB_HOST"],
+                        'port': st.secrets["DB_PORT"],
+                    },
+                    min_size=int(st.secrets.get("DB_POOL_MIN_SIZE", 1)),
+                    max_size=int(st.secrets.get("DB_POOL_MAX_SIZE", 20)),
+                    max_lifetime=float(st.secrets.get("DB_POOL_MAX_LIFETIME", 1800)),
+                    checkout_timeout=float(st.secrets.get("DB_POOL_TIMEOUT", 10)),
+                )
+    return _pool
+
+# Process-wide cache for the results of read methods (see utils/query_cache.py)
+_query_cache = None
+
+def get_query_cache():
+    """
+    Returns the process-wide query result cache, creating it on first use.
+    Its memory bound and default TTL (seconds, 0 for none) can be tuned with
+    the optional QUERY_CACHE_MAX_MB and QUERY_CACHE_TTL secrets.
+    """
+    global _query_cache
+    if _query_cache is None:
+        with _pool_lock:
+            if _query_cache is None:
+                _query_cache = QueryCache(
+                    max_bytes=int(float(st.secrets.get("QUERY_CACHE_MAX_MB", 64)) * 1024 * 1024),
+                    default_ttl=float(st.secrets.get("QUERY_CACHE_TTL", 300)) or None,
+                )
+    return _query_cache
+
+# Metadata cache namespaces that depend on each table
+TABLE_METADATA_NAMESPACES = {
+    'batches': ('batches',),
+    'events': ('events',),
+    'records': ('batch_files',),
+}
+
+DEFAULT_PHOTO_LINK = 'https://placehold.co/100x100/EEE/31343C?text=No+Image'
+
+# Columns written when inserting a record, in the order produced by record_insert_values()
+RECORD_INSERT_COLUMNS = [
+    'batch_id', 'file_name', 'ক্রমিক_নং', 'নাম', 'ভোটার_নং',
+    'পিতার_নাম', 'মাতার_নাম', 'পেশা', 'occupation_details', 'জন্ম_তারিখ', 'ঠিকানা',
+    'phone_number', 'whatsapp_number', 'facebook_link', 'tiktok_link', 'youtube_link', 'insta_link', 'photo_link', 'description',
+    'political_status', 'relationship_status', 'gender', 'birth_date'
+]
+# Columns returned by the record-listing queries. Listed explicitly rather than
+# r.* so that internal columns such as search_document are not sent to the pages.
+RECORD_COLUMNS = ['id'] + RECORD_INSERT_COLUMNS + ['created_at', 'version']
+# Age is derived from birth_date when queried (age_in_years() in migrations/0007_birth_date.sql)
+RECORD_AGE_COLUMN = "age_in_years(r.birth_date) AS age"
+RECORD_COPY_SQL = f"COPY records ({', '.join(RECORD_INSERT_COLUMNS)}) FROM STDIN"
+
+# Voter number with Bengali numerals mapped to English ones; served by the
+# expression index in migrations/0011_voter_number_index.sql
+VOTER_NUMBER_KEY = f"translate(ভোটার_নং, '{''.join(BENGALI_NUMERALS)}', '{''.join(BENGALI_NUMERALS.values())}')"
+
+def birth_date_from_text(dob_str):
+    """Parses a জন্ম_তারিখ string into the date stored in records.birth_date (None if unparsable)."""
+    birth_date = parse_date_of_birth(dob_str)
+    return birth_date.date() if birth_date else None
+
+# Columns the pages may change on an existing record, in table order
+RECORD_EDITABLE_COLUMNS = [
+    'ক্রমিক_নং', 'নাম', 'ভোটার_নং', 'পিতার_নাম', 'মাতার_নাম', 'পেশা', 'occupation_details',
+    'ঠিকানা', 'জন্ম_তারিখ', 'phone_number', 'whatsapp_number', 'facebook_link', 'tiktok_link',
+    'youtube_link', 'insta_link', 'photo_link', 'description', 'political_status',
+    'relationship_status', 'gender'
+]
+
+def normalize_record_value(column, value):
+    """Normalizes an edited value the way update_record does (text, whatsapp and photo links)."""
+    value = '' if value is None else str(value)
+    if column == 'whatsapp_number' and value and not value.startswith('https://wa.me/'):
+        value = f"https://wa.me/{value}"
+    elif column == 'photo_link' and not value.strip():
+        value = DEFAULT_PHOTO_LINK
+    return value
+
+def record_insert_values(batch_id, file_name, record_data):
+    """
+    Builds the INSERT values for a record, normalizing the whatsapp and photo
+    links. birth_date is taken from the parsed record when present, otherwise
+    parsed from জন্ম_তারিখ.
+    """
+    whatsapp_number = record_data.get('whatsapp_number')
+    if whatsapp_number and not whatsapp_number.startswith('https://wa.me/'):
+        whatsapp_number = f"https://wa.me/{whatsapp_number}"
+
+    photo_link = record_data.get('photo_link')
+    if not photo_link or not photo_link.strip():
+        photo_link = DEFAULT_PHOTO_LINK
+
+    return (
+        batch_id, file_name,
+        record_data.get('ক্রমিক_নং'), record_data.get('নাম'),
+        record_data.get('ভোটার_নং'), record_data.get('পিতার_নাম'),
+        record_data.get('মাতার_নাম'), record_data.get('পেশা'), record_data.get('occupation_details'),
+        record_data.get('জন্ম_তারিখ'), record_data.get('ঠিকানা'),
+        record_data.get('phone_number'), whatsapp_number, record_data.get('facebook_link'),
+        record_data.get('tiktok_link'), record_data.get('youtube_link'), record_data.get('insta_link'),
+        photo_link, record_data.get('description'),
+        record_data.get('political_status'),
+        record_data.get('relationship_status', 'Regular'),
+        record_data.get('gender'),
+        record_data['birth_date'] if 'birth_date' in record_data else birth_date_from_text(record_data.get('জন্ম_তারিখ'))
+    )
+
+# COPY text format: backslash, tab, newline and carriage return must be escaped; NULL is \N
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+def copy_payload(rows):
+    """Encodes rows as a COPY FROM STDIN (text format) stream."""
+    lines = []
+    for row in rows:
+        lines.append('\t'.join('\\N' if value is None else str(value).translate(_COPY_ESCAPES) for value in row))
+    lines.append('')
+    return io.StringIO('\n'.join(lines))
+
+# Errors meaning the server (or a proxy in front of it) does not accept COPY
+# FROM STDIN from this connection, as opposed to errors in the data itself
+COPY_UNSUPPORTED_ERRORS = {errorcodes.FEATURE_NOT_SUPPORTED, errorcodes.INSUFFICIENT_PRIVILEGE}
+
+def copy_unsupported(error):
+    """Whether a failed COPY should be retried with INSERTs: only when COPY itself is refused."""
+    return getattr(error, 'pgcode', None) in COPY_UNSUPPORTED_ERRORS
+
+# Each record's event names, aggregated server-side in the same query
+# instead of one get_events_for_record() round-trip per row.
+RECORD_EVENTS_COLUMN = """
+    COALESCE(
+        (SELECT array_agg(e.name ORDER BY e.name)
+         FROM record_events re
+         JOIN events e ON e.id = re.event_id
+         WHERE re.record_id = r.id),
+        '{}'
+    ) AS events"""
+
+def record_select(include_events=True):
+    """Returns the SELECT list shared by the record-listing queries (records aliased as r, batches as b)."""
+    columns = ", ".join(f"r.{column}" for column in RECORD_COLUMNS) + f", {RECORD_AGE_COLUMN}, b.name as batch_name"
+    if include_events:
+        columns += "," + RECORD_EVENTS_COLUMN
+    return f"SELECT {columns}"
+
+def search_conditions(criteria):
+    """
+    Builds the WHERE clause (and its parameters) for a field-based search:
+    'gender' is an exact match unless it is 'সব' (all), 'age_min' / 'age_max'
+    become birth_date ranges (so the birth_date index is used), and every other
+    field is a case-insensitive substring match.
+    """
+    conditions = ["1=1"]
+    params = []
+    for field, value in criteria.items():
+        if value:
+            if field == 'age_min': # At least age_min years old on the current date
+                conditions.append("birth_date <= (current_date - make_interval(years => %s))::date")
+                params.append(int(value))
+            elif field == 'age_max': # Not yet age_max + 1 years old
+                conditions.append("birth_date > (current_date - make_interval(years => %s))::date")
+                params.append(int(value) + 1)
+            # Special handling for 'gender' to allow exact match or 'সব' for all
+            elif field == 'gender' and value != 'সব':
+                conditions.append(f"{field} = %s")
+                params.append(value)
+            elif field != 'gender': # For other fields, use ILIKE
+                conditions.append(f"{field} ILIKE %s")
+                params.append(f"%{value}%")
+    return " AND ".join(conditions), params
+
+def search_query(criteria, include_events=True, limit=None, after_id=None):
+    """
+    Builds the paged query (and its parameters) search_records_advanced issues:
+    matches ordered by id, after after_id, at most limit of them.
+    """
+    conditions, params = search_conditions(criteria)
+    query = record_select(include_events) + " FROM records r JOIN batches b ON r.batch_id = b.id WHERE " + conditions
+    if after_id is not None:
+        query += " AND r.id > %s"
+        params.append(after_id)
+    query += " ORDER BY r.id"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, params
+
+# Whitespace, ASCII punctuation and the Bengali danda separate full-text query terms.
+FULLTEXT_TERM_SEPARATORS = re.compile(r"[\s!-/:-@\[-`{-~\u0964\u0965]+")
+
+def fulltext_query(text):
+    """
+    Turns free text into a to_tsquery() expression: every normalized term is
+    matched as a prefix and all terms must be present. Returns None when the
+    text contains no searchable terms.
+    """
+    terms = [term for term in FULLTEXT_TERM_SEPARATORS.split(normalize_bengali_text(text or '')) if term]
+    if not terms:
+        return None
+    return " & ".join(f"'{term}':*" for term in terms)
+
+class RecordConflictError(Exception):
+    """
+    Raised when an edit was based on a version of a record that has since been
+    changed (or deleted) by someone else. `versions` maps each conflicting
+    record id to its current version, or None if it no longer exists.
+    """
+    def __init__(self, versions):
+        self.versions = versions
+        super().__init__(f"Records changed since they were read: {sorted(versions)}")
+
 class Database:
     """
     Handles all database operations for the application, including connecting to
-    PostgreSQL, creating tables, and managing records, batches, and events.
+    PostgreSQL and managing records, batches, and events. The schema itself is
+    owned by the versioned scripts in migrations/ (see utils/migrations.py).
+
+    Connections are borrowed from the shared pool for each unit of work and
+    returned as soon as it finishes. Methods that leave a transaction open for
+    the caller (add_record, add_records_bulk) keep the connection until
+    commit_changes() or rollback_changes() is called.
+
+    Batches, events and per-batch file lists are served from the process-wide
+    metadata cache, and other read methods are cached with @cached_query. Write
+    methods report the tables they change through _tables_written(), and keep
+    the facet bitmap index (utils/facet_index.py) current after committing.
     """
     def __init__(self):
-        """Initializes the database connection using credentials from Streamlit secrets."""
+        """Attaches to the shared connection pool using credentials from Streamlit secrets."""
+        self._conn = None
+        self._in_transaction = False
+        self._pending_tables = set() # Tables to invalidate again once the caller's transaction ends
         try:
-            self.conn = psycopg2.connect(
-                dbname=st.secrets["DB_NAME"],
-                user=st.secrets["DB_USER"],
-                password=st.secrets["DB_PASSWORD"],
-                host=st.secrets["DB_HOST"],
-                port=st.secrets["DB_PORT"],
-            )
-            # Ensure auto-commit is off to manage transactions manually
-            self.conn.autocommit = False 
-            self.create_tables()
-            self.add_missing_columns() # Call method to add new columns if they don't exist
+            self.pool = get_pool()
+            self.query_cache = get_query_cache()
+            ensure_schema(self.pool) # Applies pending migrations once per process; no DDL afterwards
         except psycopg2.OperationalError as e:
             logger.error(f"Database connection failed: {e}")
             st.error("ডাটাবেস সংযোগ করতে ব্যর্থ। অনুগ্রহ করে আপনার শংসাপত্রগুলি পরীক্ষা করুন।")
             raise Exception("Failed to connect to database.")
 
-    def create_tables(self):
+    def __del__(self):
+        # Safety net: never leak a borrowed connection when the page script ends
+        try:
+            self.release()
+        except Exception:
+            pass
+
+    @property
+    def conn(self):
+        """The connection borrowed for the current unit of work, checked out on first use."""
+        if self._conn is None:
+            self._conn = self.pool.getconn()
+        return self._conn
+
+    def release(self):
+        """Returns the borrowed connection (if any) to the pool, rolling back uncommitted work."""
+        conn, self._conn = self._conn, None
+        self._in_transaction = False
+        if conn is not None:
+            self.pool.putconn(conn)
+        if self._pending_tables:
+            pending, self._pending_tables = self._pending_tables, set()
+            self._invalidate_tables(pending)
+
+    def _invalidate_tables(self, tables):
+        self.query_cache.bump(*tables)
+        namespaces = {namespace for table in tables for namespace in TABLE_METADATA_NAMESPACES.get(table, ())}
+        if namespaces:
+            metadata_cache.invalidate(*namespaces)
+
+    def _tables_written(self, *tables):
         """
-        Creates all necessary tables if they do not already exist.
-        Removed DROP TABLE statements to ensure data persistence.
+        Invalidates cached results that depend on these tables after a write.
+        Inside a caller-managed transaction they are invalidated again when it
+        ends, so that results cached by other sessions before the commit are not kept.
         """
-        with self.conn.cursor() as cur:
-            # Batches Table: Stores information about data batches.
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS batches (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) UNIQUE NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+        self._invalidate_tables(tables)
+        if self._in_transaction:
+            self._pending_tables.update(tables)
 
-            # Records Table: Stores the main data records.
-            # Added new columns for political status, social media links, etc.
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS records (
-                    id SERIAL PRIMARY KEY,
-                    batch_id INTEGER REFERENCES batches(id) ON DELETE CASCADE,
-                    file_name VARCHAR(255),
-                    ক্রমিক_নং VARCHAR(50),
-                    নাম TEXT,
-                    ভোটার_নং VARCHAR(100),
-                    পিতার_নাম TEXT,
-                    মাতার_নাম TEXT,
-                    পেশা TEXT,
-                    occupation_details TEXT,
-                    জন্ম_তারিখ VARCHAR(100),
-                    ঠিকানা TEXT,
-                    phone_number VARCHAR(50),
-                    whatsapp_number VARCHAR(100),
-                    facebook_link TEXT,
-                    tiktok_link TEXT,
-                    youtube_link TEXT,
-                    insta_link TEXT,
-                    photo_link TEXT DEFAULT 'https://placehold.co/100x100/EEE/31343C?text=No+Image',
-                    description TEXT,
-                    political_status TEXT,
-                    relationship_status VARCHAR(20) DEFAULT 'Regular',
-                    gender VARCHAR(10),
-                    age INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+    def metadata_cache_stats(self):
+        """Returns hit/miss counters for the metadata cache."""
+        return metadata_cache.stats()
 
-            # Events Table: Stores event information.
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS events (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) UNIQUE NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+    def facet_index_stats(self):
+        """Returns build/update counters and the size of the facet bitmap index."""
+        return facet_index.stats()
 
-            # Record-Events Junction Table: Manages the many-to-many relationship between records and events.
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS record_events (
-                    record_id INTEGER REFERENCES records(id) ON DELETE CASCADE,
-                    event_id INTEGER REFERENCES events(id) ON DELETE CASCADE,
-                    PRIMARY KEY (record_id, event_id)
-                )
-            """)
-            self.conn.commit()
+    def query_cache_stats(self):
+        """Returns size, hit rate and eviction counters for the query result cache."""
+        return self.query_cache.stats()
 
-    def add_missing_columns(self):
-        """
-        Adds new columns to existing tables if they do not already exist.
-        This is crucial for schema evolution without dropping data.
-        """
-        with self.conn.cursor() as cur:
-            columns_to_add = {
-                'age': 'INTEGER',
-                'political_status': 'TEXT',
-                'tiktok_link': 'TEXT',
-                'youtube_link': 'TEXT',
-                'insta_link': 'TEXT',
-                'occupation_details': 'TEXT',
-                'whatsapp_number': 'VARCHAR(100)'
-            }
-            for col, col_type in columns_to_add.items():
-                try:
-                    cur.execute(f"ALTER TABLE records ADD COLUMN IF NOT EXISTS {col} {col_type}")
-                    logger.info(f"Added '{col}' column to 'records' table (if not exists).")
-                except psycopg2.Error as e:
-                    logger.warning(f"Could not add '{col}' column: {e}")
-                    self.conn.rollback()
-            
-            # Set default for photo_link and update existing records
-            try:
-                cur.execute("ALTER TABLE records ALTER COLUMN photo_link SET DEFAULT 'https://placehold.co/100x100/EEE/31343C?text=No+Image'")
-                cur.execute("UPDATE records SET photo_link = 'https://placehold.co/100x100/EEE/31343C?text=No+Image' WHERE photo_link IS NULL OR photo_link = ''")
-                logger.info("Set default for 'photo_link' and updated existing NULL/empty records.")
-            except psycopg2.Error as e:
-                logger.warning(f"Could not set default for 'photo_link' column: {e}")
-                self.conn.rollback()
+    def clear_caches(self):
+        """Empties the query result and metadata caches of this process and marks the facet index stale."""
+        self.query_cache.clear()
+        metadata_cache.invalidate()
+        facet_index.invalidate()
 
-            self.conn.commit()
+    @contextmanager
+    def cursor(self, cursor_factory=None):
+        """
+        Yields a cursor on the borrowed connection. Unless a caller-managed
+        transaction is open, the connection goes back to the pool afterwards.
+        """
+        try:
+            with self.conn.cursor(cursor_factory=cursor_factory) as cur:
+                yield cur
+        finally:
+            if not self._in_transaction:
+                self.release()
 
+    def pool_stats(self):
+        """Returns saturation counters for the shared connection pool."""
+        return self.pool.stats()
 
+    @cached_query('records', 'batches', 'events')
     def get_dashboard_stats(self):
-        """Retrieves key statistics for the main dashboard."""
+        """
+        Retrieves key statistics for the main dashboard. Record counts come from
+        the trigger-maintained record_counts summary (migrations/0006_record_counts.sql),
+        so the cost depends on the number of groups, not the number of records.
+        """
         stats = {}
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with self.cursor(cursor_factory=RealDictCursor) as cur:
             # Total records
-            cur.execute("SELECT COUNT(*) as total_records FROM records")
+            cur.execute("SELECT COALESCE(SUM(count), 0)::bigint as total_records FROM record_counts")
             stats['total_records'] = cur.fetchone()['total_records']
 
             # Total batches
@@ -151,45 +377,68 @@ class Database:
             stats['total_events'] = cur.fetchone()['total_events']
 
             # Relationship counts
-            cur.execute("SELECT relationship_status, COUNT(*) as count FROM records GROUP BY relationship_status")
+            cur.execute("SELECT NULLIF(relationship_status, '') as relationship_status, SUM(count)::bigint as count FROM record_counts GROUP BY 1")
             relationship_counts = cur.fetchall()
             stats['relationships'] = {item['relationship_status']: item['count'] for item in relationship_counts}
 
             # Gender counts
-            cur.execute("SELECT gender, COUNT(*) as count FROM records WHERE gender IS NOT NULL AND gender != '' GROUP BY gender")
+            cur.execute("SELECT gender, SUM(count)::bigint as count FROM record_counts WHERE gender != '' GROUP BY gender")
             gender_counts = cur.fetchall()
             stats['genders'] = {item['gender']: item['count'] for item in gender_counts}
 
-            # Age distribution (optional, for dashboard or analysis page)
-            cur.execute("SELECT CASE WHEN age IS NULL THEN 'Unknown' ELSE (FLOOR(age / 10) * 10 || '-' || (FLOOR(age / 10) * 10 + 9)) END as age_group, COUNT(*) as count FROM records WHERE age IS NOT NULL GROUP BY age_group ORDER BY age_group")
+            # Age distribution, exact for today: ages come from the birth_date_counts summary
+            cur.execute("""
+                SELECT age_bucket || '-' || (age_bucket + 9) as age_group, SUM(count)::bigint as count
+                FROM (
+                    SELECT age_in_years(birth_date) / 10 * 10 as age_bucket, count
+                    FROM birth_date_counts
+                ) ages
+                WHERE age_bucket >= 0
+                GROUP BY age_bucket
+                ORDER BY age_bucket
+            """)
             age_distribution = cur.fetchall()
             stats['age_distribution'] = age_distribution
 
         return stats
 
+    @cached_query('records')
+    def get_batch_record_counts(self):
+        """Returns {batch_id: number of records} from the record_counts summary."""
+        with self.cursor() as cur:
+            cur.execute("SELECT batch_id, SUM(count)::bigint FROM record_counts GROUP BY batch_id")
+            return {batch_id: count for batch_id, count in cur.fetchall()}
+
     # --- Event Management ---
     def add_event(self, event_name):
         """Adds a new event to the database."""
-        with self.conn.cursor() as cur:
+        with self.cursor() as cur:
             cur.execute("INSERT INTO events (name) VALUES (%s) ON CONFLICT (name) DO NOTHING", (event_name,))
             self.conn.commit()
+        self._tables_written('events')
 
     def get_all_events(self):
-        """Retrieves all events from the database."""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+        """Retrieves all events (served from the metadata cache)."""
+        return metadata_cache.get(('events',), self._load_all_events)
+
+    def _load_all_events(self):
+        with self.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("SELECT * FROM events ORDER BY name")
             return cur.fetchall()
 
     def delete_event(self, event_id):
         """Deletes an event and its associations from the database."""
-        with self.conn.cursor() as cur:
+        with self.cursor() as cur:
             cur.execute("DELETE FROM record_events WHERE event_id = %s", (event_id,))
             cur.execute("DELETE FROM events WHERE id = %s", (event_id,))
             self.conn.commit()
+        self._tables_written('events', 'record_events')
+        facet_index.invalidate()
 
+    @cached_query('events', 'record_events')
     def get_events_for_record(self, record_id):
         """Retrieves all event names assigned to a specific record."""
-        with self.conn.cursor() as cur:
+        with self.cursor() as cur:
             cur.execute("""
                 SELECT e.name
                 FROM events e
@@ -201,296 +450,719 @@ class Database:
 
     def assign_events_to_record(self, record_id, event_ids):
         """Assigns a list of events to a record, replacing any existing assignments."""
-        with self.conn.cursor() as cur:
-            cur.execute("DELETE FROM record_events WHERE record_id = %s", (record_id,))
-            if event_ids:
-                args_str = ','.join(cur.mogrify("(%s,%s)", (record_id, event_id)).decode('utf-8') for event_id in event_ids)
-                cur.execute("INSERT INTO record_events (record_id, event_id) VALUES " + args_str)
+        with self.cursor() as cur:
+            self._replace_record_events(cur, record_id, event_ids)
+            self.conn.commit()
+        self._tables_written('record_events')
+        facet_index.replace_members('event', record_id, event_ids)
+
+    @staticmethod
+    def _replace_record_events(cur, record_id, event_ids):
+        """Replaces a record's event assignments within the cursor's transaction."""
+        cur.execute("DELETE FROM record_events WHERE record_id = %s", (record_id,))
+        if event_ids:
+            args_str = ','.join(cur.mogrify("(%s,%s)", (record_id, event_id)).decode('utf-8') for event_id in event_ids)
+            cur.execute("INSERT INTO record_events (record_id, event_id) VALUES " + args_str)
+
+    def _bulk_target(self, record_ids=None, criteria=None):
+        """
+        Returns the WHERE clause (records aliased as r) and parameters selecting
+        the records a bulk action applies to: a list of ids, or every record
+        matching search criteria. Criteria without any condition are refused so
+        that a bulk action never silently applies to the whole table.
+        """
+        if record_ids is not None:
+            return "r.id = ANY(%s)", [[int(record_id) for record_id in record_ids]]
+        if criteria is not None:
+            conditions, params = search_conditions(criteria)
+            if params:
+                return conditions, params
+        raise ValueError("A bulk action needs record ids or at least one search condition.")
+
+    def bulk_add_events(self, event_ids, record_ids=None, criteria=None):
+        """
+        Assigns events to every targeted record in one INSERT ... SELECT, keeping
+        existing assignments. Returns the ids of the records that gained an event.
+        """
+        conditions, params = self._bulk_target(record_ids, criteria)
+        with self.cursor() as cur:
+            cur.execute(f"""
+                INSERT INTO record_events (record_id, event_id)
+                SELECT r.id, e.id
+                FROM records r CROSS JOIN unnest(%s::integer[]) AS e(id)
+                WHERE {conditions}
+                ON CONFLICT (record_id, event_id) DO NOTHING
+                RETURNING record_id
+            """, [list(event_ids)] + params)
+            changed_ids = sorted({row[0] for row in cur.fetchall()})
             self.conn.commit()
+        self._tables_written('record_events')
+        # Every targeted record now has all of the events
+        for event_id in event_ids:
+            facet_index.add_members('event', event_id, changed_ids)
+        return changed_ids
 
-    def get_records_for_event(self, event_id):
-        """Gets all records associated with a specific event ID."""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+    def bulk_remove_events(self, event_ids, record_ids=None, criteria=None):
+        """Removes events from every targeted record in one DELETE. Returns the ids of the records that lost an event."""
+        conditions, params = self._bulk_target(record_ids, criteria)
+        with self.cursor() as cur:
+            cur.execute(f"""
+                DELETE FROM record_events re
+                USING records r
+                WHERE re.record_id = r.id AND re.event_id = ANY(%s) AND {conditions}
+                RETURNING re.record_id
+            """, [list(event_ids)] + params)
+            changed_ids = sorted({row[0] for row in cur.fetchall()})
+            self.conn.commit()
+        self._tables_written('record_events')
+        for event_id in event_ids:
+            facet_index.remove_members('event', event_id, changed_ids)
+        return changed_ids
+
+    def _bulk_set_column(self, column, value, record_ids, criteria):
+        """Sets one column on every targeted record, skipping rows that already hold the value."""
+        conditions, params = self._bulk_target(record_ids, criteria)
+        with self.cursor() as cur:
+            cur.execute(f"""
+                UPDATE records r SET {column} = %s
+                WHERE {conditions} AND r.{column} IS DISTINCT FROM %s
+                RETURNING r.id
+            """, [value] + params + [value])
+            changed_ids = sorted(row[0] for row in cur.fetchall())
+            self.conn.commit()
+        self._tables_written('records')
+        return changed_ids
+
+    def bulk_set_relationship_status(self, status, record_ids=None, criteria=None):
+        """Sets relationship_status on every targeted record in one UPDATE. Returns the ids of the records changed."""
+        changed_ids = self._bulk_set_column('relationship_status', status, record_ids, criteria)
+        facet_index.set_value('relationship', changed_ids, status)
+        return changed_ids
+
+    def bulk_set_political_status(self, political_status, record_ids=None, criteria=None):
+        """Sets political_status on every targeted record in one UPDATE. Returns the ids of the records changed."""
+        return self._bulk_set_column('political_status', political_status, record_ids, criteria)
+
+    def get_facet_index(self):
+        """Returns the process-wide facet bitmap index (utils/facet_index.py), building it if stale."""
+        facet_index.ensure(self._load_facet_groups)
+        return facet_index
+
+    def _load_facet_groups(self):
+        """Reads record ids grouped by (batch, gender, relationship status) and by event."""
+        with self.cursor() as cur:
             cur.execute("""
-                SELECT r.*, b.name as batch_name
+                SELECT batch_id, gender, relationship_status, array_agg(id)
+                FROM records
+                GROUP BY batch_id, gender, relationship_status
+            """)
+            record_groups = cur.fetchall()
+            cur.execute("SELECT event_id, array_agg(record_id) FROM record_events GROUP BY event_id")
+            event_members = cur.fetchall()
+        return record_groups, event_members
+
+    @cached_query('records', 'batches', 'events', 'record_events')
+    def get_records_by_ids(self, record_ids, include_events=True):
+        """Retrieves the given records, ordered by id (e.g. one page of a facet index match)."""
+        with self.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(record_select(include_events) + """
                 FROM records r
-                JOIN record_events re ON r.id = re.record_id
                 JOIN batches b ON r.batch_id = b.id
-                WHERE re.event_id = %s
+                WHERE r.id = ANY(%s)
+                ORDER BY r.id
+            """, ([int(record_id) for record_id in record_ids],))
+            return cur.fetchall()
+
+    @cached_query('records', 'batches', 'events', 'record_events')
+    def get_records_for_event(self, event_id, include_events=True):
+        """Gets all records associated with a specific event ID, with each record's event names."""
+        with self.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(record_select(include_events) + """
+                FROM records r
+                JOIN record_events ev ON r.id = ev.record_id
+                JOIN batches b ON r.batch_id = b.id
+                WHERE ev.event_id = %s
                 ORDER BY r.id
             """, (event_id,))
-            records = cur.fetchall()
-        # Fetch associated events for each record (though they should all include the filtered event)
-        for record in records:
-            record['events'] = self.get_events_for_record(record['id'])
-        return records
+            return cur.fetchall()
 
     # --- Record & Batch Management ---
     def add_batch(self, batch_name):
         """Adds a new batch or returns the ID of an existing one."""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with self.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(
                 "INSERT INTO batches (name) VALUES (%s) ON CONFLICT (name) DO UPDATE SET name=EXCLUDED.name RETURNING id",
                 (batch_name,)
             )
             result = cur.fetchone()
             self.conn.commit()
-            return result['id']
+        self._tables_written('batches')
+        return result['id']
 
     def add_record(self, batch_id, file_name, record_data):
         """
-        Adds a new record to the database, including calculated age.
+        Adds a new record to the database, including the parsed birth date.
         This function only executes the INSERT statement; the calling function
         is responsible for committing or rolling back the transaction.
         """
-        with self.conn.cursor() as cur:
-            whatsapp_number = record_data.get('whatsapp_number')
-            if whatsapp_number and not whatsapp_number.startswith('https://wa.me/'):
-                whatsapp_number = f"https://wa.me/{whatsapp_number}"
-            
-            photo_link = record_data.get('photo_link')
-            if not photo_link or not photo_link.strip():
-                photo_link = 'https://placehold.co/100x100/EEE/31343C?text=No+Image'
-            
-            cur.execute("""
-                INSERT INTO records (
-                    batch_id, file_name, ক্রমিক_নং, নাম, ভোটার_নং,
-                    পিতার_নাম, মাতার_নাম, পেশা, occupation_details, জন্ম_তারিখ, ঠিকানা,
-                    phone_number, whatsapp_number, facebook_link, tiktok_link, youtube_link, insta_link, photo_link, description,
-                    political_status, relationship_status, gender, age
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                batch_id, file_name,
-                record_data.get('ক্রমিক_নং'), record_data.get('নাম'),
-                record_data.get('ভোটার_নং'), record_data.get('পিতার_নাম'),
-                record_data.get('মাতার_নাম'), record_data.get('পেশা'), record_data.get('occupation_details'),
-                record_data.get('জন্ম_তারিখ'), record_data.get('ঠিকানা'),
-                record_data.get('phone_number'), whatsapp_number, record_data.get('facebook_link'),
-                record_data.get('tiktok_link'), record_data.get('youtube_link'), record_data.get('insta_link'),
-                photo_link, record_data.get('description'),
-                record_data.get('political_status'),
-                record_data.get('relationship_status', 'Regular'),
-                record_data.get('gender'),
-                record_data.get('age')
-            ))
+        self._in_transaction = True # Hold the connection until commit_changes/rollback_changes
+        with self.cursor() as cur:
+            cur.execute(
+                f"INSERT INTO records ({', '.join(RECORD_INSERT_COLUMNS)}) "
+                f"VALUES ({', '.join(['%s'] * len(RECORD_INSERT_COLUMNS))})",
+                record_insert_values(batch_id, file_name, record_data)
+            )
+        self._tables_written('records')
+
+    def add_records_bulk(self, batch_id, file_name, records, chunk_size=5000):
+        """
+        Streams many parsed records into the records table with COPY FROM STDIN,
+        chunk by chunk, applying the same normalization as add_record. If the
+        server refuses COPY itself (copy_unsupported), the remaining chunks fall
+        back to batched multi-row INSERTs; other errors fail the file. Either all records are added or none are (the
+        file's rows are rolled back to a savepoint on failure). Like
+        add_record, the caller commits or rolls back the transaction.
+        Returns the number of records inserted.
+        """
+        self._in_transaction = True # Hold the connection until commit_changes/rollback_changes
+        inserted = 0
+        use_copy = True
+        rows = (record_insert_values(batch_id, file_name, record) for record in records)
+        with self.cursor() as cur:
+            cur.execute("SAVEPOINT bulk_ingest")
+            try:
+                for chunk in iter(lambda: list(islice(rows, chunk_size)), []):
+                    if use_copy:
+                        cur.execute("SAVEPOINT bulk_copy")
+                        try:
+                            cur.copy_expert(RECORD_COPY_SQL, copy_payload(chunk))
+                            cur.execute("RELEASE SAVEPOINT bulk_copy")
+                        except psycopg2.Error as e:
+                            # Bad data would fail the INSERTs too; it rolls the file back below
+                            if not copy_unsupported(e):
+                                raise
+                            logger.warning(f"COPY into records is not supported, falling back to multi-row INSERT: {e}")
+                            cur.execute("ROLLBACK TO SAVEPOINT bulk_copy")
+                            use_copy = False
+                    if not use_copy:
+                        execute_values(
+                            cur,
+                            f"INSERT INTO records ({', '.join(RECORD_INSERT_COLUMNS)}) VALUES %s",
+                            chunk,
+                            page_size=1000
+                        )
+                    inserted += len(chunk)
+                cur.execute("RELEASE SAVEPOINT bulk_ingest")
+            except Exception:
+                cur.execute("ROLLBACK TO SAVEPOINT bulk_ingest")
+                raise
+        self._tables_written('records')
+        logger.info(f"Bulk inserted {inserted} records from '{file_name}' ({'COPY' if use_copy else 'INSERT'}).")
+        return inserted
 
     def commit_changes(self):
-        """Commits the current database transaction."""
+        """Commits the current database transaction and returns the connection to the pool."""
         try:
             self.conn.commit()
             logger.info("Database changes committed successfully.")
+            facet_index.invalidate() # New records: rebuilt on the next facet query
         except psycopg2.Error as e:
             logger.error(f"Error committing transaction: {e}")
             self.conn.rollback() # Rollback on commit failure
             raise
+        finally:
+            self.release()
 
     def rollback_changes(self):
-        """Rolls back the current database transaction."""
-        self.conn.rollback()
-        logger.warning("Database transaction rolled back.")
-
-    def update_record(self, record_id, updated_data):
-        """Updates an existing record with new data, including age if provided."""
-        with self.conn.cursor() as cur:
-            whatsapp_number = updated_data.get('whatsapp_number')
-            if whatsapp_number and not str(whatsapp_number).startswith('https://wa.me/'):
-                whatsapp_number = f"https://wa.me/{whatsapp_number}"
-            
-            photo_link = updated_data.get('photo_link')
-            if not photo_link or not photo_link.strip():
-                photo_link = 'https://placehold.co/100x100/EEE/31343C?text=No+Image'
-
-            query = """
-                UPDATE records SET
-                    ক্রমিক_নং = %s, নাম = %s, ভোটার_নং = %s, পিতার_নাম = %s,
-                    মাতার_নাম = %s, পেশা = %s, occupation_details = %s, ঠিকানা = %s, জন্ম_তারিখ = %s,
-                    phone_number = %s, whatsapp_number = %s, facebook_link = %s, tiktok_link = %s, youtube_link = %s, insta_link = %s, photo_link = %s,
-                    description = %s, political_status = %s, relationship_status = %s,
-                    gender = %s, age = %s
-                WHERE id = %s
-            """
-            values = (
-                str(updated_data.get('ক্রমিক_নং', '')), str(updated_data.get('নাম', '')),
-                str(updated_data.get('ভোটার_নং', '')), str(updated_data.get('পিতার_নাম', '')),
-                str(updated_data.get('মাতার_নাম', '')), str(updated_data.get('পেশা', '')),
-                str(updated_data.get('occupation_details', '')), str(updated_data.get('ঠিকানা', '')), str(updated_data.get('জন্ম_তারিখ', '')),
-                str(updated_data.get('phone_number', '')), whatsapp_number, str(updated_data.get('facebook_link', '')),
-                str(updated_data.get('tiktok_link', '')), str(updated_data.get('youtube_link', '')), str(updated_data.get('insta_link', '')),
-                photo_link, str(updated_data.get('description', '')),
-                str(updated_data.get('political_status', '')),
-                str(updated_data.get('relationship_status', 'Regular')),
-                str(updated_data.get('gender', '')),
-                updated_data.get('age'),
-                record_id
+        """Rolls back the current database transaction and returns the connection to the pool."""
+        try:
+            self.conn.rollback()
+            logger.warning("Database transaction rolled back.")
+        finally:
+            self.release()
+
+    def update_record(self, record_id, updated_data, expected_version=None):
+        """
+        Updates an existing record with new data; birth_date is re-parsed from জন্ম_তারিখ.
+        Every editable column is written (missing ones become empty); use
+        patch_record() to change only some of them.
+        """
+        updated_data = {column: updated_data.get(column, 'Regular' if column == 'relationship_status' else '')
+                        for column in RECORD_EDITABLE_COLUMNS}
+        return self.patch_record(record_id, updated_data, expected_version)
+
+    def patch_record(self, record_id, changes, expected_version=None, event_ids=None):
+        """
+        Updates only the given columns of a record ({column: new value}); a
+        changed জন্ম_তারিখ also updates birth_date. When expected_version is
+        given the row is written only if its version still matches, otherwise
+        RecordConflictError is raised. Returns the record's new version.
+
+        When event_ids is given the record's event assignments are replaced in
+        the same transaction, so they are checked against the same version and
+        an event-only edit also bumps it.
+        """
+        unknown = set(changes).difference(RECORD_EDITABLE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Columns cannot be edited: {sorted(unknown)}")
+        assignments = [(column, normalize_record_value(column, changes[column]))
+                       for column in RECORD_EDITABLE_COLUMNS if column in changes]
+        if 'জন্ম_তারিখ' in changes:
+            assignments.append(('birth_date', birth_date_from_text(changes['জন্ম_তারিখ'])))
+        if not assignments and event_ids is None:
+            return expected_version
+
+        # records_bump_version (migrations/0010_record_version.sql) increments version
+        # (an event-only edit sets no column, but the no-op assignment still bumps it)
+        set_clause = ', '.join(f'{column} = %s' for column, _ in assignments) or 'version = version'
+        query = f"UPDATE records SET {set_clause} WHERE id = %s"
+        params = [value for _, value in assignments] + [record_id]
+        if expected_version is not None:
+            query += " AND version = %s"
+            params.append(expected_version)
+        with self.cursor() as cur:
+            cur.execute(query + " RETURNING version", params)
+            row = cur.fetchone()
+            if row is None:
+                self.conn.rollback()
+                cur.execute("SELECT version FROM records WHERE id = %s", (record_id,))
+                current = cur.fetchone()
+                raise RecordConflictError({record_id: current[0] if current else None})
+            if event_ids is not None:
+                self._replace_record_events(cur, record_id, event_ids)
+            self.conn.commit()
+        self._tables_written('records', *(['record_events'] if event_ids is not None else []))
+        values = dict(assignments)
+        for facet, column in (('relationship', 'relationship_status'), ('gender', 'gender')):
+            if column in values:
+                facet_index.set_value(facet, [record_id], values[column])
+        if event_ids is not None:
+            facet_index.replace_members('event', record_id, event_ids)
+        return row[0]
+
+    def update_records_bulk(self, changes, expected_versions=None):
+        """
+        Applies edits to many records in one statement and one transaction.
+        `changes` maps record id -> {column: new value} and should hold only the
+        columns that actually changed; other columns are left untouched. A
+        changed জন্ম_তারিখ also updates birth_date. `expected_versions` maps
+        record id -> the version the editor read; if any of those records has
+        changed since, nothing is written and RecordConflictError is raised.
+        Returns the number of records updated.
+        """
+        changes = {int(record_id): columns for record_id, columns in changes.items() if columns}
+        if not changes:
+            return 0
+        changed_columns = {column for columns in changes.values() for column in columns}
+        unknown = changed_columns.difference(RECORD_EDITABLE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Columns cannot be edited: {sorted(unknown)}")
+        columns = [column for column in RECORD_EDITABLE_COLUMNS if column in changed_columns]
+
+        # Each VALUES row carries, per column, a flag saying whether this record changes it
+        expected_versions = {int(record_id): version for record_id, version in (expected_versions or {}).items()}
+        rows = []
+        for record_id, edits in changes.items():
+            row = [record_id, expected_versions.get(record_id)]
+            for column in columns:
+                row += [column in edits, normalize_record_value(column, edits[column]) if column in edits else None]
+            if 'জন্ম_তারিখ' in columns:
+                row += ['জন্ম_তারিখ' in edits, birth_date_from_text(edits.get('জন্ম_তারিখ'))]
+            rows.append(tuple(row))
+
+        targets = [(column, 'text') for column in columns]
+        if 'জন্ম_তারিখ' in columns:
+            targets.append(('birth_date', 'date'))
+        assignments = ", ".join(
+            f"{column} = CASE WHEN v.set_{i} THEN v.value_{i} ELSE r.{column} END"
+            for i, (column, _) in enumerate(targets)
+        )
+        aliases = ", ".join(f"set_{i}, value_{i}" for i in range(len(targets)))
+        template = "(%s::integer, %s::integer" + "".join(f", %s::boolean, %s::{sql_type}" for _, sql_type in targets) + ")"
+
+        with self.cursor() as cur:
+            updated = execute_values(
+                cur,
+                f"""
+                UPDATE records AS r SET {assignments}
+                FROM (VALUES %s) AS v(id, expected_version, {aliases})
+                WHERE r.id = v.id AND (v.expected_version IS NULL OR r.version = v.expected_version)
+                RETURNING r.id
+                """,
+                rows,
+                template=template,
+                page_size=len(rows),
+                fetch=True
             )
-            cur.execute(query, values)
+            updated_ids = {row[0] for row in updated}
+            stale_ids = [record_id for record_id in changes if record_id not in updated_ids]
+            if stale_ids:
+                # All or nothing: the operator reloads and re-applies the conflicting edits
+                self.conn.rollback()
+                cur.execute("SELECT id, version FROM records WHERE id = ANY(%s)", (stale_ids,))
+                current = dict(cur.fetchall())
+                raise RecordConflictError({record_id: current.get(record_id) for record_id in stale_ids})
             self.conn.commit()
+        self._tables_written('records')
+        for facet, column in (('relationship', 'relationship_status'), ('gender', 'gender')):
+            if column in columns:
+                by_value = {}
+                for record_id, edits in changes.items():
+                    if column in edits:
+                        by_value.setdefault(normalize_record_value(column, edits[column]), []).append(record_id)
+                for value, record_ids in by_value.items():
+                    facet_index.set_value(facet, record_ids, value)
+        return len(updated_ids)
 
-    def search_records_advanced(self, criteria):
-        """Performs an advanced search for records based on multiple criteria."""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            query = "SELECT r.*, b.name as batch_name FROM records r JOIN batches b ON r.batch_id = b.id WHERE 1=1"
-            params = []
-            for field, value in criteria.items():
-                if value:
-                    # Special handling for 'gender' to allow exact match or 'সব' for all
-                    if field == 'gender' and value != 'সব':
-                        query += f" AND {field} = %s"
-                        params.append(value)
-                    elif field != 'gender': # For other fields, use ILIKE
-                        query += f" AND {field} ILIKE %s"
-                        params.append(f"%{value}%")
-            query += " ORDER BY r.id"
-            cur.execute(query, params)
-            records = cur.fetchall()
-        for record in records:
-            record['events'] = self.get_events_for_record(record['id'])
-        return records
+    @cached_query('records', 'batches', 'events', 'record_events')
+    def search_records_advanced(self, criteria, include_events=True, limit=None, after_id=None):
+        """
+        Performs an advanced search for records based on multiple criteria.
+        Results are ordered by id; pass limit and the last id of the previous
+        page as after_id to fetch them one page at a time.
+        """
+        with self.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(*search_query(criteria, include_events, limit, after_id))
+            return cur.fetchall()
+
+    @cached_query('records')
+    def count_records_advanced(self, criteria):
+        """Returns the number of records matching the search criteria."""
+        with self.cursor() as cur:
+            conditions, params = search_conditions(criteria)
+            cur.execute("SELECT COUNT(*) FROM records r WHERE " + conditions, params)
+            return cur.fetchone()[0]
+
+    @cached_query('records', 'batches', 'events', 'record_events')
+    def search_fulltext(self, query, limit=50, offset=0, include_events=True):
+        """
+        Searches the records' text fields with one free-text query and returns
+        the matches ordered by relevance (best first).
+        """
+        tsquery = fulltext_query(query)
+        if tsquery is None:
+            return []
+        with self.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(
+                record_select(include_events) + """,
+                    ts_rank_cd(r.search_document, q.query) AS rank
+                FROM records r
+                JOIN batches b ON r.batch_id = b.id
+                CROSS JOIN to_tsquery('simple', %s) AS q(query)
+                WHERE r.search_document @@ q.query
+                ORDER BY rank DESC, r.id
+                LIMIT %s OFFSET %s
+                """,
+                (tsquery, limit, offset)
+            )
+            return cur.fetchall()
+
+    @cached_query('records')
+    def count_fulltext(self, query):
+        """Returns the number of records matching a free-text query."""
+        tsquery = fulltext_query(query)
+        if tsquery is None:
+            return 0
+        with self.cursor() as cur:
+            cur.execute(
+                "SELECT COUNT(*) FROM records WHERE search_document @@ to_tsquery('simple', %s)",
+                (tsquery,)
+            )
+            return cur.fetchone()[0]
+
+    def explain_search(self, criteria, include_events=True, limit=None, after_id=None, disable_seqscan=True):
+        """
+        Returns the EXPLAIN (FORMAT JSON) plan of the query search_records_advanced
+        issues for the same criteria, limit and after_id. With disable_seqscan the planner is steered away from
+        sequential scans, showing whether a usable index exists even on small tables.
+        """
+        query, params = search_query(criteria, include_events, limit, after_id)
+        with self.cursor() as cur:
+            if disable_seqscan:
+                cur.execute("SET LOCAL enable_seqscan = off")
+            cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+            plan = cur.fetchone()[0]
+        return json.loads(plan) if isinstance(plan, str) else plan
 
     def get_all_batches(self):
-        """Retrieves all batches from the database."""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+        """Retrieves all batches, newest first (served from the metadata cache)."""
+        return metadata_cache.get(('batches',), self._load_all_batches)
+
+    def _load_all_batches(self):
+        with self.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("SELECT * FROM batches ORDER BY created_at DESC")
             return cur.fetchall()
 
-    def get_batch_records(self, batch_id):
+    @cached_query('records', 'batches', 'events', 'record_events')
+    def get_batch_records(self, batch_id, include_events=True):
         """Retrieves all records for a specific batch."""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT r.*, b.name as batch_name
+        with self.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(record_select(include_events) + """
                 FROM records r
                 JOIN batches b ON r.batch_id = b.id
                 WHERE r.batch_id = %s
                 ORDER BY r.id
             """, (batch_id,))
-            records = cur.fetchall()
-        for record in records:
-            record['events'] = self.get_events_for_record(record['id'])
-        return records
+            return cur.fetchall()
         
     def get_batch_files(self, batch_id):
-        """Get unique files in a batch"""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+        """Get unique files in a batch (served from the metadata cache)."""
+        return metadata_cache.get(('batch_files', batch_id), lambda: self._load_batch_files(batch_id))
+
+    def _load_batch_files(self, batch_id):
+        # The record_counts summary has one row per group, so this never scans records
+        with self.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("""
-                SELECT DISTINCT file_name
-                FROM records
+                SELECT DISTINCT NULLIF(file_name, '') as file_name
+                FROM record_counts
                 WHERE batch_id = %s
-                ORDER BY file_name
+                ORDER BY 1
             """, (batch_id,))
             return cur.fetchall()
 
-    def get_file_records(self, batch_id, file_name):
+    @cached_query('records', 'batches', 'events', 'record_events')
+    def get_file_records(self, batch_id, file_name, include_events=True):
         """Get records for a specific file in a batch"""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT r.*, b.name as batch_name
+        with self.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(record_select(include_events) + """
                 FROM records r
                 JOIN batches b ON r.batch_id = b.id
                 WHERE r.batch_id = %s AND r.file_name = %s
                 ORDER BY r.id
             """, (batch_id, file_name))
-            records = cur.fetchall()
-        for record in records:
-            record['events'] = self.get_events_for_record(record['id'])
-        return records
-
-    def get_batch_occupation_stats(self, batch_id):
-        """Retrieves occupation statistics for a specific batch."""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT পেশা, COUNT(*) as count
-                FROM records
-                WHERE batch_id = %s AND পেশা IS NOT NULL AND পেশা != ''
-                GROUP BY পেশা ORDER BY count DESC
-            """, (batch_id,))
             return cur.fetchall()
 
-    def get_occupation_stats(self):
-        """Retrieves overall occupation statistics across all batches."""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT পেশা, COUNT(*) as count
-                FROM records
-                WHERE পেশা IS NOT NULL AND পেশা != ''
-                GROUP BY পেশা ORDER BY count DESC
-            """)
+    @cached_query('records', 'batches', 'events', 'record_events')
+    def get_records_page(self, batch_id, file_name=None, after_id=None, limit=100, include_events=True):
+        """
+        Retrieves one page of a batch's records (optionally a single file) using
+        keyset pagination on records.id: the next `limit` records with id > after_id.
+        """
+        query = record_select(include_events) + """
+            FROM records r
+            JOIN batches b ON r.batch_id = b.id
+            WHERE r.batch_id = %s
+        """
+        params = [batch_id]
+        if file_name:
+            query += " AND r.file_name = %s"
+            params.append(file_name)
+        if after_id is not None:
+            query += " AND r.id > %s"
+            params.append(after_id)
+        query += " ORDER BY r.id LIMIT %s"
+        params.append(limit)
+        with self.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(query, params)
             return cur.fetchall()
 
-    def get_gender_stats(self, batch_id=None):
-        """Retrieves gender statistics for a specific batch or all batches."""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            query = """
-                SELECT gender, COUNT(*) as count
-                FROM records
-                WHERE gender IS NOT NULL AND gender != ''
-            """
-            if batch_id:
-                query += " AND batch_id = %s"
-                params = (batch_id,)
-            else:
-                params = ()
-            query += " GROUP BY gender ORDER BY count DESC"
+    def find_voter_numbers(self, voter_numbers):
+        """Returns which of the given voter numbers (English numerals) belong to at least one record."""
+        with self.cursor() as cur:
+            cur.execute(f"SELECT DISTINCT {VOTER_NUMBER_KEY} FROM records WHERE {VOTER_NUMBER_KEY} = ANY(%s)",
+                        (list(voter_numbers),))
+            return {row[0] for row in cur.fetchall()}
+
+    def link_photos_by_voter_number(self, photo_links):
+        """
+        Sets photo_link on every record whose ভোটার_নং matches, in one UPDATE.
+        `photo_links` maps voter numbers (English numerals) to image URLs.
+        Returns {voter number: [ids of the records updated]}.
+        """
+        if not photo_links:
+            return {}
+        with self.cursor() as cur:
+            updated = execute_values(
+                cur,
+                f"""
+                UPDATE records AS r SET photo_link = v.photo_link
+                FROM (VALUES %s) AS v(voter_no, photo_link)
+                WHERE {VOTER_NUMBER_KEY} = v.voter_no
+                RETURNING v.voter_no, r.id
+                """,
+                list(photo_links.items()),
+                page_size=len(photo_links),
+                fetch=True
+            )
+            self.conn.commit()
+        self._tables_written('records')
+        linked = {}
+        for voter_no, record_id in updated:
+            linked.setdefault(voter_no, []).append(record_id)
+        return linked
+
+    @cached_query('records')
+    def find_record_id_by_serial(self, batch_id, serial_number, file_name=None):
+        """
+        Returns the id of the first record in a batch (optionally a single file)
+        whose ক্রমিক_নং matches, comparing Bengali and English numerals alike.
+        """
+        query = f"""
+            SELECT id FROM records
+            WHERE batch_id = %s
+              AND translate(ক্রমিক_নং, '{''.join(BENGALI_NUMERALS)}', '{''.join(BENGALI_NUMERALS.values())}') = %s
+        """
+        params = [batch_id, convert_bengali_numerals_to_english(str(serial_number).strip())]
+        if file_name:
+            query += " AND file_name = %s"
+            params.append(file_name)
+        query += " ORDER BY id LIMIT 1"
+        with self.cursor() as cur:
             cur.execute(query, params)
-            return cur.fetchall()
+            row = cur.fetchone()
+            return row[0] if row else None
+
+    @cached_query('records')
+    def count_records(self, batch_id, file_name=None):
+        """
+        Returns the exact number of records in a batch (optionally a single
+        file) from the record_counts summary, so no records are scanned.
+        """
+        query = "SELECT COALESCE(SUM(count), 0)::bigint FROM record_counts WHERE batch_id = %s"
+        params = [batch_id]
+        if file_name:
+            query += " AND file_name = %s"
+            params.append(file_name)
+        with self.cursor() as cur:
+            cur.execute(query, params)
+            return cur.fetchone()[0]
+
+    @cached_query('records', 'batches')
+    def get_analysis_stats(self, batch_id=None):
+        """
+        Returns every count the Analysis page shows, for one batch or all of
+        them: the total, per-batch counts and the gender, occupation, age-group
+        and relationship breakdowns. Everything is read from the trigger-maintained
+        summaries (record_counts, birth_date_counts, occupation_counts), so the
+        cost depends on the number of groups, not the number of records.
+        """
+        batch_filter, params = (" WHERE batch_id = %s", (batch_id,)) if batch_id else ("", ())
+        with self.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(
+                "SELECT batch_id, NULLIF(gender, '') AS gender, NULLIF(relationship_status, '') AS relationship_status, "
+                "SUM(count)::bigint AS count FROM record_counts" + batch_filter + " GROUP BY 1, 2, 3",
+                params
+            )
+            groups = cur.fetchall()
+            cur.execute(
+                "SELECT occupation, SUM(count)::bigint AS count FROM occupation_counts" + batch_filter + " GROUP BY 1",
+                params
+            )
+            occupations = cur.fetchall()
+            # Exact for today: ages are computed from the stored birth dates.
+            # Birth dates in the future are left out, as on the dashboard.
+            cur.execute(
+                "SELECT age_bucket, SUM(count)::bigint AS count FROM ("
+                "SELECT age_in_years(birth_date) / 10 * 10 AS age_bucket, count "
+                "FROM birth_date_counts" + batch_filter +
+                ") ages WHERE age_bucket >= 0 GROUP BY 1",
+                params
+            )
+            age_buckets = cur.fetchall()
+
+        batch_names = {batch['id']: batch['name'] for batch in self.get_all_batches()}
+        batches, genders, relationships = {}, {}, {}
+        for group in groups:
+            batches[group['batch_id']] = batches.get(group['batch_id'], 0) + group['count']
+            if group['gender'] is not None:
+                genders[group['gender']] = genders.get(group['gender'], 0) + group['count']
+            relationships[group['relationship_status']] = relationships.get(group['relationship_status'], 0) + group['count']
+
+        stats = {
+            'total': sum(batches.values()),
+            'batches': [
+                {'batch_id': batch, 'batch_name': batch_names.get(batch), 'count': count}
+                for batch, count in batches.items()
+            ],
+            'genders': [{'gender': gender, 'count': count} for gender, count in genders.items()],
+            'occupations': [{'পেশা': row['occupation'], 'count': row['count']} for row in occupations],
+            'age_distribution': [
+                {'age_group': f"{row['age_bucket']}-{row['age_bucket'] + 9}", 'age_bucket': row['age_bucket'], 'count': row['count']}
+                for row in age_buckets
+            ],
+            'relationships': relationships,
+        }
+
+        stats['batches'].sort(key=lambda item: item['count'], reverse=True)
+        stats['genders'].sort(key=lambda item: item['count'], reverse=True)
+        stats['occupations'].sort(key=lambda item: item['count'], reverse=True)
+        stats['age_distribution'].sort(key=lambda item: item['age_bucket'])
+        return stats
 
     def update_relationship_status(self, record_id: int, status: str):
         """Updates the relationship status for a specific record."""
-        with self.conn.cursor() as cur:
+        with self.cursor() as cur:
             cur.execute("UPDATE records SET relationship_status = %s WHERE id = %s", (status, record_id))
             self.conn.commit()
+        self._tables_written('records')
+        facet_index.set_value('relationship', [record_id], status)
 
-    def get_relationship_records(self, status: str):
-        """Retrieves all records with a specific relationship status, including their events."""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT r.*, b.name as batch_name
-                FROM records r
-                JOIN batches b ON r.batch_id = b.id
-                WHERE r.relationship_status = %s
-                ORDER BY r.created_at DESC
-            """, (status,))
-            records = cur.fetchall()
-        for record in records:
-            record['events'] = self.get_events_for_record(record['id'])
-        return records
+    @cached_query('records', 'batches', 'events', 'record_events')
+    def get_relationship_records(self, status: str, batch_id=None, limit=None, offset=0, include_events=True):
+        """
+        Retrieves records with a specific relationship status, newest first,
+        including their events. batch_id restricts them to one batch; limit and
+        offset select one page.
+        """
+        query = record_select(include_events) + """
+            FROM records r
+            JOIN batches b ON r.batch_id = b.id
+            WHERE r.relationship_status = %s
+        """
+        params = [status]
+        if batch_id is not None:
+            query += " AND r.batch_id = %s"
+            params.append(batch_id)
+        query += " ORDER BY r.created_at DESC, r.id DESC"
+        if limit is not None:
+            query += " LIMIT %s OFFSET %s"
+            params += [limit, offset]
+        with self.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(query, params)
+            return cur.fetchall()
+
+    @cached_query('records')
+    def count_relationship_records(self, status: str, batch_id=None):
+        """Returns the number of records with a relationship status (optionally in one batch) from the record_counts summary."""
+        query = "SELECT COALESCE(SUM(count), 0)::bigint FROM record_counts WHERE relationship_status = %s"
+        params = [status]
+        if batch_id is not None:
+            query += " AND batch_id = %s"
+            params.append(batch_id)
+        with self.cursor() as cur:
+            cur.execute(query, params)
+            return cur.fetchone()[0]
 
     def get_batch_by_name(self, batch_name):
         """Retrieves batch information by its name."""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("SELECT * FROM batches WHERE name = %s", (batch_name,))
-            return cur.fetchone()
+        return next((batch for batch in self.get_all_batches() if batch['name'] == batch_name), None)
 
     def get_batch_by_id(self, batch_id):
         """Retrieves batch information by its ID."""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("SELECT * FROM batches WHERE id = %s", (batch_id,))
-            return cur.fetchone()
+        return next((batch for batch in self.get_all_batches() if batch['id'] == batch_id), None)
 
     def delete_batch(self, batch_id: int):
         """Deletes a batch and all its associated records."""
-        with self.conn.cursor() as cur:
+        with self.cursor() as cur:
             cur.execute("DELETE FROM records WHERE batch_id = %s", (batch_id,))
             cur.execute("DELETE FROM batches WHERE id = %s", (batch_id,))
             self.conn.commit()
+        self._tables_written('records', 'batches', 'record_events')
+        facet_index.invalidate()
+
+    def clear_all_data(self):
+        """Deletes every record, batch and event (record_events go with them via CASCADE)."""
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM records")
+            cur.execute("DELETE FROM batches")
+            cur.execute("DELETE FROM events")
+            self.conn.commit()
+        self._tables_written('records', 'batches', 'events', 'record_events')
+        facet_index.invalidate()
 
+    @cached_query('records')
     def get_total_records_count(self):
-        """Retrieves the total number of records in the database."""
-        with self.conn.cursor() as cur:
-            cur.execute("SELECT COUNT(*) FROM records")
+        """Retrieves the total number of records in the database from the record_counts summary."""
+        with self.cursor() as cur:
+            cur.execute("SELECT COALESCE(SUM(count), 0)::bigint FROM record_counts")
             return cur.fetchone()[0]
-
-    def get_all_records_with_dob(self):
-        """Retrieves all records that have a 'জন্ম_তারিখ' (date of birth)."""
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT id, জন্ম_তারিখ
-                FROM records
-                WHERE জন্ম_তারিখ IS NOT NULL AND জন্ম_তারিখ != ''
-            """)
-            return cur.fetchall()
-
-    def update_record_age(self, record_id: int, age: int):
-        """Updates the 'age' column for a specific record."""
-        with self.conn.cursor() as cur:
-            cur.execute("UPDATE records SET age = %s WHERE id = %s", (age, record_id))
-            # No commit here, as it will be part of a larger transaction in the age management page
@@ -0,0 +1,265 @@
+import logging
+import threading
+import time
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Facets kept in the index. Every record has exactly one value of the
+# single-valued facets; 'event' is multi-valued (record_events).
+SINGLE_VALUED_FACETS = ('batch', 'gender', 'relationship')
+FACETS = SINGLE_VALUED_FACETS + ('event',)
+
+
+def bitset_from_ids(record_ids):
+    """Builds a bitset (bit n set for record id n) from an iterable of ids."""
+    record_ids = list(record_ids)
+    if not record_ids:
+        return 0
+    # Setting bits in a bytearray and converting once is linear; OR-ing
+    # 1 << id into a growing int would copy the whole int for every id.
+    bits = bytearray(max(record_ids) // 8 + 1)
+    for record_id in record_ids:
+        bits[record_id >> 3] |= 1 << (record_id & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def ids_from_bitset(bitset, after_id=None, limit=None):
+    """Returns the ids in a bitset in ascending order, starting after after_id, at most limit of them."""
+    start = 0 if after_id is None else after_id + 1
+    bitset >>= start
+    record_ids = []
+    while bitset and (limit is None or len(record_ids) < limit):
+        lowest = bitset & -bitset
+        offset = lowest.bit_length() - 1
+        record_ids.append(start + offset)
+        bitset >>= offset + 1
+        start += offset + 1
+    return record_ids
+
+
+class FacetIndex:
+    """
+    A per-process bitmap index over the record facets the filter pages combine:
+    batch, gender, relationship status and events.
+
+    Each facet value maps to a bitset of record ids held in a Python int, so
+    AND / OR / NOT of any combination are single big-integer operations and
+    counts are popcounts. Record ids are a dense serial, so a bitset costs
+    about max(id) / 8 bytes.
+
+    The index is built from the database on first use and kept current by the
+    Database write methods, which apply their changes after committing. Writes
+    that cannot be applied exactly (uploads, deletions) mark it stale, and it
+    is rebuilt on the next read. max_age bounds staleness from writes made by
+    other processes.
+
+    Filter expressions are facet keys such as ('event', 3) or ('gender', 'Female'),
+    combined with ('and', expr, ...), ('or', expr, ...) and ('not', expr).
+    """
+    def __init__(self, max_age=300, max_build_attempts=3):
+        self.max_age = max_age
+        self.max_build_attempts = max_build_attempts
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()  # One load at a time; concurrent readers wait for it
+        self._bitsets = None  # {facet: {value: bitset}}; None until the first build
+        self._all = 0
+        self._loaded_at = None
+        self._stale = True
+        self._invalidations = 0  # bumped by invalidate(), so a build racing one is loaded again
+        self._recorders = []  # Delta lists of the builds in progress, replayed onto their result
+        self._counters = {'builds': 0, 'updates': 0, 'invalidations': 0, 'replayed': 0}
+
+    # --- Building ---
+
+    def ensure(self, loader):
+        """
+        Builds the index with loader() if it is stale or older than max_age.
+        When it returns the index is built, so queries never find it missing.
+
+        Updates committed while loading are recorded and replayed onto the
+        new bitsets; every update sets a final state, so replaying one the
+        load already saw is harmless. If invalidate() races the load, it is
+        loaded again, up to max_build_attempts times; after that the last
+        load is installed but stays stale, so the next read rebuilds it.
+
+        Only one thread loads at a time. Readers that found the index stale
+        wait for that load and then use it instead of starting their own.
+        """
+        with self._lock:
+            if not self._is_stale():
+                return
+
+        with self._build_lock:
+            with self._lock:
+                if not self._is_stale():
+                    return
+            self._load(loader)
+
+    def _load(self, loader):
+        """Runs loader() and installs the result; the caller holds _build_lock."""
+        for attempt in range(1, self.max_build_attempts + 1):
+            with self._lock:
+                invalidations = self._invalidations
+                deltas = []
+                self._recorders.append(deltas)
+            try:
+                started = time.perf_counter()
+                bitsets, all_ids = self._build(*loader())
+            except BaseException:
+                with self._lock:
+                    self._recorders.remove(deltas)
+                raise
+
+            with self._lock:
+                self._recorders.remove(deltas)
+                raced = invalidations != self._invalidations
+                if raced and attempt < self.max_build_attempts:
+                    continue
+                for apply in deltas:
+                    apply(bitsets)
+                self._bitsets = bitsets
+                self._all = bitset_from_ids(all_ids)
+                self._loaded_at = time.monotonic()
+                self._stale = raced
+                self._counters['builds'] += 1
+                self._counters['replayed'] += len(deltas)
+            logger.info(f"Facet index built for {len(all_ids)} records in {time.perf_counter() - started:.2f}s")
+            return
+
+    def _is_stale(self):
+        """Whether the next read must rebuild; the caller holds the lock."""
+        return (
+            self._bitsets is None or self._stale
+            or bool(self.max_age) and time.monotonic() - self._loaded_at >= self.max_age
+        )
+
+    @staticmethod
+    def _build(record_groups, event_members):
+        """Turns the loader's rows into {facet: {value: bitset}} and the list of all record ids."""
+        bitsets = {facet: {} for facet in FACETS}
+        all_ids = []
+        batch_ids, gender_ids, relationship_ids = {}, {}, {}
+        for batch_id, gender, relationship_status, record_ids in record_groups:
+            batch_ids.setdefault(batch_id, []).extend(record_ids)
+            gender_ids.setdefault(gender or '', []).extend(record_ids)
+            relationship_ids.setdefault(relationship_status or '', []).extend(record_ids)
+            all_ids.extend(record_ids)
+        for facet, groups in (('batch', batch_ids), ('gender', gender_ids), ('relationship', relationship_ids)):
+            bitsets[facet] = {value: bitset_from_ids(record_ids) for value, record_ids in groups.items()}
+        bitsets['event'] = {event_id: bitset_from_ids(record_ids) for event_id, record_ids in event_members}
+        return bitsets, all_ids
+
+    def invalidate(self):
+        """Marks the index stale; the current bitsets keep serving reads until the next read rebuilds them."""
+        with self._lock:
+            self._stale = True
+            self._invalidations += 1
+            self._counters['invalidations'] += 1
+
+    # --- Incremental updates (applied after the write has committed) ---
+
+    def _update(self, apply):
+        with self._lock:
+            for deltas in self._recorders:
+                deltas.append(apply)
+            if self._bitsets is not None:
+                apply(self._bitsets)
+                self._counters['updates'] += 1
+
+    def set_value(self, facet, record_ids, value):
+        """Moves existing records to a new value of a single-valued facet."""
+        mask = bitset_from_ids(record_ids)
+        if not mask:
+            return
+
+        def apply(bitsets):
+            values = bitsets[facet]
+            for key in values:
+                values[key] &= ~mask
+            values[value] = values.get(value, 0) | mask
+        self._update(apply)
+
+    def add_members(self, facet, value, record_ids):
+        """Adds records to one value of a multi-valued facet."""
+        mask = bitset_from_ids(record_ids)
+        if mask:
+            self._update(lambda bitsets: bitsets[facet].__setitem__(value, bitsets[facet].get(value, 0) | mask))
+
+    def remove_members(self, facet, value, record_ids):
+        """Removes records from one value of a multi-valued facet."""
+        mask = bitset_from_ids(record_ids)
+        if mask:
+            self._update(lambda bitsets: bitsets[facet].__setitem__(value, bitsets[facet].get(value, 0) & ~mask))
+
+    def replace_members(self, facet, record_id, values):
+        """Sets the exact values of a multi-valued facet for one record."""
+        bit = 1 << record_id
+        values = set(values)
+
+        def apply(bitsets):
+            facet_bitsets = bitsets[facet]
+            for key in facet_bitsets:
+                facet_bitsets[key] &= ~bit
+            for value in values:
+                facet_bitsets[value] = facet_bitsets.get(value, 0) | bit
+        self._update(apply)
+
+    # --- Queries ---
+
+    def _evaluate(self, expression):
+        """Evaluates an expression to a bitset; the caller holds the lock."""
+        operator = expression[0]
+        if operator == 'and':
+            result = self._all
+            for operand in expression[1:]:
+                result &= self._evaluate(operand)
+            return result
+        if operator == 'or':
+            result = 0
+            for operand in expression[1:]:
+                result |= self._evaluate(operand)
+            return result
+        if operator == 'not':
+            return self._all & ~self._evaluate(expression[1])
+        facet, value = expression
+        return self._bitsets[facet].get(value, 0)
+
+    def _require_loaded(self):
+        if self._bitsets is None:
+            raise RuntimeError("Facet index is not built; call ensure() first.")
+
+    def match(self, expression):
+        """Returns the bitset of records matching the expression (None matches every record)."""
+        with self._lock:
+            self._require_loaded()
+            return self._all if expression is None else self._evaluate(expression)
+
+    def count(self, expression):
+        """Returns the number of records matching the expression."""
+        return self.match(expression).bit_count()
+
+    def facet_counts(self, facet, expression=None):
+        """Returns {value: number of records with that value that also match the expression}."""
+        with self._lock:
+            self._require_loaded()
+            base = self._all if expression is None else self._evaluate(expression)
+            return {value: (bitset & base).bit_count() for value, bitset in self._bitsets[facet].items()}
+
+    def stats(self):
+        """Returns build/update counters and the memory held by the bitsets."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['loaded'] = self._bitsets is not None
+            stats['stale'] = self._bitsets is not None and self._stale
+            stats['records'] = self._all.bit_count()
+            stats['bitsets'] = sum(len(values) for values in (self._bitsets or {}).values())
+            stats['bytes'] = sum(
+                (bitset.bit_length() + 7) // 8 for values in (self._bitsets or {}).values() for bitset in values.values()
+            )
+            stats['age'] = time.monotonic() - self._loaded_at if self._bitsets is not None else None
+        return stats
+
+
+# Shared by every Database instance in the server process
+facet_index = FacetIndex()
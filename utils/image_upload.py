@@ -0,0 +1,129 @@
+import base64
+import io
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from PIL import Image, ImageOps
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+IMGBB_UPLOAD_URL = "https://api.imgbb.com/1/upload"
+
+# Defaults for re-encoding phone photos before upload
+DEFAULT_MAX_DIMENSION = 1600
+DEFAULT_QUALITY = 80
+
+
+class UploadError(Exception):
+    """Raised when an image could not be uploaded; retryable is False for errors another attempt cannot fix."""
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def compress_image(data, max_dimension=DEFAULT_MAX_DIMENSION, quality=DEFAULT_QUALITY):
+    """
+    Shrinks an image so neither side exceeds max_dimension and re-encodes it
+    as JPEG at the given quality, applying the EXIF orientation first. The
+    original bytes are kept when re-encoding would not make them smaller.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        oversized = max(image.size) > max_dimension
+        if oversized:
+            image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # JPEG has no alpha channel: flatten transparent areas onto white
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        output = io.BytesIO()
+        image.save(output, format='JPEG', quality=quality, optimize=True, progressive=True)
+    compressed = output.getvalue()
+    if not oversized and len(compressed) >= len(data):
+        return data
+    return compressed
+
+
+class ImgBBUploader:
+    """
+    Uploads images to ImgBB, or to any server speaking the same API at
+    upload_url (e.g. a local stand-in for testing), and returns their links.
+    """
+    def __init__(self, api_key, upload_url=IMGBB_UPLOAD_URL, timeout=60):
+        self.api_key = api_key
+        self.upload_url = upload_url
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def upload(self, name, data):
+        """Uploads one image and returns its URL."""
+        try:
+            response = self._session.post(
+                self.upload_url,
+                data={
+                    "key": self.api_key,
+                    "image": base64.b64encode(data).decode("utf-8"),
+                    "name": name,
+                },
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            raise UploadError(f"Upload request failed: {e}")
+        if response.status_code == 429 or response.status_code >= 500:
+            raise UploadError(f"Upload server returned {response.status_code}")
+        if response.status_code != 200:
+            raise UploadError(f"Upload rejected with {response.status_code}: {response.text[:200]}", retryable=False)
+        try:
+            return response.json()["data"]["url"]
+        except (ValueError, KeyError, TypeError):
+            raise UploadError("Upload response did not contain an image URL", retryable=False)
+
+
+def upload_with_retries(uploader, name, data, retries=3, backoff=1.0):
+    """Uploads with up to `retries` further attempts on retryable errors, backing off exponentially with jitter."""
+    for attempt in range(retries + 1):
+        try:
+            return uploader.upload(name, data)
+        except UploadError as e:
+            if not e.retryable or attempt == retries:
+                raise
+            delay = backoff * 2 ** attempt * (0.5 + random.random())
+            logger.warning(f"Upload of '{name}' failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def upload_images(files, uploader, max_workers=4, retries=3, backoff=1.0,
+                  max_dimension=DEFAULT_MAX_DIMENSION, quality=DEFAULT_QUALITY, progress=None):
+    """
+    Compresses and uploads (name, bytes) pairs on at most max_workers threads.
+    progress(done, total) is called from the calling thread as uploads finish.
+    Returns one result dictionary per file, in input order, with the link or
+    the error.
+    """
+    def process(name, data):
+        result = {'file_name': name, 'url': None, 'original_size': len(data), 'uploaded_size': None, 'error': None}
+        try:
+            compressed = compress_image(data, max_dimension, quality)
+            result['uploaded_size'] = len(compressed)
+            result['url'] = upload_with_retries(uploader, name, compressed, retries, backoff)
+        except Exception as e: # One bad file (unreadable, decompression bomb, odd mode, failed upload) must not abort the batch
+            logger.error(f"Could not upload '{name}': {e}")
+            result['error'] = str(e)
+        return result
+
+    results = [None] * len(files)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(process, name, data): position for position, (name, data) in enumerate(files)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if progress:
+                progress(done, len(files))
+    return results
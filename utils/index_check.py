@@ -0,0 +1,101 @@
+import logging
+import sys
+
+from utils.search_paging import SEARCH_PAGE_SIZE
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Index that should serve each search criterion (see migrations/0003_search_indexes.sql
+# and migrations/0009_birth_date_index.sql).
+SEARCH_INDEXES = {
+    'নাম': 'idx_records_name_trgm',
+    'পিতার_নাম': 'idx_records_father_name_trgm',
+    'মাতার_নাম': 'idx_records_mother_name_trgm',
+    'ঠিকানা': 'idx_records_address_trgm',
+    'phone_number': 'idx_records_phone_trgm',
+    'ভোটার_নং': 'idx_records_voter_no_trgm',
+    'ক্রমিক_নং': 'idx_records_serial_no_trgm',
+    'পেশা': 'idx_records_occupation_trgm',
+    'জন্ম_তারিখ': 'idx_records_dob_trgm',
+    'gender': 'idx_records_gender',
+    'age_min': 'idx_records_birth_date',
+    'age_max': 'idx_records_birth_date',
+}
+
+# Criteria shapes issued by the Search (02) and Editable Search (10) pages.
+# Sample values are at least three characters so trigrams can be extracted.
+SEARCH_SHAPES = [
+    {'নাম': 'মোহাম্মদ'},
+    {'পিতার_নাম': 'আব্দুল'},
+    {'মাতার_নাম': 'বেগম'},
+    {'ঠিকানা': 'ঢাকা'},
+    {'phone_number': '01711'},
+    {'ভোটার_নং': '১২৩৪'},
+    {'ক্রমিক_নং': '০০১'},
+    {'পেশা': 'কৃষক'},
+    {'জন্ম_তারিখ': '১৯৮০'},
+    {'gender': 'male'},
+    {'নাম': 'মোহাম্মদ', 'gender': 'male'},
+    {'নাম': 'মোহাম্মদ', 'পিতার_নাম': 'আব্দুল'},
+    {'ঠিকানা': 'ঢাকা', 'gender': 'female'},
+    {'ভোটার_নং': '১২৩৪', 'phone_number': '01711'},
+    {'age_min': 30, 'age_max': 40},
+    {'age_min': 60, 'gender': 'female'},
+]
+
+
+def _walk_plan(node):
+    """Yields every node of an EXPLAIN (FORMAT JSON) plan tree."""
+    yield node
+    for child in node.get('Plans', []):
+        yield from _walk_plan(child)
+
+
+def plan_summary(plan):
+    """Returns (index names used, relations read by sequential scan) for a plan."""
+    root = plan[0]['Plan']
+    indexes, seq_scans = set(), set()
+    for node in _walk_plan(root):
+        if 'Index Name' in node:
+            indexes.add(node['Index Name'])
+        if node.get('Node Type') == 'Seq Scan':
+            seq_scans.add(node.get('Relation Name'))
+    return indexes, seq_scans
+
+
+def verify_search_indexes(db, shapes=SEARCH_SHAPES, page_size=SEARCH_PAGE_SIZE):
+    """
+    Runs EXPLAIN for every search shape, paged as the search pages fetch it
+    (ORDER BY id LIMIT page_size), and checks that the planner reaches records
+    through one of the managed indexes for the searched columns rather than a
+    sequential scan. Returns a list of result dictionaries.
+    """
+    results = []
+    for criteria in shapes:
+        expected = {SEARCH_INDEXES[field] for field, value in criteria.items() if value and field in SEARCH_INDEXES}
+        indexes, seq_scans = plan_summary(db.explain_search(criteria, limit=page_size))
+        ok = bool(expected & indexes) and 'records' not in seq_scans
+        results.append({
+            'criteria': criteria,
+            'expected': sorted(expected),
+            'used': sorted(indexes),
+            'seq_scans': sorted(seq_scans),
+            'ok': ok,
+        })
+        if not ok:
+            logger.warning(f"Search shape {sorted(criteria)} does not use its index: used={sorted(indexes)}")
+    return results
+
+
+if __name__ == "__main__":
+    # Deploy-time check: python -m utils.index_check
+    logging.basicConfig(level=logging.INFO)
+    from utils.database import Database
+    db = Database()
+    results = verify_search_indexes(db)
+    for result in results:
+        status = "OK  " if result['ok'] else "FAIL"
+        print(f"{status} {', '.join(result['criteria'])}: used {result['used'] or 'no index'}")
+    db.release()
+    sys.exit(0 if all(result['ok'] for result in results) else 1)
@@ -0,0 +1,69 @@
+import logging
+import threading
+import time
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class MetadataCache:
+    """
+    A per-process cache for the small lookup lists every page reads on each
+    rerun: batches, events and the file names of a batch.
+
+    Entries are keyed by tuples whose first element is a namespace
+    ('batches', 'events', 'batch_files'). Database write methods invalidate
+    the namespaces they touch, so readers never see data older than the last
+    write made through this process. max_age bounds staleness from writes
+    made by other processes.
+    """
+    NAMESPACES = ('batches', 'events', 'batch_files')
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> (rows, loaded_at)
+        self._generation = 0  # bumped on every invalidation, so a load racing a write is not stored
+        self._counters = {'hits': 0, 'misses': 0, 'invalidations': 0, 'expirations': 0}
+
+    def get(self, key, loader):
+        """Returns the cached rows for key, calling loader() to fetch them on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.max_age and time.monotonic() - entry[1] >= self.max_age:
+                del self._entries[key]
+                self._counters['expirations'] += 1
+                entry = None
+            if entry is not None:
+                self._counters['hits'] += 1
+                return [dict(row) for row in entry[0]]
+            self._counters['misses'] += 1
+            generation = self._generation
+
+        rows = [dict(row) for row in loader()]
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (rows, time.monotonic())
+        return [dict(row) for row in rows]
+
+    def invalidate(self, *namespaces):
+        """Drops every entry in the given namespaces (all of them when none are given)."""
+        namespaces = namespaces or self.NAMESPACES
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in namespaces]:
+                del self._entries[key]
+            self._generation += 1
+            self._counters['invalidations'] += 1
+
+    def stats(self):
+        """Returns hit/miss counters and the number of cached entries."""
+        with self._lock:
+            stats = dict(self._counters)
+            lookups = stats['hits'] + stats['misses']
+            stats['entries'] = len(self._entries)
+            stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+# Shared by every Database instance in the server process
+metadata_cache = MetadataCache()
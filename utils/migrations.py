@@ -0,0 +1,168 @@
+import importlib.util
+import logging
+import os
+import re
+import threading
+from collections import namedtuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Migration scripts live in <repo>/migrations and are applied in version order.
+# File names follow NNNN_description.sql or NNNN_description.py.
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d+)_(\w+)\.(sql|py)$')
+
+# A .sql migration whose first line is this directive runs outside a transaction,
+# one statement at a time. Needed for CREATE INDEX CONCURRENTLY. Such statements
+# should be idempotent (IF NOT EXISTS), as a failed run is retried from the top.
+NO_TRANSACTION_DIRECTIVE = '-- migrate:no-transaction'
+
+# Arbitrary key for pg_advisory_lock so concurrent app processes apply migrations only once
+MIGRATION_LOCK_KEY = 748215
+
+Migration = namedtuple('Migration', ['version', 'name', 'path', 'kind'])
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """Returns all migration scripts in the directory, ordered by version."""
+    migrations = []
+    for file_name in os.listdir(directory):
+        match = MIGRATION_FILE_PATTERN.match(file_name)
+        if match:
+            version, name, kind = match.groups()
+            migrations.append(Migration(int(version), name, os.path.join(directory, file_name), kind))
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise Exception(f"Duplicate migration versions found in {directory}")
+    return migrations
+
+
+def split_sql_statements(sql):
+    """
+    Splits a no-transaction migration into individual statements.
+    Only plain statements are supported (no dollar-quoted function bodies).
+    """
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+
+def _load_python_migration(migration):
+    spec = importlib.util.spec_from_file_location(f"migration_{migration.version:04d}", migration.path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _record_applied(cur, migration):
+    cur.execute(
+        "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+        (migration.version, migration.name)
+    )
+
+
+def _apply_migration(conn, migration):
+    """Applies a single migration and records it in schema_migrations."""
+    if migration.kind == 'py':
+        module = _load_python_migration(migration)
+        transactional = getattr(module, 'TRANSACTIONAL', True)
+        conn.autocommit = not transactional
+        try:
+            module.migrate(conn)
+            with conn.cursor() as cur:
+                _record_applied(cur, migration)
+            if transactional:
+                conn.commit()
+        finally:
+            conn.autocommit = False
+        return
+
+    with open(migration.path, encoding='utf-8') as f:
+        sql = f.read()
+
+    if sql.lstrip().startswith(NO_TRANSACTION_DIRECTIVE):
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                for statement in split_sql_statements(sql):
+                    cur.execute(statement)
+                _record_applied(cur, migration)
+        finally:
+            conn.autocommit = False
+    else:
+        with conn.cursor() as cur:
+            cur.execute(sql)
+            _record_applied(cur, migration)
+        conn.commit()
+
+
+def apply_migrations(conn, directory=MIGRATIONS_DIR):
+    """
+    Applies every pending migration in version order and returns the list of
+    versions applied. Holds an advisory lock so that only one process migrates
+    at a time; the others wait and then find nothing left to do.
+    """
+    applied_now = []
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name VARCHAR(255) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cur.execute("SELECT version FROM schema_migrations")
+            applied = {row[0] for row in cur.fetchall()}
+        conn.autocommit = False
+
+        for migration in discover_migrations(directory):
+            if migration.version in applied:
+                continue
+            logger.info(f"Applying migration {migration.version:04d}_{migration.name}")
+            try:
+                _apply_migration(conn, migration)
+            except Exception as e:
+                logger.error(f"Migration {migration.version:04d}_{migration.name} failed: {e}")
+                if not conn.closed and not conn.autocommit:
+                    conn.rollback()
+                raise
+            applied_now.append(migration.version)
+    finally:
+        if not conn.closed:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+            conn.autocommit = False
+
+    if applied_now:
+        logger.info(f"Applied migrations: {applied_now}")
+    return applied_now
+
+
+def ensure_schema(pool):
+    """Applies pending migrations once per process; later calls return immediately."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        with pool.connection() as conn:
+            apply_migrations(conn)
+        _schema_ready = True
+
+
+if __name__ == "__main__":
+    # Deploy-time entry point: python -m utils.migrations
+    logging.basicConfig(level=logging.INFO)
+    from utils.database import get_pool
+    with get_pool().connection() as conn:
+        versions = apply_migrations(conn)
+    print(f"Applied {len(versions)} migration(s): {versions}" if versions else "Schema is up to date.")
@@ -0,0 +1,117 @@
+import logging
+import os
+import re
+import zipfile
+
+from attached_assets.data_processor import convert_bengali_numerals_to_english
+from utils.image_upload import upload_images
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Photos read into memory and uploaded per round, bounding memory for large zips
+PHOTO_CHUNK_SIZE = 50
+
+DIGIT_RUNS = re.compile(r"\d+")
+
+
+def voter_number_from_filename(name):
+    """
+    Extracts the voter number from a photo file name such as '১২৩৪৫৬৭৮৯০.jpg'
+    or 'voter-1234567890 (1).jpeg': the longest run of digits, in English
+    numerals. Returns None when the name contains no digits.
+    """
+    stem = os.path.splitext(os.path.basename(name))[0]
+    runs = DIGIT_RUNS.findall(convert_bengali_numerals_to_english(stem))
+    # \d also matches other scripts' digits; only ASCII runs are voter numbers
+    runs = [run for run in runs if run.isascii()]
+    return max(runs, key=len) if runs else None
+
+
+def iter_photo_files(uploaded_files):
+    """
+    Yields (file name, read) for every photo among the uploaded files,
+    looking inside zip archives. read() returns the photo's bytes, so zip
+    members are only decompressed when they are about to be uploaded.
+    """
+    for uploaded_file in uploaded_files:
+        if uploaded_file.name.lower().endswith('.zip'):
+            archive = zipfile.ZipFile(uploaded_file)
+            for member in archive.infolist():
+                base_name = os.path.basename(member.filename)
+                if (member.is_dir() or member.filename.startswith('__MACOSX/') or base_name.startswith('.')
+                        or not base_name.lower().endswith(PHOTO_EXTENSIONS)):
+                    continue
+                yield base_name, lambda archive=archive, member=member: archive.read(member)
+        elif uploaded_file.name.lower().endswith(PHOTO_EXTENSIONS):
+            yield uploaded_file.name, uploaded_file.getvalue
+
+
+def link_photos(db, uploaded_files, uploader, chunk_size=PHOTO_CHUNK_SIZE, progress=None, **upload_options):
+    """
+    Uploads photos named by voter number and writes their links to the
+    matching records, one set-based update per chunk of uploads, so links
+    already saved survive a later failure. Files without a voter number,
+    without a matching record, duplicating another file's voter number or
+    failing to upload are not linked; if saving a chunk's links fails, its
+    files are reported as 'link_failed' with their uploaded URLs. progress(done,
+    total) reports uploads. Returns one report dictionary per file.
+    """
+    report = []
+    pending = {}  # voter number -> (file name, read), first file wins
+    for name, read in iter_photo_files(uploaded_files):
+        voter_no = voter_number_from_filename(name)
+        entry = {'file_name': name, 'voter_no': voter_no, 'status': None, 'url': None, 'records': 0}
+        report.append(entry)
+        if voter_no is None:
+            entry['status'] = 'no_voter_number'
+        elif voter_no in pending:
+            entry['status'] = 'duplicate'
+        else:
+            pending[voter_no] = (name, read)
+
+    # Only photos that will be linked are uploaded
+    known = db.find_voter_numbers(pending) if pending else set()
+    by_name = {entry['file_name']: entry for entry in report if entry['status'] is None}
+    for voter_no, (name, _) in list(pending.items()):
+        if voter_no not in known:
+            by_name[name]['status'] = 'no_record'
+            del pending[voter_no]
+
+    linked_count = 0
+    items = list(pending.items())
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        results = upload_images(
+            [(name, read()) for _, (name, read) in chunk], uploader,
+            progress=progress and (lambda done, total, start=start: progress(start + done, len(items))),
+            **upload_options
+        )
+        links = {}
+        for (voter_no, (name, _)), result in zip(chunk, results):
+            entry = by_name[name]
+            if result['url']:
+                entry['url'] = result['url']
+                links[voter_no] = result['url']
+            else:
+                entry['status'] = 'upload_failed'
+
+        try:
+            linked = db.link_photos_by_voter_number(links)
+        except Exception as e:
+            # The photos are uploaded; log their links so they can be applied by hand
+            logger.error(f"Could not save {len(links)} photo links: {e}; links: {links}")
+            for voter_no, (name, _) in chunk:
+                if voter_no in links:
+                    by_name[name]['status'] = 'link_failed'
+            continue
+        for voter_no, (name, _) in chunk:
+            entry = by_name[name]
+            if entry['status'] is None:
+                entry['records'] = len(linked.get(voter_no, []))
+                entry['status'] = 'linked' if entry['records'] else 'no_record'
+        linked_count += len(linked)
+    logger.info(f"Linked {linked_count} of {len(report)} photos to records.")
+    return report
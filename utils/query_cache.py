@@ -0,0 +1,162 @@
+import functools
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def _plain(value):
+    """Converts query results (RealDictRow, tuples, ...) to plain built-in types before pickling."""
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _freeze(value):
+    """Turns call arguments into a hashable cache key (dicts and lists become sorted tuples)."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class QueryCache:
+    """
+    A per-process LRU cache for the results of Database read methods.
+
+    Each entry remembers the version of every table it was read from. Write
+    methods bump those versions with bump(), which makes dependent entries
+    stale without scanning the cache. Entries are stored pickled, so their
+    size is known exactly and callers always get a private copy; the least
+    recently used entries are evicted once max_bytes is exceeded. An optional
+    TTL bounds staleness from writes made by other processes.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024, default_ttl=None):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (payload, versions, expires_at), least recently used first
+        self._bytes = 0
+        self._versions = {}
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0,
+            'oversized': 0,
+        }
+
+    def _snapshot(self, tables):
+        return tuple(self._versions.get(table, 0) for table in tables)
+
+    def _drop(self, key):
+        payload, _, _ = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    def get(self, key, tables):
+        """Returns (True, value) for a fresh entry, otherwise (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return False, None
+            payload, versions, expires_at = entry
+            if versions != self._snapshot(tables):
+                self._drop(key)
+                self._counters['invalidations'] += 1
+                self._counters['misses'] += 1
+                return False, None
+            if expires_at is not None and time.monotonic() >= expires_at:
+                self._drop(key)
+                self._counters['expirations'] += 1
+                self._counters['misses'] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+        return True, pickle.loads(payload)
+
+    def versions(self, tables):
+        """Returns the current versions of the tables; take this before running the query."""
+        with self._lock:
+            return self._snapshot(tables)
+
+    def put(self, key, value, versions, ttl=None):
+        """
+        Stores a result read at the given table versions. Results whose tables
+        changed while the query ran, or larger than the whole cache, are not kept.
+        """
+        payload = pickle.dumps(_plain(value), protocol=pickle.HIGHEST_PROTOCOL)
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            if len(payload) > self.max_bytes:
+                self._counters['oversized'] += 1
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (payload, versions, expires_at)
+            self._bytes += len(payload)
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._counters['evictions'] += 1
+
+    def bump(self, *tables):
+        """Marks every cached result read from these tables as stale."""
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def clear(self):
+        """Removes every entry; counters and table versions are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Returns size, hit rate and eviction counters."""
+        with self._lock:
+            stats = dict(self._counters)
+            lookups = stats['hits'] + stats['misses']
+            stats.update({
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'default_ttl': self.default_ttl,
+                'hit_rate': stats['hits'] / lookups if lookups else 0.0,
+                'table_versions': dict(self._versions),
+            })
+        return stats
+
+
+def cached_query(*tables, ttl=None):
+    """
+    Caches a Database read method in self.query_cache, keyed on the method name
+    and its arguments, and invalidated when any of the given tables is written.
+    Reads inside a caller-managed transaction bypass the cache, so they see the
+    transaction's own uncommitted writes.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache = self.query_cache
+            if self._in_transaction:
+                return method(self, *args, **kwargs)
+            key = (method.__name__, _freeze(args), _freeze(kwargs))
+            hit, value = cache.get(key, tables)
+            if hit:
+                return value
+            versions = cache.versions(tables)
+            value = method(self, *args, **kwargs)
+            if cache.versions(tables) == versions:
+                cache.put(key, value, versions, ttl)
+            return value
+        return wrapper
+    return decorator
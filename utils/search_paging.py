@@ -0,0 +1,121 @@
+import streamlit as st
+
+# Results shown per page on the search pages
+SEARCH_PAGE_SIZE = 25
+
+
+def start_search(state_key, db, criteria):
+    """
+    Starts a paged search: counts the matches once and keeps the criteria,
+    the total and the keyset cursors in st.session_state under state_key.
+    Returns the total number of matches.
+    """
+    total = db.count_records_advanced(criteria)
+    st.session_state[state_key] = {
+        'criteria': criteria,
+        'total': total,
+        'cursors': [None],   # after_id for each visited page; the last one is the current page
+        'pages': {},         # cursor -> rows already fetched, so Previous does not query again
+    }
+    return total
+
+
+def get_search(state_key):
+    """Returns the paged search stored under state_key, or None."""
+    return st.session_state.get(state_key)
+
+
+def current_page(state_key, db, page_size=SEARCH_PAGE_SIZE):
+    """Returns the rows of the current page, fetching only that page if it is not cached."""
+    search = st.session_state[state_key]
+    cursor = search['cursors'][-1]
+    if cursor not in search['pages']:
+        search['pages'][cursor] = db.search_records_advanced(search['criteria'], limit=page_size, after_id=cursor)
+    return search['pages'][cursor]
+
+
+def refresh_current_page(state_key):
+    """Drops the cached pages so the current page is read again, e.g. after an edit."""
+    search = st.session_state.get(state_key)
+    if search:
+        search['pages'] = {}
+
+
+def render_page_navigation(state_key, rows, page_size=SEARCH_PAGE_SIZE):
+    """Shows Previous / Next buttons and the position within the results."""
+    search = st.session_state[state_key]
+    cursors = search['cursors']
+    page_number = len(cursors)
+    total_pages = max(1, (search['total'] + page_size - 1) // page_size)
+    has_next_page = len(rows) == page_size and page_number < total_pages
+
+    def go_next():
+        cursors.append(rows[-1]['id'])
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("◀️ আগের পৃষ্ঠা", key=f"{state_key}_prev", disabled=page_number <= 1,
+                  on_click=cursors.pop, use_container_width=True)
+    with col2:
+        st.markdown(f"<div style='text-align:center'>পৃষ্ঠা {page_number} / {total_pages}</div>", unsafe_allow_html=True)
+    with col3:
+        st.button("পরের পৃষ্ঠা ▶️", key=f"{state_key}_next", disabled=not has_next_page,
+                  on_click=go_next, use_container_width=True)
+
+
+RELATIONSHIP_OPTIONS = ['Regular', 'Friend', 'Enemy', 'Connected']
+
+
+def render_bulk_actions(state_key, db, rows):
+    """
+    Shows bulk actions for a paged search: add or remove events and set the
+    relationship or political status, either for every match of the search or
+    for the records on the current page. Each action is one set-based statement.
+    """
+    search = st.session_state[state_key]
+    message_key = f"{state_key}_bulk_message"
+    if st.session_state.get(message_key):
+        st.success(st.session_state.pop(message_key))
+    with st.expander("⚡ একসাথে পরিবর্তন (বাল্ক অ্যাকশন)"):
+        scope = st.radio(
+            "প্রয়োগ করুন",
+            options=['all', 'page'],
+            format_func=lambda option: f"সব ফলাফলে ({search['total']} টি)" if option == 'all' else f"শুধু এই পৃষ্ঠায় ({len(rows)} টি)",
+            horizontal=True,
+            key=f"{state_key}_bulk_scope"
+        )
+        target = {'criteria': search['criteria']} if scope == 'all' else {'record_ids': [row['id'] for row in rows]}
+
+        action = st.selectbox(
+            "কাজ",
+            options=['add_events', 'remove_events', 'relationship', 'political'],
+            format_func={
+                'add_events': "ইভেন্ট যোগ করুন",
+                'remove_events': "ইভেন্ট সরিয়ে ফেলুন",
+                'relationship': "সম্পর্কের ধরণ নির্ধারণ করুন",
+                'political': "Political Status নির্ধারণ করুন",
+            }.get,
+            key=f"{state_key}_bulk_action"
+        )
+        if action in ('add_events', 'remove_events'):
+            event_map = {event['name']: event['id'] for event in db.get_all_events()}
+            value = st.multiselect("ইভেন্ট", options=list(event_map), key=f"{state_key}_bulk_events")
+        elif action == 'relationship':
+            value = st.selectbox("সম্পর্কের ধরণ", options=RELATIONSHIP_OPTIONS, key=f"{state_key}_bulk_relationship")
+        else:
+            value = st.text_input("Political Status", key=f"{state_key}_bulk_political")
+
+        if st.button("✅ প্রয়োগ করুন", key=f"{state_key}_bulk_apply", type="primary", disabled=action in ('add_events', 'remove_events') and not value):
+            with st.spinner("পরিবর্তন প্রয়োগ করা হচ্ছে..."):
+                if action == 'add_events':
+                    changed_ids = db.bulk_add_events([event_map[name] for name in value], **target)
+                elif action == 'remove_events':
+                    changed_ids = db.bulk_remove_events([event_map[name] for name in value], **target)
+                elif action == 'relationship':
+                    changed_ids = db.bulk_set_relationship_status(value, **target)
+                else:
+                    changed_ids = db.bulk_set_political_status(value.strip(), **target)
+            # Re-read the page so the cards show the new values
+            refresh_current_page(state_key)
+            st.session_state[message_key] = f"{len(changed_ids)} টি রেকর্ড পরিবর্তিত হয়েছে।"
+            st.rerun()
@@ -0,0 +1,374 @@
+import hashlib
+import io
+import ipaddress
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import requests
+import streamlit as st
+from PIL import Image, ImageDraw, ImageOps
+from requests.adapters import HTTPAdapter
+
+from utils.database import DEFAULT_PHOTO_LINK
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = 160
+THUMBNAIL_QUALITY = 75
+# Remote photos larger than this are not fetched
+MAX_SOURCE_BYTES = 20 * 1024 * 1024
+# A URL that failed to load is not fetched again for this many seconds
+FAILURE_TTL = 600
+# Redirects followed per photo; every hop is checked like the original URL
+MAX_REDIRECTS = 3
+
+# Thumbnails are written below Streamlit's static folder (server.enableStaticServing
+# in .streamlit/config.toml), so browsers load and cache them by URL.
+STATIC_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+THUMBNAIL_DIRECTORY = os.path.join(STATIC_DIRECTORY, 'thumbnails')
+THUMBNAIL_URL_PREFIX = 'app/static/thumbnails/'
+PLACEHOLDER_FILE_NAME = 'placeholder.jpg'
+
+
+def is_public_address(ip):
+    """Whether a fetched photo may come from this address (no private, loopback, link-local, ... ranges)."""
+    return ip.is_global
+
+
+class _PinnedHostAdapter(HTTPAdapter):
+    """Sends SNI and checks the certificate for `hostname` while connecting to an already-resolved address."""
+    def __init__(self, hostname):
+        self._hostname = hostname
+        super().__init__()
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['server_hostname'] = self._hostname
+        kwargs['assert_hostname'] = self._hostname
+        super().init_poolmanager(*args, **kwargs)
+
+
+class ThumbnailCache:
+    """
+    Fetches each distinct photo URL once, stores a small JPEG thumbnail of it
+    in a size-bounded directory and serves it from there, so pages send a few
+    kilobytes from this server instead of pointing browsers at full-size
+    remote photos.
+
+    Pages ask for url(), which never blocks: a cached thumbnail is returned as
+    a URL under url_prefix, and a missing one is fetched on a background thread
+    while the placeholder is shown. Files are named by a hash of the URL;
+    serving one refreshes its mtime, and the least recently used files are
+    deleted once max_bytes is exceeded.
+
+    Photo links are editable, so a URL is only fetched if its host is in
+    allowed_hosts (a host or any subdomain of it; None allows any host) and
+    resolves to public addresses only. The connection is made to the address
+    that was checked, so the host cannot be re-resolved to another one, and
+    the response must be an image.
+    """
+    def __init__(self, directory, url_prefix='', max_bytes=256 * 1024 * 1024, size=THUMBNAIL_SIZE,
+                 placeholder_urls=(), timeout=10, allowed_hosts=None, fetch_workers=4):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.max_bytes = max_bytes
+        self.size = size
+        self.placeholder_urls = set(placeholder_urls)
+        self.timeout = timeout
+        self.allowed_hosts = None if allowed_hosts is None else {host.lower().strip('.') for host in allowed_hosts}
+        self._lock = threading.Lock()
+        self._url_locks = {}
+        self._failures = {}  # url -> time of the failed fetch
+        self._warming = set()  # urls queued for a background fetch
+        self._executor = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix='thumbnail-fetch')
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'fetches': 0, 'failures': 0, 'evictions': 0}
+        self.placeholder = self._draw_placeholder()
+
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, PLACEHOLDER_FILE_NAME), 'wb') as placeholder_file:
+            placeholder_file.write(self.placeholder)
+        self.placeholder_url = url_prefix + PLACEHOLDER_FILE_NAME
+
+        self._files = {}  # file name -> (size, last used), rebuilt from the directory
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.endswith('.jpg') and entry.name != PLACEHOLDER_FILE_NAME:
+                stat = entry.stat()
+                self._files[entry.name] = (stat.st_size, stat.st_mtime)
+        self._bytes = sum(size for size, _ in self._files.values())
+
+    def _draw_placeholder(self):
+        image = Image.new('RGB', (self.size, self.size), (238, 238, 238))
+        draw = ImageDraw.Draw(image)
+        text = "No Image"
+        left, top, right, bottom = draw.textbbox((0, 0), text)
+        draw.text(((self.size - (right - left)) / 2, (self.size - (bottom - top)) / 2), text, fill=(49, 52, 60))
+        output = io.BytesIO()
+        image.save(output, format='JPEG', quality=THUMBNAIL_QUALITY)
+        return output.getvalue()
+
+    def _file_name(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest() + '.jpg'
+
+    def _path(self, url):
+        return os.path.join(self.directory, self._file_name(url))
+
+    def _has_photo(self, url):
+        return bool(url) and url not in self.placeholder_urls and url.startswith(('http://', 'https://'))
+
+    def _make_thumbnail(self, data):
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((self.size, self.size), Image.LANCZOS)
+            output = io.BytesIO()
+            image.convert('RGB').save(output, format='JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+        return output.getvalue()
+
+    # --- Fetching ---
+
+    def _resolve(self, url):
+        """
+        Returns the address to connect to for an http(s) URL on an allowed host.
+        Raises ValueError if the host is not allowed or any of its addresses is not public.
+        """
+        parts = urlsplit(url)
+        host = (parts.hostname or '').lower().strip('.')
+        if parts.scheme not in ('http', 'https') or not host:
+            raise ValueError("not an http(s) URL")
+        if self.allowed_hosts is not None and not any(
+            host == allowed or host.endswith('.' + allowed) for allowed in self.allowed_hosts
+        ):
+            raise ValueError(f"host {host} is not an allowed photo host")
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        addresses = [
+            ipaddress.ip_address(address[0].split('%')[0])
+            for *_, address in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)
+        ]
+        if not addresses:
+            raise ValueError(f"host {host} has no addresses")
+        for ip in addresses:
+            if not is_public_address(ip):
+                raise ValueError(f"host {host} resolves to the non-public address {ip}")
+        return addresses[0]
+
+    @contextmanager
+    def _get_pinned(self, url, ip):
+        """
+        GETs url from the given address, yielding the streamed response; the
+        Host header, SNI and certificate check keep the URL's host name.
+        """
+        parts = urlsplit(url)
+        address = f"[{ip}]" if ip.version == 6 else str(ip)
+        if parts.port:
+            address += f":{parts.port}"
+        session = requests.Session()
+        session.trust_env = False  # A proxy would resolve the host name again
+        if parts.scheme == 'https':
+            session.mount('https://', _PinnedHostAdapter(parts.hostname))
+        host_header = parts.hostname + (f":{parts.port}" if parts.port else '')
+        try:
+            with session.get(
+                urlunsplit((parts.scheme, address, parts.path or '/', parts.query, '')),
+                headers={'Host': host_header}, timeout=self.timeout, stream=True, allow_redirects=False
+            ) as response:
+                yield response
+        finally:
+            session.close()
+
+    def _fetch(self, url):
+        for _ in range(MAX_REDIRECTS + 1):
+            ip = self._resolve(url)
+            with self._get_pinned(url, ip) as response:
+                if response.is_redirect:
+                    url = urljoin(url, response.headers['Location'])
+                    continue
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+                if not content_type.startswith('image/'):
+                    raise ValueError(f"response is {content_type or 'untyped'}, not an image")
+                if int(response.headers.get('Content-Length') or 0) > MAX_SOURCE_BYTES:
+                    raise ValueError(f"photo is larger than {MAX_SOURCE_BYTES} bytes")
+                data = response.raw.read(MAX_SOURCE_BYTES + 1, decode_content=True)
+            if len(data) > MAX_SOURCE_BYTES:
+                raise ValueError(f"photo is larger than {MAX_SOURCE_BYTES} bytes")
+            return self._make_thumbnail(data)
+        raise ValueError(f"more than {MAX_REDIRECTS} redirects")
+
+    # --- Disk cache ---
+
+    def _store(self, path, thumbnail):
+        # Written to a temporary file first so readers never see a partial thumbnail
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as output:
+            output.write(thumbnail)
+        os.replace(temporary, path)
+        name = os.path.basename(path)
+        with self._lock:
+            previous_size, _ = self._files.get(name, (0, 0))
+            self._files[name] = (len(thumbnail), time.time())
+            self._bytes += len(thumbnail) - previous_size
+            while self._bytes > self.max_bytes and len(self._files) > 1:
+                oldest = min(self._files, key=lambda file_name: self._files[file_name][1])
+                size, _ = self._files.pop(oldest)
+                self._bytes -= size
+                self._counters['evictions'] += 1
+                try:
+                    os.remove(os.path.join(self.directory, oldest))
+                except OSError:
+                    pass
+
+    def _touch(self, path):
+        """Marks a cached file as just used, in memory and in its mtime (which keeps the LRU order across restarts)."""
+        now = time.time()
+        name = os.path.basename(path)
+        with self._lock:
+            if name in self._files:
+                self._files[name] = (self._files[name][0], now)
+            self._counters['disk_hits'] += 1
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as thumbnail_file:
+                thumbnail = thumbnail_file.read()
+        except OSError:
+            return None
+        self._touch(path)
+        return thumbnail
+
+    def _recently_failed(self, url):
+        """Whether the URL failed within FAILURE_TTL; the caller holds the lock."""
+        failed_at = self._failures.get(url)
+        return failed_at is not None and time.monotonic() - failed_at < FAILURE_TTL
+
+    # --- Serving ---
+
+    def get(self, url):
+        """
+        Returns the JPEG thumbnail for a photo URL, or the placeholder if there
+        is none or it cannot be loaded. Fetches it if missing, so this blocks;
+        pages use url() instead.
+        """
+        url = (url or '').strip()
+        if not self._has_photo(url):
+            with self._lock:
+                self._counters['memory_hits'] += 1
+            return self.placeholder
+
+        path = self._path(url)
+        thumbnail = self._read(path)
+        if thumbnail is not None:
+            return thumbnail
+
+        with self._lock:
+            if self._recently_failed(url):
+                return self.placeholder
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+        # One fetch per URL; concurrent requests for it wait and read the stored file
+        with url_lock:
+            thumbnail = self._read(path)
+            if thumbnail is None:
+                try:
+                    thumbnail = self._fetch(url)
+                    self._store(path, thumbnail)
+                    with self._lock:
+                        self._counters['fetches'] += 1
+                        self._failures.pop(url, None)
+                except (requests.RequestException, OSError, ValueError, Image.DecompressionBombError) as e:
+                    logger.warning(f"Could not load photo {url}: {e}. Using the placeholder.")
+                    with self._lock:
+                        self._counters['failures'] += 1
+                        self._failures[url] = time.monotonic()
+                    thumbnail = self.placeholder
+        with self._lock:
+            self._url_locks.pop(url, None)
+        return thumbnail
+
+    def url(self, photo_url):
+        """
+        Returns the URL this server serves the photo's thumbnail at. Never
+        fetches: a thumbnail not cached yet is queued for a background fetch
+        and the placeholder URL is returned until it is stored.
+        """
+        photo_url = (photo_url or '').strip()
+        if not self._has_photo(photo_url):
+            with self._lock:
+                self._counters['memory_hits'] += 1
+            return self.placeholder_url
+        name = self._file_name(photo_url)
+        with self._lock:
+            cached = name in self._files
+        if cached:
+            self._touch(os.path.join(self.directory, name))
+            return self.url_prefix + name
+        self.warm([photo_url])
+        return self.placeholder_url
+
+    def urls(self, photo_urls):
+        """Returns {photo url: thumbnail url} for the distinct photo URLs (see url())."""
+        return {photo_url: self.url(photo_url) for photo_url in dict.fromkeys(photo_urls)}
+
+    def warm(self, photo_urls):
+        """Queues background fetches for the photos that are neither cached, queued nor recently failed."""
+        for photo_url in dict.fromkeys((photo_url or '').strip() for photo_url in photo_urls):
+            if not self._has_photo(photo_url):
+                continue
+            with self._lock:
+                if (self._file_name(photo_url) in self._files or photo_url in self._warming
+                        or self._recently_failed(photo_url)):
+                    continue
+                self._warming.add(photo_url)
+            self._executor.submit(self._warm_one, photo_url)
+
+    def _warm_one(self, photo_url):
+        try:
+            self.get(photo_url)
+        except Exception as e:
+            logger.error(f"Background thumbnail fetch for {photo_url} failed: {e}")
+        finally:
+            with self._lock:
+                self._warming.discard(photo_url)
+
+    def stats(self):
+        """Returns hit/fetch counters and the size of the disk cache."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update({
+                'entries': len(self._files), 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                'queued': len(self._warming),
+            })
+        return stats
+
+
+# Process-wide thumbnail cache shared by every Streamlit session
+_thumbnail_cache = None
+_thumbnail_cache_lock = threading.Lock()
+
+def get_thumbnail_cache():
+    """
+    Returns the process-wide thumbnail cache, creating it on first use. Its
+    size bound can be set with the optional THUMBNAIL_CACHE_MAX_MB secret, and
+    the photo hosts it fetches from with THUMBNAIL_ALLOWED_HOSTS (a list; unset
+    allows any public host).
+    """
+    global _thumbnail_cache
+    if _thumbnail_cache is None:
+        with _thumbnail_cache_lock:
+            if _thumbnail_cache is None:
+                _thumbnail_cache = ThumbnailCache(
+                    THUMBNAIL_DIRECTORY,
+                    url_prefix=THUMBNAIL_URL_PREFIX,
+                    max_bytes=int(float(st.secrets.get("THUMBNAIL_CACHE_MAX_MB", 256)) * 1024 * 1024),
+                    placeholder_urls=(DEFAULT_PHOTO_LINK,),
+                    allowed_hosts=st.secrets.get("THUMBNAIL_ALLOWED_HOSTS"),
+                )
+    return _thumbnail_cache